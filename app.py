@@ -1,38 +1,60 @@
+import time
+_T0 = time.perf_counter()          # startup timing starts at the first import
+
+import os, sys, queue, threading, importlib
 import tkinter as tk
-from tkinter import ttk, messagebox, simpledialog
+from tkinter import ttk, messagebox, simpledialog, filedialog
 
-from db import init_db
-from ui.medicines import MedicinesFrame
-from ui.patients  import PatientsFrame
-from ui.sale      import SaleFrame
+from db import init_db, build_online_indexes
+from ui.jobs import get_queue, JobsPanel
+from services.alerts import subscribe as watch_low_stock
+from services import instrumentation
 
-# Tools menu helpers
-from services.alerts   import low_stock_items
-from services.reports  import export_sales_csv_for_date
-from services.printing import open_file
-from services.inventory import stock_in
-from services.medicines import search_medicines
+# Everything else (the tabs, reports, printing, ...) is imported on first use,
+# so none of it is on the startup path.
+TABS = (
+    # tab text     module          frame class
+    ("Medicines", "ui.medicines", "MedicinesFrame"),
+    ("Patients",  "ui.patients",  "PatientsFrame"),
+    ("New Sale",  "ui.sale",      "SaleFrame"),
+)
 
 
 def main():
-    init_db()
+    phases = [("imports", time.perf_counter())]
+    init_db(defer_indexes=True)      # only pending schema steps; slow indexes come later
+    phases.append(("init_db", time.perf_counter()))
 
     root = tk.Tk()
     root.title("Bhatti Clinic")
     root.geometry("1100x700")
+    jobs = get_queue(root)   # printing/exports run here, off the Tk thread
 
-    # --- Tabs ---
+    # --- Tabs (each frame is built the first time its tab is selected) ---
     nb = ttk.Notebook(root)
     nb.pack(fill="both", expand=True)
 
-    nb.add(MedicinesFrame(nb), text="Medicines")
-    nb.add(PatientsFrame(nb),  text="Patients")
-    nb.add(SaleFrame(nb),      text="New Sale")
+    tabs = []                # [holder frame, module, class name, built frame or None]
+    for text, module, cls in TABS:
+        holder = ttk.Frame(nb)
+        nb.add(holder, text=text)
+        tabs.append([holder, module, cls, None])
+
+    def build_tab(index):
+        tab = tabs[index]
+        if tab[3] is None:
+            frame_cls = getattr(importlib.import_module(tab[1]), tab[2])
+            tab[3] = frame_cls(tab[0])
+            tab[3].pack(fill="both", expand=True)
+        return tab[3]
+
+    nb.bind("<<NotebookTabChanged>>", lambda _e: build_tab(nb.index("current")))
 
     # --- Tools menu ---
     menubar = tk.Menu(root)
 
     def show_low_stock():
+        from services.alerts import low_stock_items
         rows = low_stock_items()
         win = tk.Toplevel(root)
         win.title("Low Stock Alerts")
@@ -52,13 +74,11 @@ def main():
         if not rows:
             ttk.Label(win, text="Great! No low-stock items.").pack(padx=10, pady=10)
 
-    def export_daily_csv():
-        d = simpledialog.askstring(root, "Export Daily Sales",
-                                   "Enter date (YYYY-MM-DD):", parent=root)
-        if not d:
-            return
-        try:
-            path, totals = export_sales_csv_for_date(d)
+    def run_export(title, export_fn, *args):
+        from services.printing import open_file
+
+        def done(result):
+            path, totals = result
             messagebox.showinfo(
                 "Export complete",
                 f"Saved to:\n{path}\n\n"
@@ -69,11 +89,205 @@ def main():
                 f"Grand Total: {totals['grand_total']:.2f}"
             )
             open_file(path)
+
+        jobs.submit(title, export_fn, *args, on_done=done,
+                    on_error=lambda e: messagebox.showerror("Export failed", str(e)))
+
+    def export_daily_csv():
+        d = simpledialog.askstring("Export Daily Sales",
+                                   "Enter date (YYYY-MM-DD):", parent=root)
+        if not d:
+            return
+        from services.reports import export_sales_csv_for_date
+        run_export(f"Daily sales {d}", export_sales_csv_for_date, d)
+
+    def export_monthly_csv():
+        m = simpledialog.askstring("Export Monthly Sales",
+                                   "Enter month (YYYY-MM):", parent=root)
+        if not m:
+            return
+        try:
+            year, month = (int(x) for x in m.strip().split("-"))
+        except Exception:
+            messagebox.showerror("Export failed", "Month must be in YYYY-MM format.")
+            return
+        from services.reports import export_sales_csv_for_month
+        run_export(f"Monthly sales {year}-{month:02d}", export_sales_csv_for_month, year, month)
+
+    def export_range_csv():
+        d1 = simpledialog.askstring("Export Sales", "From date (YYYY-MM-DD):", parent=root)
+        if not d1:
+            return
+        d2 = simpledialog.askstring("Export Sales", "To date (YYYY-MM-DD, inclusive):", parent=root)
+        if not d2:
+            return
+        from services.reports import export_sales_csv_between
+        run_export(f"Sales {d1} to {d2}", export_sales_csv_between, d1, d2)
+
+    def export_stock_audit():
+        d = simpledialog.askstring("Stock Audit", "Stock on date (YYYY-MM-DD):", parent=root)
+        if not d:
+            return
+        from services.reports import export_stock_on_date_csv
+        from services.printing import open_file
+
+        def done(result):
+            path, n = result
+            messagebox.showinfo("Stock Audit", f"Saved {n} medicines to:\n{path}")
+            open_file(path)
+
+        jobs.submit(f"Stock audit {d}", export_stock_on_date_csv, d, on_done=done,
+                    on_error=lambda e: messagebox.showerror("Stock Audit", str(e)))
+
+    def show_sales_summary():
+        d1 = simpledialog.askstring("Sales Summary", "From date (YYYY-MM-DD):", parent=root)
+        if not d1:
+            return
+        d2 = simpledialog.askstring("Sales Summary", "To date (YYYY-MM-DD, inclusive):", parent=root)
+        if not d2:
+            return
+        from services.rollups import period_summary
+        try:
+            t = period_summary(d1.strip(), d2.strip())
         except Exception as e:
-            messagebox.showerror("Export failed", str(e))
+            messagebox.showerror("Sales Summary", str(e))
+            return
+        top = "\n".join(f"  {name}: {qty} ({revenue:.2f})" for _mid, name, qty, revenue in t["top_medicines"])
+        messagebox.showinfo(
+            "Sales Summary",
+            f"{d1} to {d2} ({t['days']} day(s) with sales)\n\n"
+            f"Invoices: {t['count']}\n"
+            f"Items: {t['items']}\n"
+            f"Subtotal: {t['subtotal']:.2f}\n"
+            f"Doctor Fee: {t['doctor_fee']:.2f}\n"
+            f"Grand Total: {t['grand_total']:.2f}\n\n"
+            f"Top medicines:\n{top or '  -'}"
+        )
+
+    def export_analytics():
+        d1 = simpledialog.askstring("Sales Analytics", "From date (YYYY-MM-DD):", parent=root)
+        if not d1:
+            return
+        d2 = simpledialog.askstring("Sales Analytics", "To date (YYYY-MM-DD, inclusive):", parent=root)
+        if not d2:
+            return
+        from services.analytics import export_analytics_html
+        from services.printing import open_file
+        jobs.submit(f"Sales analytics {d1} to {d2}", export_analytics_html, d1, d2, on_done=open_file,
+                    on_error=lambda e: messagebox.showerror("Sales Analytics", str(e)))
+
+    def export_purchase_order():
+        from services.reorder import export_purchase_order_csv
+        from services.printing import open_file
+
+        def done(result):
+            path, t = result
+            messagebox.showinfo(
+                "Purchase Order",
+                f"Saved to:\n{path}\n\n"
+                f"Medicines to order: {t['lines']}\n"
+                f"Units: {t['units']}\n"
+                f"Value (sale price): {t['value']:.2f}"
+            )
+            open_file(path)
+
+        jobs.submit("Purchase order suggestions", export_purchase_order_csv, on_done=done,
+                    on_error=lambda e: messagebox.showerror("Purchase Order", str(e)))
+
+    def do_rebuild_rollups():
+        if not messagebox.askyesno("Rebuild Sales Summary",
+                                   "Recompute daily sales totals from all invoices?"):
+            return
+        from services.rollups import rebuild as rebuild_rollups
+        jobs.submit("Rebuild sales summary", rebuild_rollups,
+                    on_done=lambda n: messagebox.showinfo("Rebuild Sales Summary", f"Rebuilt {n} day(s)."),
+                    on_error=lambda e: messagebox.showerror("Rebuild Sales Summary", str(e)))
+
+    def export_invoices_pdf():
+        """Render a date range of invoices as PDFs in the background, with progress."""
+        from services.printing import open_file, export_invoices_pdf_between
+        win = tk.Toplevel(root)
+        win.title("Export Invoices (PDF)")
+        win.resizable(False, False)
+        frame = ttk.Frame(win, padding=10); frame.pack(fill="both", expand=True)
+
+        var_from = tk.StringVar()
+        var_to   = tk.StringVar()
+        var_out  = tk.StringVar(value="Single PDF")
+        outputs  = {"Single PDF": "merged", "ZIP of PDFs": "zip", "Folder of PDFs": "files"}
+
+        ttk.Label(frame, text="From (YYYY-MM-DD)").grid(row=0, column=0, sticky="w")
+        ttk.Entry(frame, textvariable=var_from, width=14).grid(row=0, column=1, padx=6, pady=3)
+        ttk.Label(frame, text="To (inclusive)").grid(row=1, column=0, sticky="w")
+        ttk.Entry(frame, textvariable=var_to, width=14).grid(row=1, column=1, padx=6, pady=3)
+        ttk.Label(frame, text="Output").grid(row=2, column=0, sticky="w")
+        ttk.Combobox(frame, textvariable=var_out, values=list(outputs), state="readonly", width=14)\
+           .grid(row=2, column=1, padx=6, pady=3)
+
+        bar = ttk.Progressbar(frame, length=260, mode="determinate")
+        bar.grid(row=3, column=0, columnspan=2, pady=(8, 2))
+        lbl = ttk.Label(frame, text="")
+        lbl.grid(row=4, column=0, columnspan=2, sticky="w")
+        btn_start  = ttk.Button(frame, text="Export")
+        btn_cancel = ttk.Button(frame, text="Cancel", state="disabled")
+        btn_start.grid(row=5, column=0, sticky="w", pady=(6, 0))
+        btn_cancel.grid(row=5, column=1, sticky="e", pady=(6, 0))
+
+        events = queue.Queue()     # filled by the worker thread, drained on the Tk thread
+        cancel = threading.Event()
+
+        def worker(d1, d2, output):
+            try:
+                res = export_invoices_pdf_between(
+                    d1, d2, output, progress=lambda done, total: events.put(("progress", done, total)),
+                    cancel=cancel)
+                events.put(("done", res))
+            except Exception as e:
+                events.put(("error", e))
+
+        def poll():
+            if not win.winfo_exists():
+                return
+            try:
+                while True:
+                    ev = events.get_nowait()
+                    if ev[0] == "progress":
+                        _kind, done, total = ev
+                        bar.configure(maximum=max(total, 1), value=done)
+                        lbl.configure(text=f"{done} / {total} invoices")
+                        continue
+                    btn_start.configure(state="normal"); btn_cancel.configure(state="disabled")
+                    if ev[0] == "error":
+                        messagebox.showerror("Export failed", str(ev[1]), parent=win)
+                    else:
+                        path, n = ev[1]
+                        if path is None:
+                            lbl.configure(text=f"Cancelled after {n} invoices.")
+                        else:
+                            lbl.configure(text=f"Saved {n} invoices.")
+                            open_file(path)
+                    return
+            except queue.Empty:
+                pass
+            win.after(100, poll)
+
+        def start():
+            cancel.clear()
+            btn_start.configure(state="disabled"); btn_cancel.configure(state="normal")
+            lbl.configure(text="Preparing...")
+            threading.Thread(target=worker, daemon=True,
+                             args=(var_from.get(), var_to.get(), outputs[var_out.get()])).start()
+            poll()
+
+        btn_start.configure(command=start)
+        btn_cancel.configure(command=cancel.set)
+        win.protocol("WM_DELETE_WINDOW", lambda: (cancel.set(), win.destroy()))
 
     def show_stock_in():
         """Small window to search a medicine and increase its stock."""
+        from ui.search import SearchController
+        from services import catalog
+        from services.inventory import stock_in
         win = tk.Toplevel(root)
         win.title("Stock-In (Increase Stock)")
 
@@ -96,17 +310,17 @@ def main():
         lb = tk.Listbox(frame, height=8, width=64)
         lb.grid(row=1, column=0, columnspan=6, sticky="w", padx=0, pady=8)
 
-        def do_search(_e=None):
-            q = (var_search.get() or "").strip()
+        results = []                  # Medicine rows, parallel to the listbox
+
+        def show_results(rows):
+            results[:] = rows
             lb.delete(0, tk.END)
-            if not q:
-                return
-            rows = search_medicines(q)
-            for r in rows:
-                mid, name, category, unit_price, stock_qty, reorder_level, barcode, active = r
-                lb.insert(tk.END, f"{mid} | {name} | Rs {unit_price} | Stock: {stock_qty}")
+            for r in results:
+                lb.insert(tk.END, f"{r.id} | {r.name} | Rs {r.unit_price} | Stock: {r.stock_qty}")
 
-        ent.bind("<KeyRelease>", do_search)
+        search = SearchController(win, var_search.get,
+                                  lambda q: catalog.search(q) if q else [], show_results)
+        ent.bind("<KeyRelease>", lambda _e: search.schedule())
 
         def do_stock_in():
             sel = lb.curselection()
@@ -114,12 +328,7 @@ def main():
                 messagebox.showerror("Error", "Select a medicine from the list.")
                 return
 
-            line = lb.get(sel[0])
-            parts = [p.strip() for p in line.split("|")]
-            try:
-                mid = int(parts[0])
-            except Exception:
-                messagebox.showerror("Error", "Could not read medicine ID."); return
+            mid = results[sel[0]].id
 
             try:
                 q = int(var_qty.get())
@@ -133,7 +342,7 @@ def main():
             try:
                 name, new_qty = stock_in(mid, q, reason)
                 messagebox.showinfo("Stock updated", f"{name}\nNew stock: {new_qty}")
-                do_search()  # refresh list to show updated stock
+                search.run_now()  # refresh list to show updated stock
             except Exception as e:
                 messagebox.showerror("Error", str(e))
 
@@ -143,14 +352,132 @@ def main():
         # Start with focus in the search box
         ent.focus_set()
 
+    def bulk_stock_in():
+        path = filedialog.askopenfilename(
+            parent=root, title="Select delivery note",
+            filetypes=[("Delivery files", "*.csv *.xlsx"), ("All files", "*.*")])
+        if not path:
+            return
+        from services.inventory import receive_delivery_file
+        from services.printing import open_file
+
+        def done(r):
+            msg = (f"Lines read: {r['lines']}\n"
+                   f"Applied: {r['applied']} ({r['units']} units, {r['medicines']} medicines)\n"
+                   f"Rejected: {len(r['rejected'])}")
+            if r["reject_path"]:
+                if messagebox.askyesno("Stock-In complete", msg + "\n\nOpen the rejection report?"):
+                    open_file(r["reject_path"])
+            else:
+                messagebox.showinfo("Stock-In complete", msg)
+
+        # retries=0: a second run would add the delivered stock twice
+        jobs.submit(f"Stock-in {os.path.basename(path)}", receive_delivery_file, path, on_done=done,
+                    on_error=lambda e: messagebox.showerror("Stock-In failed", str(e)), retries=0)
+
+    # --- Low-stock monitor ---
+    # Services report medicines that just crossed their reorder level (no table
+    # polling); they may do so from worker threads, so hand them over via a queue.
+    low_stock_events = queue.Queue()
+    watch_low_stock(low_stock_events.put)
+
+    def show_low_stock_toast(rows):
+        toast = tk.Toplevel(root)
+        toast.overrideredirect(True)
+        toast.attributes("-topmost", True)
+        box = ttk.Frame(toast, padding=10, relief="solid", borderwidth=1)
+        box.pack(fill="both", expand=True)
+        ttk.Label(box, text="Low stock", font=("TkDefaultFont", 10, "bold")).pack(anchor="w")
+        for _mid, name, stock, reorder, _price in rows[:5]:
+            ttk.Label(box, text=f"{name}: {stock} left (reorder at {reorder})").pack(anchor="w")
+        if len(rows) > 5:
+            ttk.Label(box, text=f"...and {len(rows) - 5} more").pack(anchor="w")
+        btns = ttk.Frame(box); btns.pack(anchor="e", pady=(6, 0))
+        ttk.Button(btns, text="View", command=lambda: (toast.destroy(), show_low_stock())).pack(side="left", padx=2)
+        ttk.Button(btns, text="Dismiss", command=toast.destroy).pack(side="left", padx=2)
+
+        toast.update_idletasks()
+        x = root.winfo_rootx() + root.winfo_width() - toast.winfo_reqwidth() - 16
+        y = root.winfo_rooty() + root.winfo_height() - toast.winfo_reqheight() - 16
+        toast.geometry(f"+{max(x, 0)}+{max(y, 0)}")
+        toast.after(8000, lambda: toast.winfo_exists() and toast.destroy())
+
+    def drain_low_stock_events():
+        rows = []
+        try:
+            while True:
+                rows += low_stock_events.get_nowait()
+        except queue.Empty:
+            pass
+        if rows:
+            show_low_stock_toast(rows)
+        root.after(500, drain_low_stock_events)
+
+    drain_low_stock_events()
+
+    # --- Background jobs status ---
+    status = ttk.Label(root, text="", anchor="w", cursor="hand2")
+    status.pack(side="bottom", fill="x", padx=8, pady=(0, 4), before=nb)
+
+    def show_jobs():
+        JobsPanel(root, jobs)
+
+    def show_diagnostics():
+        from ui.diagnostics import DiagnosticsWindow
+        DiagnosticsWindow(root)
+
+    def update_job_status(q):
+        c = q.counts()
+        busy = c["queued"] + c["running"] + c["retrying"]
+        parts = []
+        if busy:
+            parts.append(f"Working on {busy} job(s)...")
+        if c["failed"]:
+            parts.append(f"{c['failed']} job(s) failed - click for details")
+        status.config(text="   ".join(parts), foreground="#b00020" if c["failed"] else "")
+
+    jobs.subscribe(update_job_status)
+    status.bind("<Button-1>", lambda _e: show_jobs())
+
     tools = tk.Menu(menubar, tearoff=0)
     tools.add_command(label="Low Stock Alerts", command=show_low_stock)
     tools.add_command(label="Stock-In (Increase Stock)", command=show_stock_in)
+    tools.add_command(label="Stock-In from Delivery File...", command=bulk_stock_in)
     tools.add_command(label="Export Daily Sales (CSV)", command=export_daily_csv)
+    tools.add_command(label="Export Monthly Sales (CSV)", command=export_monthly_csv)
+    tools.add_command(label="Export Sales Date Range (CSV)", command=export_range_csv)
+    tools.add_command(label="Export Invoices (PDF)...", command=export_invoices_pdf)
+    tools.add_command(label="Sales Summary (Period)", command=show_sales_summary)
+    tools.add_command(label="Sales Analytics (Period)...", command=export_analytics)
+    tools.add_command(label="Stock Audit on Date (CSV)", command=export_stock_audit)
+    tools.add_command(label="Purchase Order Suggestions (CSV)", command=export_purchase_order)
+    tools.add_command(label="Rebuild Sales Summary", command=do_rebuild_rollups)
+    tools.add_separator()
+    tools.add_command(label="Background Jobs", command=show_jobs)
+    tools.add_command(label="Diagnostics", command=show_diagnostics)
     menubar.add_cascade(label="Tools", menu=tools)
     root.config(menu=menubar)
     # --- end Tools menu ---
 
+    # --- Startup ---
+    # Build only the first tab now; the window is usable as soon as it is drawn.
+    phases.append(("window", time.perf_counter()))
+    build_tab(nb.index("current"))
+    phases.append(("first tab", time.perf_counter()))
+
+    def startup_done():
+        phases.append(("first paint", time.perf_counter()))
+        instrumentation.record_startup(_T0, phases)
+        if os.environ.get("CLINIC_STARTUP_TIMING") == "1" or "--startup-timing" in sys.argv:
+            print(instrumentation.startup_report())
+        # Slower housekeeping runs in the background after the window is up
+        from services.ledger import create_checkpoints
+        from services import catalog
+        jobs.submit("Monthly stock checkpoints", create_checkpoints)   # no-op unless a new month has started
+        jobs.submit("Load medicine list", catalog.warm)                # first search is then instant
+        jobs.submit("Build database indexes", build_online_indexes)    # no-op once built
+
+    root.after_idle(lambda: root.after(0, startup_done))   # after the first draw
     root.mainloop()
 
 
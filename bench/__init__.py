@@ -0,0 +1,8 @@
+# bench/__init__.py
+"""
+Benchmarks for the clinic services against a synthetic, clinic.db-shaped database.
+
+    python -m bench generate --scale small       # seed data/bench/clinic_bench.db
+    python -m bench run                          # time the scenarios, write JSON
+    python -m bench compare OLD.json NEW.json    # side-by-side timings
+"""
@@ -0,0 +1,87 @@
+# bench/__main__.py
+import os, sys, json, argparse, datetime
+ROOT = os.path.dirname(os.path.dirname(__file__))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from bench.datagen import SCALES, generate
+from bench.scenarios import SCENARIOS, run
+
+BENCH_DIR = os.path.join(ROOT, "data", "bench")
+DEFAULT_DB = os.path.join(BENCH_DIR, "clinic_bench.db")
+
+
+def _cmd_generate(a):
+    meds, pats, lines = SCALES[a.scale]
+    if a.force and os.path.exists(a.db):
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(a.db + suffix):
+                os.remove(a.db + suffix)
+    t0 = datetime.datetime.now()
+    counts = generate(a.db, medicines=a.medicines or meds, patients=a.patients or pats,
+                      lines=a.lines or lines, seed=a.seed)
+    print(json.dumps(counts, indent=2))
+    print(f"Generated {a.db} in {(datetime.datetime.now() - t0).total_seconds():.1f}s")
+
+
+def _cmd_run(a):
+    report = run(a.db, names=a.only, repeat=a.repeat, seed=a.seed)
+    out = a.out or os.path.join(BENCH_DIR, f"results_{datetime.datetime.now():%Y%m%d_%H%M%S}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results saved to {out}")
+
+
+def _cmd_compare(a):
+    with open(a.old, encoding="utf-8") as f:
+        old = json.load(f)["results"]
+    with open(a.new, encoding="utf-8") as f:
+        new = json.load(f)["results"]
+    print(f"{'scenario':28} {'old ms':>10} {'new ms':>10} {'change':>8}")
+    for name in sorted(set(old) | set(new)):
+        o = old.get(name, {}).get(a.stat)
+        n = new.get(name, {}).get(a.stat)
+        change = f"{(n - o) / o * 100:+.0f}%" if o and n is not None else "-"
+        print(f"{name:28} {o if o is not None else '-':>10} {n if n is not None else '-':>10} {change:>8}")
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(prog="python -m bench", description="Clinic POS benchmarks")
+    sub = p.add_subparsers(dest="cmd", required=True)
+
+    g = sub.add_parser("generate", help="create a synthetic benchmark database")
+    g.add_argument("--db", default=DEFAULT_DB)
+    g.add_argument("--scale", choices=sorted(SCALES), default="small")
+    g.add_argument("--medicines", type=int)
+    g.add_argument("--patients", type=int)
+    g.add_argument("--lines", type=int, help="invoice lines in total")
+    g.add_argument("--seed", type=int, default=1)
+    g.add_argument("--force", action="store_true", help="replace an existing database")
+    g.set_defaults(fn=_cmd_generate)
+
+    r = sub.add_parser("run", help="time the scenarios and write a JSON report")
+    r.add_argument("--db", default=DEFAULT_DB)
+    r.add_argument("--only", nargs="+", metavar="SCENARIO", choices=sorted(SCENARIOS))
+    r.add_argument("--repeat", type=int, help="calls per scenario (default: per scenario)")
+    r.add_argument("--seed", type=int, default=1)
+    r.add_argument("--out", help="JSON file (default: data/bench/results_<time>.json)")
+    r.set_defaults(fn=_cmd_run)
+
+    c = sub.add_parser("compare", help="compare two JSON reports")
+    c.add_argument("old")
+    c.add_argument("new")
+    c.add_argument("--stat", default="median_ms",
+                   choices=["min_ms", "median_ms", "mean_ms", "p95_ms", "max_ms"])
+    c.set_defaults(fn=_cmd_compare)
+
+    a = p.parse_args(argv)
+    try:
+        a.fn(a)
+    except ValueError as e:
+        print(f"error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
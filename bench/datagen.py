@@ -0,0 +1,190 @@
+# bench/datagen.py
+# Deterministic synthetic data: the same seed and sizes always give the same rows,
+# so timings from different runs (or machines) are comparable.
+import os, sys, random, sqlite3, datetime
+ROOT = os.path.dirname(os.path.dirname(__file__))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+import db
+
+SCALES = {
+    # medicines, patients, invoice lines
+    "tiny":  (2_000,     5_000,     20_000),
+    "small": (10_000,    50_000,    200_000),
+    "full":  (100_000,   1_000_000, 5_000_000),
+}
+END_DAY = datetime.date(2025, 6, 30)   # last day with invoices (fixed for reproducibility)
+DAYS = 365
+
+_SYLLABLES = ["pa", "na", "dol", "amo", "xi", "cil", "met", "for", "min", "ce", "fi", "zo",
+              "lo", "sar", "tan", "ome", "pra", "zol", "ibu", "pro", "fen", "aug", "men", "tin",
+              "ri", "vo", "cal", "ci", "um", "dex", "tro", "vit", "bru", "flo", "gyl", "sep"]
+_FORMS = ["Tablet", "Capsule", "Syrup", "Suspension", "Injection", "Cream", "Drops", "Sachet"]
+_STRENGTHS = ["5mg", "10mg", "20mg", "25mg", "50mg", "100mg", "250mg", "500mg", "1g", "120ml"]
+_CATEGORIES = ["Analgesic", "Antibiotic", "Antacid", "Antidiabetic", "Antihypertensive",
+               "Vitamin", "Antihistamine", "Cough & Cold", "Dermatology", "Other"]
+_FIRST = ["Ali", "Ahmed", "Fatima", "Ayesha", "Hassan", "Usman", "Zainab", "Bilal", "Sana", "Omar",
+          "Hina", "Imran", "Maryam", "Saad", "Noor", "Kamran", "Rabia", "Tariq", "Amna", "Faisal",
+          "Iqra", "Hamza", "Sadia", "Asad", "Mehwish", "Junaid", "Nida", "Waqas", "Saima", "Adeel"]
+_LAST = ["Khan", "Ahmed", "Malik", "Butt", "Bhatti", "Chaudhry", "Qureshi", "Sheikh", "Raza",
+         "Hussain", "Iqbal", "Javed", "Aslam", "Mirza", "Abbasi", "Shah", "Siddiqui", "Awan"]
+_BATCH = 20_000
+
+
+def _medicine_names(rng, n):
+    seen = set()
+    out = []
+    while len(out) < n:
+        word = "".join(rng.choice(_SYLLABLES) for _ in range(rng.randint(2, 4))).capitalize()
+        name = f"{word} {rng.choice(_STRENGTHS)} {rng.choice(_FORMS)}"
+        if name not in seen:
+            seen.add(name)
+            out.append(name)
+    return out
+
+
+def generate(path, medicines=10_000, patients=50_000, lines=200_000, seed=1,
+             end_day=END_DAY, days=DAYS, progress=print):
+    """
+    Create a new database at `path` with the app's schema and synthetic rows:
+    medicines, patients, invoices + items (lines in total) spread over `days`
+    days ending on end_day, matching inventory moves, rollups and checkpoints.
+    Returns a dict of row counts.
+    """
+    if os.path.exists(path):
+        raise ValueError(f"{path} already exists.")
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    rng = random.Random(seed)
+
+    # Schema comes from the app itself
+    old_path = db.DB_PATH
+    db.DB_PATH = path
+    try:
+        db.init_db()
+        db.close_connection()
+
+        conn = sqlite3.connect(path)
+        conn.execute("PRAGMA journal_mode=OFF")
+        conn.execute("PRAGMA synchronous=OFF")
+        # Index names once at the end instead of row by row through the triggers
+        for fts, src in db._FTS_TABLES.items():
+            for suffix in ("ai", "ad", "au"):
+                conn.execute(f"DROP TRIGGER IF EXISTS {src}_fts_{suffix}")
+            conn.execute(f"DROP TABLE IF EXISTS {fts}")
+
+        # ---- medicines ----
+        progress(f"medicines: {medicines}")
+        prices = [0.0] * (medicines + 1)
+        meds = []
+        for mid, name in enumerate(_medicine_names(rng, medicines), start=1):
+            prices[mid] = round(rng.uniform(5, 2500), 2)
+            barcode = f"{890000000000 + mid:013d}" if rng.random() < 0.8 else None
+            meds.append((mid, name, prices[mid], 0, rng.choice(_CATEGORIES),
+                         rng.choice((0, 10, 20, 50)), barcode, 0 if rng.random() < 0.02 else 1))
+        conn.executemany("""
+            INSERT INTO medicines(id, name, unit_price, stock_qty, category, reorder_level, barcode, active)
+            VALUES (?,?,?,?,?,?,?,?)
+        """, meds)
+        reorder = {m[0]: m[5] for m in meds}
+        del meds
+
+        # ---- patients ----
+        progress(f"patients: {patients}")
+        for lo in range(1, patients + 1, _BATCH):
+            conn.executemany(
+                "INSERT INTO patients(id, name, age, gender, phone, address) VALUES (?,?,?,?,?,?)",
+                [(pid, f"{rng.choice(_FIRST)} {rng.choice(_LAST)}", rng.randint(1, 90),
+                  rng.choice(("M", "F")), f"03{rng.randint(0, 49):02d}-{rng.randint(0, 9999999):07d}",
+                  f"House {rng.randint(1, 999)}, Street {rng.randint(1, 60)}")
+                 for pid in range(lo, min(lo + _BATCH, patients + 1))])
+
+        # ---- invoices, items, sale moves ----
+        progress(f"invoice lines: {lines}")
+        sold = [0] * (medicines + 1)
+        first_day = end_day - datetime.timedelta(days=days - 1)
+        avg_lines = 3
+        per_day = max(1, lines // (avg_lines * days))
+        inv_id = item_id = 0
+        remaining = lines
+        invs, items, moves = [], [], []
+
+        def flush():
+            conn.executemany("""
+                INSERT INTO invoices(id, invoice_no, patient_id, doctor_fee, subtotal, total, total_items, created_at)
+                VALUES (?,?,?,?,?,?,?,?)
+            """, invs)
+            conn.executemany("""
+                INSERT INTO invoice_items(id, invoice_id, medicine_id, qty, unit_price, line_total)
+                VALUES (?,?,?,?,?,?)
+            """, items)
+            conn.executemany("""
+                INSERT INTO inventory_moves(medicine_id, change_qty, reason, ref, created_at)
+                VALUES (?,?,?,?,?)
+            """, moves)
+            invs.clear(); items.clear(); moves.clear()
+
+        for d in range(days):
+            if remaining <= 0:
+                break
+            day = first_day + datetime.timedelta(days=d)
+            n_inv = per_day if d < days - 1 else max(1, remaining // avg_lines)
+            secs = sorted(rng.randint(9 * 3600, 21 * 3600) for _ in range(n_inv))
+            for seq, sec in enumerate(secs, start=1):
+                if remaining <= 0:
+                    break
+                inv_id += 1
+                created = f"{day.isoformat()} {sec // 3600:02d}:{sec % 3600 // 60:02d}:{sec % 60:02d}"
+                invoice_no = f"INV-{day:%Y%m%d}-{seq:04d}"
+                n_lines = min(remaining, rng.choice((1, 1, 2, 2, 3, 3, 4, 5, 6)))
+                remaining -= n_lines
+                subtotal = total_items = 0
+                for mid in rng.sample(range(1, medicines + 1), min(n_lines, medicines)):
+                    qty = rng.randint(1, 4)
+                    line_total = round(prices[mid] * qty, 2)
+                    item_id += 1
+                    items.append((item_id, inv_id, mid, qty, prices[mid], line_total))
+                    moves.append((mid, -qty, "sale", invoice_no, created))
+                    sold[mid] += qty
+                    subtotal += line_total
+                    total_items += qty
+                fee = rng.choice((0, 0, 300, 500, 1000))
+                pid = rng.randint(1, patients) if patients and rng.random() < 0.6 else None
+                invs.append((inv_id, invoice_no, pid, fee, round(subtotal, 2),
+                             round(subtotal + fee, 2), total_items, created))
+            if len(items) >= _BATCH:
+                flush()
+        flush()
+
+        # ---- opening stock, so the ledger adds up to the final stock ----
+        opening = f"{first_day.isoformat()} 08:00:00"
+        stock = []
+        for mid in range(1, medicines + 1):
+            # ~5% end up at or below their reorder level
+            final = rng.randint(0, reorder[mid]) if rng.random() < 0.05 else rng.randint(reorder[mid] + 1, 5000)
+            stock.append((final, mid))
+            moves.append((mid, final + sold[mid], "stock_in", "Opening stock", opening))
+        conn.executemany("UPDATE medicines SET stock_qty=? WHERE id=?", stock)
+        flush()
+
+        conn.execute("""
+            INSERT INTO number_sequences(series, day, last_no)
+            SELECT 'invoice', substr(created_at, 1, 10), COUNT(*) FROM invoices GROUP BY 1
+        """)
+        progress("search indexes")
+        db._init_search_indexes(conn)
+        conn.commit()
+        conn.close()
+
+        progress("rollups, checkpoints, statistics")
+        from services import rollups, ledger
+        rollups.rebuild()
+        ledger.create_checkpoints(datetime.datetime.combine(end_day, datetime.time(23, 59)))
+        with db.get_connection() as c:
+            c.execute("ANALYZE")
+            counts = {t: c.execute(f"SELECT COUNT(*) FROM {t}").fetchone()[0]
+                      for t in ("medicines", "patients", "invoices", "invoice_items", "inventory_moves")}
+        db.close_connection()
+    finally:
+        db.DB_PATH = old_path
+    return counts
@@ -0,0 +1,165 @@
+# bench/scenarios.py
+# Timed scenarios. Each scenario gets a Context and returns a zero-argument
+# callable; the runner times `repeat` calls of it after one warm-up call.
+import os, sys, time, random, statistics, platform, sqlite3, datetime, shutil, tempfile
+ROOT = os.path.dirname(os.path.dirname(__file__))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+import db
+
+
+class Context:
+    """Random inputs drawn from the benchmark database (deterministic per seed)."""
+
+    def __init__(self, seed=1):
+        self.rng = random.Random(seed)
+        with db.get_connection() as conn:
+            self.max_med = conn.execute("SELECT MAX(id) FROM medicines").fetchone()[0] or 0
+            self.max_patient = conn.execute("SELECT MAX(id) FROM patients").fetchone()[0] or 0
+            self.max_invoice = conn.execute("SELECT MAX(id) FROM invoices").fetchone()[0] or 0
+            self.last_day = (conn.execute("SELECT MAX(created_at) FROM invoices").fetchone()[0] or "")[:10]
+            # Patients with a history (list_invoices_by_patient on an empty one proves little)
+            self.patients_with_invoices = [r[0] for r in conn.execute(
+                "SELECT DISTINCT patient_id FROM invoices WHERE patient_id IS NOT NULL LIMIT 1000")]
+            self.stocked = [r[0] for r in conn.execute(
+                "SELECT id FROM medicines WHERE active=1 AND stock_qty >= 1000 LIMIT 5000")]
+            names = [r[0] for r in conn.execute(
+                "SELECT name FROM medicines WHERE id % 97 = 0 LIMIT 500")]
+            pnames = [r[0] for r in conn.execute(
+                "SELECT name FROM patients WHERE id % 997 = 0 LIMIT 500")]
+        # What a cashier types: the first 3-5 letters of a word of the name
+        self.med_terms = [n.split()[0][:self.rng.randint(3, 5)] for n in names] or ["pan"]
+        self.patient_terms = [n.split()[-1][:self.rng.randint(3, 5)] for n in pnames] or ["kha"]
+
+    def cart(self, size):
+        mids = self.rng.sample(self.stocked, min(size, len(self.stocked)))
+        return [{"medicine_id": m, "name": "", "qty": 1, "unit_price": 0} for m in mids]
+
+
+def _search_medicines(ctx):
+    from services.medicines import search_medicines
+    return lambda: search_medicines(ctx.rng.choice(ctx.med_terms), limit=50)
+
+
+def _catalog_search(ctx):
+    from services import catalog
+    catalog.search("warm up")          # first call loads the cache
+    return lambda: catalog.search(ctx.rng.choice(ctx.med_terms))
+
+
+def _search_patients(ctx):
+    from services.patients import search_patients
+    return lambda: search_patients(ctx.rng.choice(ctx.patient_terms), limit=50)
+
+
+def _save_invoice(size):
+    def setup(ctx):
+        from services.invoices import save_invoice
+        def run():
+            pid = ctx.rng.randint(1, ctx.max_patient) if ctx.max_patient else None
+            save_invoice(ctx.cart(size), patient_id=pid, doctor_fee=500)
+        return run
+    return setup
+
+
+def _low_stock_items(ctx):
+    from services.alerts import low_stock_items
+    return low_stock_items
+
+
+def _list_invoices_by_patient(ctx):
+    from services.invoices import list_invoices_by_patient
+    pids = ctx.patients_with_invoices or [1]
+    return lambda: list_invoices_by_patient(ctx.rng.choice(pids))
+
+
+def _export_sales_csv_for_date(ctx):
+    from services.reports import export_sales_csv_for_date
+    return lambda: export_sales_csv_for_date(ctx.last_day)
+
+
+def _print_invoice_html(ctx):
+    from services.printing import print_invoice_html
+    # A different invoice each time, so the on-disk cache is (mostly) cold
+    return lambda: print_invoice_html(ctx.rng.randint(1, ctx.max_invoice))
+
+
+# name -> (setup, default repeat)
+SCENARIOS = {
+    "search_medicines":         (_search_medicines, 200),
+    "catalog_search":           (_catalog_search, 500),
+    "search_patients":          (_search_patients, 200),
+    "save_invoice_small":       (_save_invoice(3), 100),
+    "save_invoice_large":       (_save_invoice(60), 30),
+    "low_stock_items":          (_low_stock_items, 30),
+    "list_invoices_by_patient": (_list_invoices_by_patient, 200),
+    "export_sales_csv_for_date": (_export_sales_csv_for_date, 10),
+    "print_invoice_html":       (_print_invoice_html, 100),
+}
+
+
+def _timings(fn, repeat):
+    fn()                                # warm-up (caches, prepared statements)
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - t0) * 1000)
+    times.sort()
+    return {
+        "n": repeat,
+        "min_ms": round(times[0], 4),
+        "median_ms": round(statistics.median(times), 4),
+        "mean_ms": round(statistics.fmean(times), 4),
+        "p95_ms": round(times[min(len(times) - 1, int(len(times) * 0.95))], 4),
+        "max_ms": round(times[-1], 4),
+    }
+
+
+def run(db_path, names=None, repeat=None, seed=1, progress=print):
+    """
+    Time the scenarios against db_path. Note: save_invoice scenarios add
+    invoices to that database. Invoices and reports are written to a fresh
+    folder next to db_path (never data/invoices or data/reports), removed
+    afterwards. Returns a JSON-ready dict.
+    """
+    if not os.path.exists(db_path):
+        raise ValueError(f"{db_path} not found. Run: python -m bench generate")
+    names = names or list(SCENARIOS)
+    unknown = [n for n in names if n not in SCENARIOS]
+    if unknown:
+        raise ValueError(f"Unknown scenario(s): {', '.join(unknown)}")
+
+    old_path, old_out = db.DB_PATH, db.OUTPUT_DIR
+    db.DB_PATH = db_path
+    db.OUTPUT_DIR = tempfile.mkdtemp(prefix="out_", dir=os.path.dirname(os.path.abspath(db_path)))
+    try:
+        ctx = Context(seed)
+        with db.get_connection() as conn:
+            counts = {t: conn.execute(f"SELECT COUNT(*) FROM {t}").fetchone()[0]
+                      for t in ("medicines", "patients", "invoices", "invoice_items")}
+        results = {}
+        for name in names:
+            setup, default_repeat = SCENARIOS[name]
+            progress(f"{name} ...")
+            results[name] = _timings(setup(ctx), repeat or default_repeat)
+            progress(f"  median {results[name]['median_ms']:.3f} ms, p95 {results[name]['p95_ms']:.3f} ms")
+    finally:
+        db.close_connection()
+        shutil.rmtree(db.OUTPUT_DIR, ignore_errors=True)
+        db.DB_PATH, db.OUTPUT_DIR = old_path, old_out
+
+    return {
+        "meta": {
+            "started": datetime.datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "platform": platform.platform(),
+            "db_path": os.path.abspath(db_path),
+            "db_bytes": os.path.getsize(db_path),
+            "rows": counts,
+            "seed": seed,
+        },
+        "results": results,
+    }
@@ -1,33 +1,123 @@
 # db.py
-import os, sqlite3
+import os, re, sqlite3, threading
+from collections import namedtuple
+
+from services.instrumentation import InstrumentedConnection
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 DATA_DIR = os.path.join(BASE_DIR, "data")
 DB_PATH  = os.path.join(DATA_DIR, "clinic.db")
 
+# ---- Connection tuning ----
+# Each thread keeps one open connection per database file and reuses it, so the
+# `with get_connection() as conn:` pattern (commit on success, rollback on error)
+# no longer pays for a connect + pragma round on every service call.
+STATEMENT_CACHE_SIZE = 256      # prepared statements kept per connection
+BUSY_TIMEOUT_MS      = 5000     # wait for a writer instead of failing with "database is locked"
+
+PRAGMAS = (
+    "PRAGMA foreign_keys = ON;",
+    "PRAGMA journal_mode = WAL;",         # readers don't block the writer (and vice versa)
+    f"PRAGMA busy_timeout = {BUSY_TIMEOUT_MS};",
+    "PRAGMA synchronous = NORMAL;",       # safe with WAL, far fewer fsyncs
+    "PRAGMA cache_size = -16000;",        # ~16 MB page cache
+    "PRAGMA mmap_size = 134217728;",      # 128 MB memory-mapped reads
+    "PRAGMA temp_store = MEMORY;",
+)
+
+# Generated files (invoices/, reports/) go under OUTPUT_DIR. The benchmark
+# points it at a folder of its own so a run never touches the clinic's files.
+OUTPUT_DIR = DATA_DIR
+
+
+def output_dir(kind):
+    """OUTPUT_DIR/<kind> (e.g. "invoices", "reports"), created on first use."""
+    path = os.path.join(OUTPUT_DIR, kind)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+_local = threading.local()
+_made_dirs = set()
+
+
+def _connect(path):
+    folder = os.path.dirname(path)
+    if folder not in _made_dirs:
+        os.makedirs(folder, exist_ok=True)
+        _made_dirs.add(folder)
+    conn = sqlite3.connect(path, timeout=BUSY_TIMEOUT_MS / 1000,
+                           cached_statements=STATEMENT_CACHE_SIZE,
+                           factory=InstrumentedConnection)   # timings only when enabled
+    for p in PRAGMAS:
+        conn.execute(p)
+    return conn
+
+
 def get_connection():
-    os.makedirs(DATA_DIR, exist_ok=True)
-    conn = sqlite3.connect(DB_PATH)
-    conn.execute("PRAGMA foreign_keys = ON;")
+    """
+    Return this thread's pooled connection to DB_PATH (opened and tuned on first use).
+    Use it as before: `with get_connection() as conn:` commits or rolls back,
+    but does not close the connection.
+    """
+    pool = getattr(_local, "pool", None)
+    if pool is None:
+        pool = _local.pool = {}
+    conn = pool.get(DB_PATH)
+    if conn is None:
+        conn = pool[DB_PATH] = _connect(DB_PATH)
     return conn
 
-def init_db():
-    with get_connection() as conn:
-        c = conn.cursor()
-        c.execute("""
-            CREATE TABLE IF NOT EXISTS medicines (
-              id INTEGER PRIMARY KEY AUTOINCREMENT,
-              name TEXT NOT NULL UNIQUE,
-              unit_price REAL NOT NULL CHECK(unit_price >= 0),
-              stock_qty INTEGER NOT NULL DEFAULT 0 CHECK(stock_qty >= 0),
-              category TEXT,
-              reorder_level INTEGER NOT NULL DEFAULT 0,
-              barcode TEXT,
-              active INTEGER NOT NULL DEFAULT 1
-            );
-        """)
-    
-        c.execute("""
+
+def close_connection():
+    """Close every pooled connection owned by the calling thread (e.g. when a worker exits)."""
+    pool = getattr(_local, "pool", None)
+    if not pool:
+        return
+    for conn in pool.values():
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+    pool.clear()
+
+
+# ---- Row types ----
+# Compact rows for the shapes the services hand to the UI. They are still
+# tuples (no per-row dict), so positional unpacking keeps working too.
+Medicine = namedtuple("Medicine", "id name category unit_price stock_qty reorder_level barcode active")
+Patient = namedtuple("Patient", "id name age gender phone address active")
+InvoiceHeader = namedtuple("InvoiceHeader", "id invoice_no created_at subtotal doctor_fee total total_items")
+
+
+def rows_of(conn, row_type):
+    """A cursor on conn whose rows come back as row_type: rows_of(conn, Medicine).execute(...)."""
+    cur = conn.cursor()
+    make = row_type._make
+    cur.row_factory = lambda _cur, row: make(row)
+    return cur
+
+
+# ---- Schema migrations ----
+# Each step runs once, in its own transaction, and bumps PRAGMA user_version.
+# Only ever append steps; never edit one that has shipped. Steps use
+# IF NOT EXISTS where installs from before versioning may already have the
+# object (those start at user_version 0).
+
+def _m1_baseline(c):
+    c.execute("""
+        CREATE TABLE IF NOT EXISTS medicines (
+          id INTEGER PRIMARY KEY AUTOINCREMENT,
+          name TEXT NOT NULL UNIQUE,
+          unit_price REAL NOT NULL CHECK(unit_price >= 0),
+          stock_qty INTEGER NOT NULL DEFAULT 0 CHECK(stock_qty >= 0),
+          category TEXT,
+          reorder_level INTEGER NOT NULL DEFAULT 0,
+          barcode TEXT,
+          active INTEGER NOT NULL DEFAULT 1
+        )
+    """)
+    c.execute("""
         CREATE TABLE IF NOT EXISTS patients (
           id INTEGER PRIMARY KEY AUTOINCREMENT,
           name   TEXT NOT NULL,
@@ -36,9 +126,9 @@ def init_db():
           phone  TEXT,
           address TEXT,
           active INTEGER NOT NULL DEFAULT 1
-        );
+        )
     """)
-        # ---- Invoices (header) ----
+    # ---- Invoices (header) ----
     c.execute("""
         CREATE TABLE IF NOT EXISTS invoices (
           id          INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -50,9 +140,8 @@ def init_db():
           total_items INTEGER NOT NULL DEFAULT 0,
           created_at  TEXT NOT NULL DEFAULT (datetime('now','localtime')),
           FOREIGN KEY (patient_id) REFERENCES patients(id)
-        );
+        )
     """)
-
     # ---- Invoice line items ----
     c.execute("""
         CREATE TABLE IF NOT EXISTS invoice_items (
@@ -64,9 +153,10 @@ def init_db():
           line_total  REAL    NOT NULL CHECK(line_total >= 0),
           FOREIGN KEY (invoice_id)  REFERENCES invoices(id)  ON DELETE CASCADE,
           FOREIGN KEY (medicine_id) REFERENCES medicines(id)
-        );
+        )
     """)
-        # ---- Inventory movements (audit log) ----
+    # ---- Inventory movements (audit log) ----
+    # (older init_db also had a looser second definition; this one always won)
     c.execute("""
         CREATE TABLE IF NOT EXISTS inventory_moves (
           id          INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -76,25 +166,290 @@ def init_db():
           ref         TEXT,                       -- invoice_no or note
           created_at  TEXT NOT NULL DEFAULT (datetime('now','localtime')),
           FOREIGN KEY (medicine_id) REFERENCES medicines(id)
-        );
+        )
     """)
-# inventory_moves table (if you don’t have it yet)
-    c.execute("""
-CREATE TABLE IF NOT EXISTS inventory_moves (
-    id INTEGER PRIMARY KEY AUTOINCREMENT,
-    medicine_id INTEGER NOT NULL,
-    change_qty INTEGER NOT NULL,            -- positive for stock-in, negative for stock-out/returns
-    reason TEXT,
-    ref TEXT,
-    created_at TEXT DEFAULT (datetime('now','localtime')),
-    FOREIGN KEY (medicine_id) REFERENCES medicines(id)
-)
-""")
-
-# Optional but recommended indexes for speed & integrity
     c.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_invoice_no ON invoices(invoice_no)")
     c.execute("CREATE INDEX IF NOT EXISTS idx_invoices_created_at ON invoices(created_at)")
     c.execute("CREATE INDEX IF NOT EXISTS idx_meds_name ON medicines(name)")
     c.execute("CREATE INDEX IF NOT EXISTS idx_moves_med_created ON inventory_moves(medicine_id, created_at)")
 
-    conn.commit()
+
+def _m2_daily_sales(c):
+    # Daily sales rollups (maintained by save_invoice, see services/rollups.py)
+    existed = c.execute(
+        "SELECT 1 FROM sqlite_master WHERE type='table' AND name='daily_sales'").fetchone()
+    c.execute("""
+        CREATE TABLE IF NOT EXISTS daily_sales (
+          day        TEXT PRIMARY KEY,          -- YYYY-MM-DD
+          invoices   INTEGER NOT NULL DEFAULT 0,
+          items      INTEGER NOT NULL DEFAULT 0,
+          subtotal   REAL    NOT NULL DEFAULT 0,
+          doctor_fee REAL    NOT NULL DEFAULT 0,
+          total      REAL    NOT NULL DEFAULT 0
+        ) WITHOUT ROWID
+    """)
+    c.execute("""
+        CREATE TABLE IF NOT EXISTS daily_sales_items (
+          day         TEXT    NOT NULL,
+          medicine_id INTEGER NOT NULL,
+          qty         INTEGER NOT NULL DEFAULT 0,
+          revenue     REAL    NOT NULL DEFAULT 0,
+          PRIMARY KEY (day, medicine_id)
+        ) WITHOUT ROWID
+    """)
+    if not existed:
+        # Upgrading an install that has sales but no rollups yet: backfill them
+        c.execute("""
+            INSERT INTO daily_sales (day, invoices, items, subtotal, doctor_fee, total)
+            SELECT substr(created_at, 1, 10), COUNT(*), SUM(total_items),
+                   SUM(subtotal), SUM(doctor_fee), SUM(total)
+            FROM invoices GROUP BY substr(created_at, 1, 10)
+        """)
+        c.execute("""
+            INSERT INTO daily_sales_items (day, medicine_id, qty, revenue)
+            SELECT substr(i.created_at, 1, 10), ii.medicine_id, SUM(ii.qty), SUM(ii.line_total)
+            FROM invoices i JOIN invoice_items ii ON ii.invoice_id = i.id
+            GROUP BY substr(i.created_at, 1, 10), ii.medicine_id
+        """)
+
+
+def _m3_stock_checkpoints(c):
+    # Monthly stock checkpoints (see services/ledger.py)
+    c.execute("""
+        CREATE TABLE IF NOT EXISTS stock_checkpoints (
+          medicine_id INTEGER NOT NULL,
+          as_of       TEXT    NOT NULL,         -- month start, 'YYYY-MM-01 00:00:00'
+          stock_qty   INTEGER NOT NULL,         -- stock just before as_of
+          moves_total INTEGER NOT NULL,         -- SUM(change_qty) of moves before as_of
+          PRIMARY KEY (medicine_id, as_of)
+        ) WITHOUT ROWID
+    """)
+    c.execute("CREATE INDEX IF NOT EXISTS idx_checkpoints_as_of ON stock_checkpoints(as_of)")
+
+
+def _m4_number_sequences(c):
+    # Per-day document counters (invoice numbers, see services/numbering.py)
+    c.execute("""
+        CREATE TABLE IF NOT EXISTS number_sequences (
+          series  TEXT NOT NULL,
+          day     TEXT NOT NULL,                -- YYYY-MM-DD
+          last_no INTEGER NOT NULL,
+          PRIMARY KEY (series, day)
+        ) WITHOUT ROWID
+    """)
+
+
+def _m5_low_stock_index(c):
+    # Low-stock lookups: partial expression index over active medicines only
+    c.execute("""
+        CREATE INDEX IF NOT EXISTS idx_meds_low_stock
+        ON medicines(stock_qty - reorder_level) WHERE active=1
+    """)
+
+
+def _m6_search_indexes(c):
+    # Full-text search indexes (skipped if this SQLite build has no FTS5)
+    _init_search_indexes(c)
+
+
+def _m7_unique_barcodes(c):
+    # Scanner lookups: one medicine per barcode. Blank barcodes become NULL so
+    # they stay out of the (partial) index. Installs that already hold
+    # duplicate barcodes get a plain index instead; build_online_indexes()
+    # swaps it for the unique one once the duplicates are fixed.
+    c.execute("UPDATE medicines SET barcode = NULLIF(trim(barcode), '') WHERE barcode IS NOT NULL")
+    _barcode_index(c)
+
+
+def _barcode_index(c):
+    """Unique barcode index if no barcode is duplicated, else a plain one. True if unique."""
+    dup = c.execute("""
+        SELECT 1 FROM medicines WHERE barcode IS NOT NULL
+        GROUP BY barcode HAVING COUNT(*) > 1 LIMIT 1
+    """).fetchone()
+    if dup:
+        c.execute("CREATE INDEX IF NOT EXISTS idx_meds_barcode ON medicines(barcode) WHERE barcode IS NOT NULL")
+        return False
+    c.execute("""
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_meds_barcode_unique
+        ON medicines(barcode) WHERE barcode IS NOT NULL
+    """)
+    c.execute("DROP INDEX IF EXISTS idx_meds_barcode")
+    return True
+
+
+MIGRATIONS = (
+    # version, description, step(cursor)
+    (1, "baseline tables", _m1_baseline),
+    (2, "daily sales rollups", _m2_daily_sales),
+    (3, "monthly stock checkpoints", _m3_stock_checkpoints),
+    (4, "document number counters", _m4_number_sequences),
+    (5, "low-stock index", _m5_low_stock_index),
+    (6, "full-text search", _m6_search_indexes),
+    (7, "unique barcodes", _m7_unique_barcodes),
+)
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+# Indexes that only speed up queries. On a large install they can take a while
+# to build, so the app creates them in the background after startup (each in a
+# short transaction of its own; WAL readers carry on meanwhile).
+ONLINE_INDEXES = (
+    ("idx_invoices_patient_created",
+     "CREATE INDEX IF NOT EXISTS idx_invoices_patient_created ON invoices(patient_id, created_at)"),
+    ("idx_items_invoice",
+     "CREATE INDEX IF NOT EXISTS idx_items_invoice ON invoice_items(invoice_id)"),
+    # Sales by date (reorder suggestions): a date range of sale moves, covering qty
+    ("idx_moves_sales",
+     "CREATE INDEX IF NOT EXISTS idx_moves_sales ON inventory_moves(created_at, medicine_id, change_qty)"
+     " WHERE reason = 'sale'"),
+    # (the barcode index is created by migration 7 and upgraded by build_online_indexes)
+)
+
+
+def migrate():
+    """Apply pending MIGRATIONS to DB_PATH. Returns the versions applied (usually none)."""
+    conn = get_connection()
+    if conn.execute("PRAGMA user_version").fetchone()[0] >= SCHEMA_VERSION:
+        return []                      # up to date: one header read
+    applied = []
+    for version, description, step in MIGRATIONS:
+        c = conn.cursor()
+        c.execute("BEGIN IMMEDIATE")
+        try:
+            # Re-read under the write lock: another instance may have just done it
+            if c.execute("PRAGMA user_version").fetchone()[0] >= version:
+                conn.rollback()
+                continue
+            step(c)
+            c.execute(f"PRAGMA user_version = {int(version)}")
+            conn.commit()
+        except Exception as e:
+            conn.rollback()
+            raise RuntimeError(f"Database upgrade to version {version} ({description}) failed: {e}")
+        applied.append(version)
+    return applied
+
+
+def missing_online_indexes():
+    names = [name for name, _ in ONLINE_INDEXES]
+    marks = ",".join("?" * len(names))
+    have = {r[0] for r in get_connection().execute(
+        f"SELECT name FROM sqlite_master WHERE type='index' AND name IN ({marks})", names)}
+    return [name for name in names if name not in have]
+
+
+def _upgrade_barcode_index(conn):
+    """Swap the plain barcode index left by migration 7 for the unique one, if now possible."""
+    if not conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type='index' AND name='idx_meds_barcode'").fetchone():
+        return False
+    c = conn.cursor()
+    c.execute("BEGIN IMMEDIATE")
+    try:
+        upgraded = _barcode_index(c)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return upgraded
+
+
+def build_online_indexes():
+    """
+    Create any missing ONLINE_INDEXES, one transaction each, and make the
+    barcode index unique once no barcode is duplicated. Returns the names built.
+    """
+    conn = get_connection()
+    built = ["idx_meds_barcode_unique"] if _upgrade_barcode_index(conn) else []
+    missing = missing_online_indexes()
+    if not missing:
+        return built
+    ddl = dict(ONLINE_INDEXES)
+    for name in missing:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(ddl[name])
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+    conn.execute("PRAGMA optimize")
+    return built + missing
+
+
+def init_db(defer_indexes=False):
+    """
+    Bring the database at DB_PATH up to date. Cheap when nothing is pending.
+    defer_indexes=True leaves ONLINE_INDEXES for the caller to build later
+    with build_online_indexes() (the app does that in the background).
+    """
+    migrate()
+    if not defer_indexes:
+        build_online_indexes()
+
+
+# ---- Full-text search (FTS5) ----
+# External-content FTS tables mirror medicines.name / patients.name and are kept
+# in sync by triggers, so search is an index lookup instead of LIKE '%q%' scans.
+_FTS_TABLES = {
+    # fts table      -> source table
+    "medicines_fts": "medicines",
+    "patients_fts":  "patients",
+}
+_fts_checked = {}
+
+
+def _init_search_indexes(c):
+    existing = {r[0] for r in c.execute(
+        "SELECT name FROM sqlite_master WHERE name IN ('medicines_fts', 'patients_fts')")}
+    for fts, src in _FTS_TABLES.items():
+        try:
+            c.execute(f"""
+                CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5(
+                    name, content='{src}', content_rowid='id',
+                    tokenize='unicode61', prefix='2 3'
+                )
+            """)
+        except sqlite3.OperationalError:
+            return  # no FTS5 compiled in: searches fall back to LIKE
+        c.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS {src}_fts_ai AFTER INSERT ON {src} BEGIN
+              INSERT INTO {fts}(rowid, name) VALUES (new.id, new.name);
+            END
+        """)
+        c.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS {src}_fts_ad AFTER DELETE ON {src} BEGIN
+              INSERT INTO {fts}({fts}, rowid, name) VALUES ('delete', old.id, old.name);
+            END
+        """)
+        c.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS {src}_fts_au AFTER UPDATE OF name ON {src} BEGIN
+              INSERT INTO {fts}({fts}, rowid, name) VALUES ('delete', old.id, old.name);
+              INSERT INTO {fts}(rowid, name) VALUES (new.id, new.name);
+            END
+        """)
+        if fts not in existing:
+            # First run on an existing database: index the rows already there
+            c.execute(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')")
+    _fts_checked.pop(DB_PATH, None)
+
+
+def has_fts5():
+    """True if the current database has the FTS5 search tables (checked once per DB file)."""
+    ok = _fts_checked.get(DB_PATH)
+    if ok is None:
+        row = get_connection().execute(
+            "SELECT 1 FROM sqlite_master WHERE type='table' AND name='medicines_fts'").fetchone()
+        ok = _fts_checked[DB_PATH] = row is not None
+    return ok
+
+
+def fts_match_expr(text):
+    """
+    Turn free text into an FTS5 prefix query: 'pana 50' -> '"pana"* "50"*'.
+    Returns None when there is nothing searchable (caller should use LIKE).
+    """
+    words = re.findall(r"\w+", text or "")
+    if not words:
+        return None
+    return " ".join(f'"{w}"*' for w in words)
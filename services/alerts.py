@@ -1,11 +1,18 @@
 # services/alerts.py
-import os, sys
+import os, sys, threading
 ROOT = os.path.dirname(os.path.dirname(__file__))
 if ROOT not in sys.path:
     sys.path.insert(0, ROOT)
 
-from db import get_connection
+from db import get_connection, rows_of, Medicine
+from services.instrumentation import timed
 
+# "Low" means active and stock_qty - reorder_level <= 0; idx_meds_low_stock is a
+# partial index on exactly that expression, so these lookups never scan the table.
+_LOW_WHERE = "active=1 AND stock_qty - reorder_level <= 0"
+
+
+@timed
 def low_stock_items():
     """
     Returns rows: (id, name, stock_qty, reorder_level, unit_price)
@@ -13,10 +20,91 @@ def low_stock_items():
     """
     with get_connection() as conn:
         c = conn.cursor()
-        rows = c.execute("""
+        rows = c.execute(f"""
             SELECT id, name, stock_qty, reorder_level, unit_price
             FROM medicines
-            WHERE active=1 AND stock_qty <= reorder_level
+            WHERE {_LOW_WHERE}
             ORDER BY stock_qty ASC, name ASC
         """).fetchall()
     return rows
+
+
+@timed
+def low_stock_medicines():
+    """Same set as low_stock_items, as full medicine rows (like list_medicines)."""
+    with get_connection() as conn:
+        return rows_of(conn, Medicine).execute(f"""
+            SELECT id, name, category, unit_price, stock_qty, reorder_level, barcode, active
+            FROM medicines
+            WHERE {_LOW_WHERE}
+            ORDER BY stock_qty ASC, name ASC
+        """).fetchall()
+
+
+# ---- Change tracking ----
+# Services call stock_changed(ids) after committing a stock/reorder change.
+# While someone is subscribed we keep the set of low ids and re-check only the
+# ids that changed, calling listeners with the rows that just crossed the line.
+_lock = threading.Lock()
+_listeners = []
+_low_ids = None          # None = nobody is watching
+
+
+def subscribe(callback):
+    """
+    callback(rows) is called with [(id, name, stock_qty, reorder_level, unit_price)]
+    for medicines that have just dropped to/below their reorder level.
+    It runs on the thread that changed the stock; keep it short (e.g. queue.put).
+    """
+    global _low_ids
+    with _lock:
+        if _low_ids is None:
+            _low_ids = {r[0] for r in low_stock_items()}
+        _listeners.append(callback)
+
+
+def unsubscribe(callback):
+    global _low_ids
+    with _lock:
+        if callback in _listeners:
+            _listeners.remove(callback)
+        if not _listeners:
+            _low_ids = None
+
+
+def stock_changed(medicine_ids):
+    """Re-check just these medicines against their reorder levels."""
+    with _lock:
+        if _low_ids is None:
+            return
+        ids = list({int(m) for m in medicine_ids})
+        listeners = list(_listeners)
+    if not ids:
+        return
+
+    rows = []
+    with get_connection() as conn:
+        for i in range(0, len(ids), 500):
+            part = ids[i:i + 500]
+            marks = ",".join("?" * len(part))
+            rows += conn.execute(f"""
+                SELECT id, name, stock_qty, reorder_level, unit_price, ({_LOW_WHERE}) AS low
+                FROM medicines WHERE id IN ({marks})
+            """, part).fetchall()
+
+    crossed = []
+    with _lock:
+        if _low_ids is None:
+            return
+        for mid, name, stock_qty, reorder_level, unit_price, low in rows:
+            if low and mid not in _low_ids:
+                _low_ids.add(mid)
+                crossed.append((mid, name, stock_qty, reorder_level, unit_price))
+            elif not low:
+                _low_ids.discard(mid)
+    if crossed:
+        for cb in listeners:
+            try:
+                cb(crossed)
+            except Exception:
+                pass
@@ -0,0 +1,203 @@
+# services/analytics.py
+# Sales analytics over the raw invoice lines with pandas: top sellers, revenue
+# by category, weekday x hour heatmaps, basket size and doctor-fee share.
+#
+# A period is split at month boundaries. Each piece is one indexed range scan
+# on invoices.created_at that SQLite reduces to per-medicine and per
+# weekday/hour sums, read with read_sql; pandas then combines the pieces,
+# joins names/categories and ranks. Pieces that lie wholly in the past are
+# cached, so re-opening a period only reads the current month.
+#
+#   python -m services.analytics 2025-01-01 2025-06-30
+import os, sys, datetime, threading
+ROOT = os.path.dirname(os.path.dirname(__file__))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+import db
+from services.dates import parse_day, day_start
+from services.instrumentation import timed
+
+WEEKDAYS = ("Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun")
+
+_lock = threading.Lock()
+_cache = {}               # (db path, piece start, piece end) -> partial sums, closed pieces only
+
+
+def _require_pandas():
+    try:
+        import pandas  # noqa: F401
+    except Exception:
+        raise RuntimeError(
+            "pandas not installed. Activate your venv and run: python -m pip install pandas"
+        )
+
+
+def _pieces(start, end):
+    """[start, end) split at the first of each month."""
+    out = []
+    while start < end:
+        nxt = datetime.date(start.year + (start.month == 12), start.month % 12 + 1, 1)
+        out.append((start, min(nxt, end)))
+        start = nxt
+    return out
+
+
+# ---------- loading ----------
+def _read_piece(conn, start, end):
+    """Partial sums for start <= created_at < end. Every column adds up across pieces."""
+    import pandas as pd
+
+    lo, hi = day_start(start), day_start(end)
+    by_med = pd.read_sql_query("""
+        SELECT ii.medicine_id, SUM(ii.qty) AS qty, SUM(ii.line_total) AS revenue, COUNT(*) AS lines
+        FROM invoices i JOIN invoice_items ii ON ii.invoice_id = i.id
+        WHERE i.created_at >= ? AND i.created_at < ?
+        GROUP BY ii.medicine_id
+    """, conn, params=(lo, hi), index_col="medicine_id").astype({"qty": "int64", "lines": "int64",
+                                                                  "revenue": "float64"})
+    by_hour = pd.read_sql_query("""
+        SELECT (CAST(strftime('%w', created_at) AS INTEGER) + 6) % 7 AS weekday,
+               CAST(substr(created_at, 12, 2) AS INTEGER) AS hour,
+               COUNT(*) AS invoices, SUM(total_items) AS items, SUM(subtotal) AS subtotal,
+               SUM(doctor_fee) AS doctor_fee, SUM(total) AS total
+        FROM invoices
+        WHERE created_at >= ? AND created_at < ?
+        GROUP BY 1, 2
+    """, conn, params=(lo, hi), index_col=["weekday", "hour"]).astype(
+        {"invoices": "int64", "items": "int64", "subtotal": "float64", "doctor_fee": "float64",
+         "total": "float64"})
+    return by_med, by_hour
+
+
+def _partials(start, end):
+    today = datetime.date.today()
+    out = []
+    with db.get_connection() as conn:
+        for a, b in _pieces(start, end):
+            key = (db.DB_PATH, a, b)
+            with _lock:
+                part = _cache.get(key)
+            if part is None:
+                part = _read_piece(conn, a, b)
+                if b <= today:            # closed: no new invoices can land in it
+                    with _lock:
+                        _cache[key] = part
+            out.append(part)
+    return out
+
+
+def clear_cache():
+    """Forget cached periods (e.g. after back-dated invoices were imported)."""
+    with _lock:
+        _cache.clear()
+
+
+# ---------- results ----------
+@timed
+def sales_analytics(from_str, to_str, top=20):
+    """
+    Analytics for from_str..to_str (inclusive, YYYY-MM-DD). Returns a dict:
+      "totals"      : {invoices, items, lines, subtotal, doctor_fee, grand_total}
+      "basket"      : {avg_items, avg_lines, avg_subtotal, avg_total}
+      "doctor_fee_share": doctor fees / grand total (0..1)
+      "top_sellers" : DataFrame [medicine_id, name, category, qty, revenue], by revenue
+      "by_category" : DataFrame [category, qty, revenue, share], by revenue
+      "heatmap_invoices", "heatmap_revenue": DataFrame, weekdays x hours 0..23
+    """
+    _require_pandas()
+    import pandas as pd
+
+    start, last = parse_day(from_str), parse_day(to_str)
+    if last < start:
+        raise ValueError("'To' date is before 'From' date.")
+    parts = _partials(start, last + datetime.timedelta(days=1))
+
+    by_med = pd.concat([m for m, _h in parts]).groupby(level=0).sum()
+    by_hour = pd.concat([h for _m, h in parts]).groupby(level=[0, 1]).sum()
+    invoices, items, subtotal, doctor_fee, total = (
+        int(by_hour["invoices"].sum()), int(by_hour["items"].sum()), float(by_hour["subtotal"].sum()),
+        float(by_hour["doctor_fee"].sum()), float(by_hour["total"].sum()))
+    lines = int(by_med["lines"].sum())
+
+    # Names/categories are looked up now, so renames show in cached periods too
+    with db.get_connection() as conn:
+        meds = pd.read_sql_query("SELECT id, name, category FROM medicines", conn, index_col="id")
+    meds["category"] = meds["category"].fillna("").str.strip().replace("", "Uncategorised")
+    by_med = by_med.join(meds, how="left")
+    by_med["name"] = by_med["name"].fillna("(deleted)")
+    by_med["category"] = by_med["category"].fillna("Uncategorised")
+
+    top_sellers = (by_med.nlargest(int(top), "revenue")
+                   .rename_axis("medicine_id").reset_index()
+                   [["medicine_id", "name", "category", "qty", "revenue"]])
+    by_category = (by_med.groupby("category")[["qty", "revenue"]].sum()
+                   .sort_values("revenue", ascending=False).reset_index())
+    by_category["share"] = by_category["revenue"] / subtotal if subtotal else 0.0
+
+    cells = pd.MultiIndex.from_product([range(7), range(24)], names=["weekday", "hour"])
+    by_hour = by_hour.reindex(cells, fill_value=0)
+
+    def heatmap(column):
+        return pd.DataFrame(by_hour[column].to_numpy().reshape(7, 24),
+                            index=list(WEEKDAYS), columns=range(24))
+
+    per_invoice = (lambda v: round(v / invoices, 2)) if invoices else (lambda v: 0.0)
+    return {
+        "from": start.isoformat(), "to": last.isoformat(),
+        "totals": {"invoices": invoices, "items": items, "lines": lines,
+                   "subtotal": round(subtotal, 2), "doctor_fee": round(doctor_fee, 2),
+                   "grand_total": round(total, 2)},
+        "basket": {"avg_items": per_invoice(items), "avg_lines": per_invoice(lines),
+                   "avg_subtotal": per_invoice(subtotal), "avg_total": per_invoice(total)},
+        "doctor_fee_share": round(doctor_fee / total, 4) if total else 0.0,
+        "top_sellers": top_sellers,
+        "by_category": by_category,
+        "heatmap_invoices": heatmap("invoices"),
+        "heatmap_revenue": heatmap("total").round(2),
+    }
+
+
+@timed
+def export_analytics_html(from_str, to_str, top=20):
+    """
+    Write sales_analytics() for the period to data/reports/analytics_FROM_TO.html.
+    Returns the file path.
+    """
+    a = sales_analytics(from_str, to_str, top)
+    t, b = a["totals"], a["basket"]
+    out_dir = db.output_dir("reports")
+    path = os.path.join(out_dir, f"analytics_{a['from'].replace('-', '')}_{a['to'].replace('-', '')}.html")
+
+    table = lambda df, **kw: df.to_html(border=0, float_format=lambda v: f"{v:,.2f}", **kw)
+    html = f"""<!doctype html>
+<html><head><meta charset="utf-8"><title>Sales analytics {a['from']} to {a['to']}</title>
+<style>
+ body {{ font-family: Arial, sans-serif; margin: 24px; }}
+ table {{ border-collapse: collapse; margin-bottom: 24px; font-size: 12px; }}
+ th, td {{ border: 1px solid #ccc; padding: 4px 8px; text-align: right; }}
+ th {{ background: #f0f0f0; }}
+</style></head><body>
+<h2>Sales analytics: {a['from']} to {a['to']}</h2>
+<p>Invoices: {t['invoices']} &nbsp;|&nbsp; Lines: {t['lines']} &nbsp;|&nbsp; Items: {t['items']}<br>
+Subtotal: {t['subtotal']:,.2f} &nbsp;|&nbsp; Doctor fees: {t['doctor_fee']:,.2f}
+({a['doctor_fee_share']:.1%} of total) &nbsp;|&nbsp; Grand total: {t['grand_total']:,.2f}</p>
+<p>Average basket: {b['avg_lines']} lines, {b['avg_items']} items,
+{b['avg_subtotal']:,.2f} medicines, {b['avg_total']:,.2f} total</p>
+<h3>Top sellers</h3>{table(a['top_sellers'], index=False)}
+<h3>Revenue by category</h3>{table(a['by_category'], index=False)}
+<h3>Invoices by weekday and hour</h3>{table(a['heatmap_invoices'])}
+<h3>Revenue by weekday and hour</h3>{table(a['heatmap_revenue'])}
+</body></html>
+"""
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(html)
+    return path
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        print("usage: python -m services.analytics FROM_DAY TO_DAY")
+        sys.exit(2)
+    db.init_db()
+    print(export_analytics_html(sys.argv[1], sys.argv[2]))
@@ -0,0 +1,106 @@
+# services/cart.py
+import os, sys
+ROOT = os.path.dirname(os.path.dirname(__file__))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+
+def _cents(amount):
+    return int(round(float(amount) * 100))
+
+
+class Cart:
+    """
+    Sale cart keyed by medicine_id, with running totals: add, merge, quantity
+    change and remove are O(1) whatever the cart size.
+
+    Iterating yields the line dicts save_invoice expects, in the order the
+    medicines were first added:
+        {"medicine_id": int, "name": str, "qty": int, "unit_price": float}
+    Money is tracked in whole cents so totals don't drift over many edits.
+    """
+
+    def __init__(self):
+        self._lines = {}              # medicine_id -> line dict (insertion ordered)
+        self._price_cents = {}        # medicine_id -> unit price in cents
+        self._subtotal_cents = 0
+        self._items = 0
+
+    # ---- changes ----
+    def add(self, medicine_id, name, qty, unit_price):
+        """Add qty of a medicine, merging with an existing line. Returns (line, merged)."""
+        mid, qty = int(medicine_id), int(qty)
+        if qty <= 0:
+            raise ValueError("Quantity must be a positive number.")
+        line = self._lines.get(mid)
+        if line is not None:
+            self._change(mid, line["qty"] + qty)
+            return line, True
+        line = self._lines[mid] = {"medicine_id": mid, "name": name, "qty": qty,
+                                   "unit_price": float(unit_price)}
+        self._price_cents[mid] = _cents(unit_price)
+        self._subtotal_cents += qty * self._price_cents[mid]
+        self._items += qty
+        return line, False
+
+    def set_qty(self, medicine_id, qty):
+        """Replace a line's quantity. Returns the line."""
+        mid, qty = int(medicine_id), int(qty)
+        if mid not in self._lines:
+            raise ValueError("Medicine is not in the cart.")
+        if qty <= 0:
+            raise ValueError("Quantity must be a positive number.")
+        self._change(mid, qty)
+        return self._lines[mid]
+
+    def remove(self, medicine_id):
+        """Drop a line. Returns it, or None if it wasn't there."""
+        mid = int(medicine_id)
+        line = self._lines.pop(mid, None)
+        if line is not None:
+            self._subtotal_cents -= line["qty"] * self._price_cents.pop(mid)
+            self._items -= line["qty"]
+        return line
+
+    def clear(self):
+        self._lines.clear()
+        self._price_cents.clear()
+        self._subtotal_cents = 0
+        self._items = 0
+
+    def _change(self, mid, qty):
+        line = self._lines[mid]
+        delta = qty - line["qty"]
+        line["qty"] = qty
+        self._subtotal_cents += delta * self._price_cents[mid]
+        self._items += delta
+
+    # ---- reading ----
+    def get(self, medicine_id):
+        return self._lines.get(int(medicine_id))
+
+    def line_total(self, medicine_id):
+        mid = int(medicine_id)
+        return self._lines[mid]["qty"] * self._price_cents[mid] / 100
+
+    @property
+    def subtotal(self):
+        return self._subtotal_cents / 100
+
+    @property
+    def total_items(self):
+        return self._items
+
+    def totals(self, doctor_fee):
+        """Same result as invoices.compute_totals(cart, doctor_fee), without re-summing."""
+        fee_cents = _cents(doctor_fee or 0)
+        return self._subtotal_cents / 100, (self._subtotal_cents + fee_cents) / 100, self._items
+
+    def __len__(self):
+        return len(self._lines)
+
+    def __iter__(self):
+        return iter(self._lines.values())
+
+    def __contains__(self, medicine_id):
+        return int(medicine_id) in self._lines
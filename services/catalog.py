@@ -0,0 +1,245 @@
+# services/catalog.py
+# In-memory copy of the active medicines, so keystroke search on the Sale /
+# Medicines / Stock-In screens never touches SQLite.
+import os, sys, bisect, heapq, re, threading
+ROOT = os.path.dirname(os.path.dirname(__file__))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+import db
+from services.instrumentation import timed
+
+_COLS = "id, name, category, unit_price, stock_qty, reorder_level, barcode, active"
+_WORD = re.compile(r"\w+")
+
+
+def _trigrams(s):
+    return {s[i:i + 3] for i in range(len(s) - 2)}
+
+
+class _Catalog:
+    """
+    rows     : {id: db.Medicine row}
+    names    : sorted [(lowercase name, id)] for "name starts with" lookups
+    words    : sorted [(word, id)] for prefix lookups ("pan" -> Panadol)
+    trigrams : {"ana": {ids}} for substring lookups ("adol" -> Panadol)
+    barcodes : {barcode: id} for scanner lookups
+    Changed rows are only marked dirty; they are re-read in one query on the next search.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.db_path = None
+        self.rows = {}
+        self.lnames = {}
+        self.names = []
+        self.words = []
+        self.trigrams = {}
+        self.barcodes = {}
+        self.dirty = set()
+
+    # ---- index maintenance (caller holds the lock) ----
+    def _add(self, row):
+        mid, lname = row.id, row.name.lower()
+        self.rows[mid] = row
+        self.lnames[mid] = lname
+        bisect.insort(self.names, (lname, mid))
+        for w in set(_WORD.findall(lname)):
+            bisect.insort(self.words, (w, mid))
+        for t in _trigrams(lname):
+            self.trigrams.setdefault(t, set()).add(mid)
+        if row.barcode:
+            self.barcodes[row.barcode] = mid
+
+    def _remove(self, mid):
+        row = self.rows.pop(mid, None)
+        if row is not None and row.barcode and self.barcodes.get(row.barcode) == mid:
+            del self.barcodes[row.barcode]
+        lname = self.lnames.pop(mid, None)
+        if lname is None:
+            return
+        i = bisect.bisect_left(self.names, (lname, mid))
+        if i < len(self.names) and self.names[i] == (lname, mid):
+            del self.names[i]
+        for w in set(_WORD.findall(lname)):
+            i = bisect.bisect_left(self.words, (w, mid))
+            if i < len(self.words) and self.words[i] == (w, mid):
+                del self.words[i]
+        for t in _trigrams(lname):
+            ids = self.trigrams.get(t)
+            if ids is not None:
+                ids.discard(mid)
+                if not ids:
+                    del self.trigrams[t]
+
+    def _load(self):
+        with db.get_connection() as conn:
+            rows = db.rows_of(conn, db.Medicine).execute(
+                f"SELECT {_COLS} FROM medicines WHERE active=1").fetchall()
+        self.rows, self.lnames, self.trigrams, self.barcodes = {}, {}, {}, {}
+        words = []
+        for row in rows:
+            mid, lname = row.id, row.name.lower()
+            self.rows[mid] = row
+            if row.barcode:
+                self.barcodes[row.barcode] = mid
+            self.lnames[mid] = lname
+            words.extend((w, mid) for w in set(_WORD.findall(lname)))
+            for t in _trigrams(lname):
+                self.trigrams.setdefault(t, set()).add(mid)
+        words.sort()
+        self.words = words
+        self.names = sorted((lname, mid) for mid, lname in self.lnames.items())
+        self.dirty.clear()
+        self.db_path = db.DB_PATH
+
+    def _sync(self):
+        if self.db_path != db.DB_PATH:
+            self._load()
+            return
+        if not self.dirty:
+            return
+        ids = list(self.dirty)
+        self.dirty.clear()
+        fresh = {}
+        with db.get_connection() as conn:
+            cur = db.rows_of(conn, db.Medicine)
+            for i in range(0, len(ids), 500):
+                chunk = ids[i:i + 500]
+                marks = ",".join("?" * len(chunk))
+                for row in cur.execute(f"SELECT {_COLS} FROM medicines WHERE id IN ({marks})", chunk):
+                    fresh[row.id] = row
+        for mid in ids:
+            row = fresh.get(mid)
+            old = self.rows.get(mid)
+            if row is not None and row.active and old is not None \
+                    and old.name == row.name and old.barcode == row.barcode:
+                self.rows[mid] = row          # only price/stock changed: no re-indexing
+                continue
+            self._remove(mid)
+            if row is not None and row.active:
+                self._add(row)
+
+    # ---- lookups (caller holds the lock) ----
+    def _prefix_ids(self, word):
+        out = set()
+        i = bisect.bisect_left(self.words, (word,))
+        while i < len(self.words) and self.words[i][0].startswith(word):
+            out.add(self.words[i][1])
+            i += 1
+        return out
+
+    def _starting_with(self, text, limit):
+        out = []
+        i = bisect.bisect_left(self.names, (text,))
+        while i < len(self.names) and self.names[i][0].startswith(text) and len(out) < limit:
+            out.append(self.names[i][1])
+            i += 1
+        return out
+
+    def _trigram_ids(self, word):
+        sets = sorted((self.trigrams.get(t, set()) for t in _trigrams(word)), key=len)
+        if not sets[0]:
+            return set()
+        out = set(sets[0])
+        for s in sets[1:]:
+            out &= s
+            if not out:
+                break
+        return out
+
+    def search(self, q, limit):
+        mid = self.barcodes.get((q or "").strip())
+        if mid is not None:
+            return [self.rows[mid]]   # an exact barcode, like search_medicines
+        words = _WORD.findall((q or "").lower())
+        if not words:
+            return []
+        ql = " ".join(words)
+        long_words = [w for w in set(words) if len(w) >= 3]
+        short_words = [w for w in set(words) if len(w) < 3]
+
+        if limit:
+            # Names starting with the query already come out in rank order
+            head = self._starting_with(ql, limit)
+            if len(head) == limit:
+                return [self.rows[mid] for mid in head]
+
+        # Candidate sets: trigram postings for 3+ letter words, word prefixes for
+        # shorter ones; intersect smallest first, then confirm the substrings.
+        sets = [self._trigram_ids(w) for w in long_words]
+        sets += [self._prefix_ids(w) for w in short_words]
+        sets.sort(key=len)
+        ids = set(sets[0])
+        for s in sets[1:]:
+            if not ids:
+                break
+            ids &= s
+        for w in long_words:
+            ids = {mid for mid in ids if w in self.lnames[mid]}
+        if not ids:
+            return []
+
+        def rank(mid):
+            lname = self.lnames[mid]
+            return (0 if lname.startswith(ql) else 1 if lname.startswith(words[0]) else 2, lname)
+
+        if limit and len(ids) > limit:
+            best = heapq.nsmallest(limit, ids, key=rank)
+        else:
+            best = sorted(ids, key=rank)
+        return [self.rows[mid] for mid in best]
+
+
+_catalog = _Catalog()
+
+
+@timed
+def search(q, limit=50):
+    """
+    In-memory search over active medicines. Every typed word must appear in the
+    name (1-2 letter words match word starts). Same row shape as search_medicines.
+    """
+    with _catalog.lock:
+        _catalog._sync()
+        return _catalog.search(q, limit)
+
+
+def warm():
+    """Load the cache now (e.g. in the background at startup) so the first search is instant."""
+    with _catalog.lock:
+        _catalog._sync()
+
+
+@timed
+def find_by_barcode(code):
+    """Cached row of the active medicine with this barcode, or None (one dict lookup)."""
+    code = (code or "").strip()
+    with _catalog.lock:
+        _catalog._sync()
+        mid = _catalog.barcodes.get(code)
+        return _catalog.rows.get(mid) if mid is not None else None
+
+
+@timed
+def get(medicine_id):
+    """Current cached row for an active medicine, or None."""
+    with _catalog.lock:
+        _catalog._sync()
+        return _catalog.rows.get(int(medicine_id))
+
+
+def invalidate(medicine_ids):
+    """Mark rows as changed; they are re-read on the next lookup. Call after commit."""
+    with _catalog.lock:
+        if _catalog.db_path is not None:
+            _catalog.dirty.update(int(m) for m in medicine_ids)
+
+
+def invalidate_all():
+    """Drop the whole cache (e.g. after a bulk import); it reloads on the next lookup."""
+    with _catalog.lock:
+        _catalog.db_path = None
+        _catalog.rows, _catalog.lnames, _catalog.trigrams, _catalog.barcodes = {}, {}, {}, {}
+        _catalog.names, _catalog.words = [], []
+        _catalog.dirty.clear()
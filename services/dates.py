@@ -0,0 +1,22 @@
+# services/dates.py
+# Local days as typed by the user ('YYYY-MM-DD') and the midnight timestamps
+# used to bound created_at / as_of ranges ('YYYY-MM-DD 00:00:00', the same
+# text format those columns hold, so they compare correctly).
+import datetime
+
+
+def parse_day(day):
+    """'YYYY-MM-DD' (or a date/datetime) -> date."""
+    if isinstance(day, datetime.datetime):
+        return day.date()
+    if isinstance(day, datetime.date):
+        return day
+    try:
+        return datetime.datetime.strptime(day.strip(), "%Y-%m-%d").date()
+    except Exception:
+        raise ValueError("Date must be in YYYY-MM-DD format.")
+
+
+def day_start(day, plus_days=0):
+    """'YYYY-MM-DD' (or date) -> 'YYYY-MM-DD 00:00:00', optionally shifted by whole days."""
+    return (parse_day(day) + datetime.timedelta(days=plus_days)).strftime("%Y-%m-%d 00:00:00")
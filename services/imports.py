@@ -0,0 +1,106 @@
+# services/imports.py
+# Streaming readers for supplier files (delivery notes, price lists).
+import os, sys, csv, datetime
+ROOT = os.path.dirname(os.path.dirname(__file__))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from db import output_dir
+
+def _norm_header(h):
+    return str(h or "").strip().lower().replace(" ", "_")
+
+
+def iter_row_chunks(path: str, chunk_size: int = 1000):
+    """
+    Yield lists of up to `chunk_size` dicts read from a CSV or XLSX file.
+    Keys are the header names lower-cased with spaces as underscores; each dict
+    also has '_line' (1-based line/row number in the file, header = 1).
+    Only one chunk is held in memory at a time.
+    """
+    ext = os.path.splitext(path)[1].lower()
+    if ext in (".xlsx", ".xlsm"):
+        rows = _iter_xlsx(path)
+    elif ext in (".csv", ".txt"):
+        rows = _iter_csv(path)
+    else:
+        raise ValueError("Unsupported file type. Save the sheet as CSV or XLSX.")
+
+    header = None
+    chunk = []
+    for line_no, values in rows:
+        if header is None:
+            header = [_norm_header(h) for h in values]
+            continue
+        if not any(str(v).strip() for v in values if v is not None):
+            continue  # blank line
+        row = dict(zip(header, values))
+        row["_line"] = line_no
+        chunk.append(row)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _iter_csv(path):
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        for line_no, values in enumerate(csv.reader(f), start=1):
+            yield line_no, values
+
+
+def _iter_xlsx(path):
+    try:
+        from openpyxl import load_workbook   # pandas' xlsx engine
+    except ModuleNotFoundError:
+        raise RuntimeError(
+            "openpyxl not installed. Activate your venv and run: python -m pip install openpyxl"
+        )
+    wb = load_workbook(path, read_only=True, data_only=True)
+    try:
+        ws = wb.worksheets[0]
+        for line_no, values in enumerate(ws.iter_rows(values_only=True), start=1):
+            yield line_no, ["" if v is None else v for v in values]
+    finally:
+        wb.close()
+
+
+def first_of(row: dict, *keys):
+    """First non-empty value among several accepted column names, stripped."""
+    for k in keys:
+        v = row.get(k)
+        if v is not None and str(v).strip() != "":
+            return str(v).strip()
+    return None
+
+
+class RejectLog:
+    """
+    Rejected lines written straight to data/reports/<prefix>_<timestamp>.csv.
+    The file is only created if something is rejected; `path` stays None otherwise.
+    """
+
+    def __init__(self, prefix: str, header):
+        self.prefix = prefix
+        self.header = header
+        self.path = None
+        self.count = 0
+        self._f = None
+        self._w = None
+
+    def add(self, row):
+        if self._w is None:
+            out_dir = output_dir("reports")
+            stamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+            self.path = os.path.join(out_dir, f"{self.prefix}_{stamp}.csv")
+            self._f = open(self.path, "w", newline="", encoding="utf-8")
+            self._w = csv.writer(self._f)
+            self._w.writerow(self.header)
+        self._w.writerow(row)
+        self.count += 1
+
+    def close(self):
+        if self._f is not None:
+            self._f.close()
+            self._f = None
@@ -0,0 +1,345 @@
+# services/instrumentation.py
+# Opt-in timing for the service layer: per-function latency histograms,
+# per-statement SQL timings/row counts and a slow-query log with query plans.
+# Off by default; while off, every hook is a single flag check.
+#
+#   @instrumentation.timed               on a service function
+#   db connections use InstrumentedConnection (see db._connect)
+#   enable() / disable() / reset() / snapshot() / dump_json()
+#
+# Set CLINIC_INSTRUMENT=1 to start with it enabled.
+import os, sys, re, json, time, sqlite3, datetime, functools, threading, collections
+ROOT = os.path.dirname(os.path.dirname(__file__))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+_enabled = os.environ.get("CLINIC_INSTRUMENT") == "1"
+
+SLOW_SQL_MS   = 50.0      # statements slower than this go to the slow log (with a query plan)
+SLOW_LOG_SIZE = 100       # most recent slow statements kept
+PROGRESS_STEPS = 1000     # VM instructions between progress-handler calls
+
+# Histogram bucket upper bounds in ms (last bucket is everything slower)
+BUCKETS_MS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+_lock = threading.Lock()
+_funcs = {}               # name -> _Stat
+_sql = {}                 # normalized statement -> _Stat
+_slow = collections.deque(maxlen=SLOW_LOG_SIZE)
+_since = time.time()
+_startup = []             # [(phase, ms since process start)], see record_startup
+
+_SPACES = re.compile(r"\s+")
+_MARKS = re.compile(r"\?(\s*,\s*\?)+")           # IN (?,?,?) lists of any length -> one key
+_PLANNABLE = ("SELECT", "WITH", "INSERT", "UPDATE", "DELETE", "REPLACE")
+
+
+class _Stat:
+    __slots__ = ("calls", "total", "max", "rows", "steps", "hist")
+
+    def __init__(self):
+        self.calls = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.rows = 0
+        self.steps = 0
+        self.hist = [0] * (len(BUCKETS_MS) + 1)
+
+    def add(self, ms, rows=0, steps=0):
+        self.calls += 1
+        self.total += ms
+        self.rows += rows
+        self.steps += steps
+        if ms > self.max:
+            self.max = ms
+        for i, bound in enumerate(BUCKETS_MS):
+            if ms <= bound:
+                self.hist[i] += 1
+                break
+        else:
+            self.hist[-1] += 1
+
+    def percentile(self, p):
+        """Upper bound (ms) of the bucket holding the p-th percentile."""
+        want = self.calls * p / 100.0
+        seen = 0
+        for i, n in enumerate(self.hist):
+            seen += n
+            if n and seen >= want:
+                return BUCKETS_MS[i] if i < len(BUCKETS_MS) else self.max
+        return 0.0
+
+    def to_dict(self):
+        return {
+            "calls": self.calls,
+            "total_ms": round(self.total, 3),
+            "mean_ms": round(self.total / self.calls, 3) if self.calls else 0.0,
+            "p50_ms": self.percentile(50),
+            "p95_ms": self.percentile(95),
+            "max_ms": round(self.max, 3),
+            "rows": self.rows,
+            "vm_steps": self.steps,
+            "histogram": dict(zip([f"<={b}" for b in BUCKETS_MS] + ["slower"], self.hist)),
+        }
+
+
+# ---------- switches ----------
+def enable():
+    global _enabled
+    _enabled = True
+
+
+def disable():
+    global _enabled
+    _enabled = False
+
+
+def is_enabled():
+    return _enabled
+
+
+def reset():
+    global _since
+    with _lock:
+        _funcs.clear()
+        _sql.clear()
+        _slow.clear()
+        _since = time.time()
+
+
+# ---------- function timings ----------
+def timed(fn):
+    """Record the latency of every call to fn while instrumentation is enabled."""
+    name = f"{fn.__module__.rsplit('.', 1)[-1]}.{fn.__qualname__}"
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        if not _enabled:
+            return fn(*args, **kwargs)
+        t0 = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            ms = (time.perf_counter() - t0) * 1000
+            with _lock:
+                st = _funcs.get(name)
+                if st is None:
+                    st = _funcs[name] = _Stat()
+                st.add(ms)
+    return wrapper
+
+
+# ---------- SQL timings ----------
+def _normalize(sql):
+    return _MARKS.sub("?, ...", _SPACES.sub(" ", sql).strip())
+
+
+def _query_plan(conn, sql, params):
+    """EXPLAIN QUERY PLAN lines, indented by depth (runs on a plain, untimed cursor)."""
+    try:
+        rows = sqlite3.Cursor(conn).execute("EXPLAIN QUERY PLAN " + sql, params).fetchall()
+    except sqlite3.Error as e:
+        return [f"(no plan: {e})"]
+    depth = {0: -1}
+    out = []
+    for node_id, parent, _unused, detail in rows:
+        depth[node_id] = depth.get(parent, -1) + 1
+        out.append("  " * depth[node_id] + detail)
+    return out
+
+
+def _record_sql(conn, sql, params, ms, rows, steps):
+    key = _normalize(sql)
+    with _lock:
+        st = _sql.get(key)
+        if st is None:
+            st = _sql[key] = _Stat()
+        st.add(ms, rows, steps)
+    if ms >= SLOW_SQL_MS:
+        plan = None
+        if params is not None and key.split(" ", 1)[0].upper() in _PLANNABLE:
+            plan = _query_plan(conn, sql, params)
+        with _lock:
+            _slow.append({
+                "at": datetime.datetime.now().isoformat(timespec="seconds"),
+                "ms": round(ms, 3),
+                "rows": rows,
+                "vm_steps": steps,
+                "thread": threading.current_thread().name,
+                "sql": key,
+                "plan": plan,
+            })
+
+
+class _TimedCursor(sqlite3.Cursor):
+    """
+    Times a statement from execute() through its last fetch (rows are produced
+    lazily, so most of a SELECT's time is spent fetching) and counts the rows.
+    """
+    _pending = None           # [sql, params, ms, rows, vm_steps_at_start]
+
+    def _begin(self, sql, params, ms, steps0):
+        self._pending = [sql, params, ms, 0, steps0]
+
+    def _finish(self):
+        p = self._pending
+        if p is None:
+            return
+        self._pending = None
+        sql, params, ms, rows, steps0 = p
+        if rows == 0 and self.rowcount > 0:
+            rows = self.rowcount               # INSERT / UPDATE / DELETE
+        _record_sql(self.connection, sql, params, ms, rows,
+                    getattr(self.connection, "_vm_steps", 0) - steps0)
+
+    def execute(self, sql, params=()):
+        self._finish()
+        steps0 = getattr(self.connection, "_vm_steps", 0)
+        t0 = time.perf_counter()
+        try:
+            return super().execute(sql, params)
+        finally:
+            self._begin(sql, params, (time.perf_counter() - t0) * 1000, steps0)
+
+    def executemany(self, sql, seq_of_params):
+        self._finish()
+        steps0 = getattr(self.connection, "_vm_steps", 0)
+        t0 = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_params)
+        finally:
+            self._begin(sql, None, (time.perf_counter() - t0) * 1000, steps0)
+            self._finish()
+
+    def _fetched(self, t0, n, done):
+        p = self._pending
+        if p is not None:
+            p[2] += (time.perf_counter() - t0) * 1000
+            p[3] += n
+            if done:
+                self._finish()
+
+    def fetchone(self):
+        t0 = time.perf_counter()
+        row = super().fetchone()
+        self._fetched(t0, row is not None, row is None)
+        return row
+
+    def fetchmany(self, size=None):
+        t0 = time.perf_counter()
+        rows = super().fetchmany(self.arraysize if size is None else size)
+        self._fetched(t0, len(rows), not rows)
+        return rows
+
+    def fetchall(self):
+        t0 = time.perf_counter()
+        rows = super().fetchall()
+        self._fetched(t0, len(rows), True)
+        return rows
+
+    def __next__(self):
+        t0 = time.perf_counter()
+        try:
+            row = super().__next__()
+        except StopIteration:
+            self._fetched(t0, 0, True)
+            raise
+        self._fetched(t0, 1, False)
+        return row
+
+    def close(self):
+        self._finish()
+        super().close()
+
+    def __del__(self):
+        try:
+            self._finish()
+        except Exception:
+            pass
+
+
+class InstrumentedConnection(sqlite3.Connection):
+    """
+    Connection factory used by db.get_connection. While instrumentation is off
+    it behaves exactly like sqlite3.Connection (one flag check per call).
+    """
+    _vm_steps = 0
+    _hooked = False
+
+    def _hook(self):
+        if _enabled and not self._hooked:
+            def on_progress():
+                self._vm_steps += PROGRESS_STEPS
+                return 0
+            self.set_progress_handler(on_progress, PROGRESS_STEPS)
+            self._hooked = True
+        elif not _enabled and self._hooked:
+            self.set_progress_handler(None, 0)
+            self._hooked = False
+
+    def cursor(self, factory=None):
+        if factory is None and (_enabled or self._hooked):
+            self._hook()
+            if _enabled:
+                return super().cursor(_TimedCursor)
+        return super().cursor() if factory is None else super().cursor(factory)
+
+    def execute(self, sql, params=()):
+        if not (_enabled or self._hooked):
+            return super().execute(sql, params)
+        return self.cursor().execute(sql, params)
+
+    def executemany(self, sql, seq_of_params):
+        if not (_enabled or self._hooked):
+            return super().executemany(sql, seq_of_params)
+        return self.cursor().executemany(sql, seq_of_params)
+
+
+# ---------- startup ----------
+def record_startup(t0, phases):
+    """
+    Keep the app's startup timeline (always recorded, it costs nothing).
+    t0 is time.perf_counter() at the first import; phases is [(name, perf_counter())].
+    """
+    _startup[:] = [(name, round((t - t0) * 1000, 1)) for name, t in phases]
+
+
+def startup_report():
+    """Startup timeline as text: one line per phase with its own and cumulative ms."""
+    lines = ["Startup timing (ms):"]
+    prev = 0.0
+    for name, ms in _startup:
+        lines.append(f"  {name:<14}{ms - prev:>9.1f}{ms:>10.1f}")
+        prev = ms
+    return "\n".join(lines)
+
+
+# ---------- reporting ----------
+def snapshot():
+    """All collected numbers as plain dicts (slowest first), ready for JSON."""
+    with _lock:
+        funcs = {k: v.to_dict() for k, v in _funcs.items()}
+        sql = {k: v.to_dict() for k, v in _sql.items()}
+        slow = list(_slow)
+    by_total = lambda d: dict(sorted(d.items(), key=lambda kv: -kv[1]["total_ms"]))
+    return {
+        "enabled": _enabled,
+        "since": datetime.datetime.fromtimestamp(_since).isoformat(timespec="seconds"),
+        "taken": datetime.datetime.now().isoformat(timespec="seconds"),
+        "slow_sql_ms": SLOW_SQL_MS,
+        "startup_ms": dict(_startup),
+        "functions": by_total(funcs),
+        "sql": by_total(sql),
+        "slow_queries": slow[::-1],
+    }
+
+
+def dump_json(path=None):
+    """Write snapshot() to data/reports/diagnostics_<time>.json (or path). Returns the path."""
+    if path is None:
+        from db import output_dir     # db imports this module at load time
+        path = os.path.join(output_dir("reports"),
+                            f"diagnostics_{datetime.datetime.now():%Y%m%d_%H%M%S}.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(snapshot(), f, indent=2)
+    return path
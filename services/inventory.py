@@ -5,7 +5,11 @@ if ROOT not in sys.path:
     sys.path.insert(0, ROOT)
 
 from db import get_connection
+from services.instrumentation import timed
+from services import catalog, alerts
+from services.imports import iter_row_chunks, first_of, RejectLog
 
+@timed
 def stock_in(medicine_id: int, qty: int, reason: str = "Stock-In", ref: str | None = None):
     """
     Increase stock for a medicine and log it in inventory_moves.
@@ -40,4 +44,104 @@ def stock_in(medicine_id: int, qty: int, reason: str = "Stock-In", ref: str | No
         new_qty = c.execute("SELECT stock_qty FROM medicines WHERE id=?", (medicine_id,)).fetchone()[0]
         conn.commit()
 
+    catalog.invalidate([medicine_id])
+    alerts.stock_changed([medicine_id])
     return name, new_qty
+
+
+def _parse_qty(v):
+    try:
+        f = float(v)
+    except (TypeError, ValueError):
+        return None
+    if f <= 0 or not f.is_integer():
+        return None
+    return int(f)
+
+
+@timed
+def bulk_stock_in(lines, reason: str = "Delivery", ref: str | None = None):
+    """
+    Receive many lines at once. Each line is a dict with 'qty' and a 'barcode'
+    and/or 'name' (matched case-insensitively); barcode wins when both are given.
+    All matched lines are applied in ONE transaction; bad lines are not applied.
+    Returns a report dict:
+      {"lines", "applied", "units", "medicines", "rejected": [(line, barcode, name, qty, why)]}
+    """
+    with get_connection() as conn:
+        c = conn.cursor()
+        c.execute("BEGIN IMMEDIATE")
+
+        by_barcode, by_name = {}, {}
+        for mid, name, barcode, active in c.execute("SELECT id, name, barcode, active FROM medicines"):
+            by_name[name.strip().lower()] = (mid, name, active)
+            if barcode:
+                by_barcode[str(barcode).strip()] = (mid, name, active)
+
+        moves, added, rejected = [], {}, []
+        for n, line in enumerate(lines, start=1):
+            line_no = line.get("_line", n)
+            barcode = (str(line.get("barcode") or "").strip()) or None
+            name = (str(line.get("name") or "").strip()) or None
+            raw_qty = line.get("qty")
+
+            qty = _parse_qty(raw_qty)
+            if qty is None:
+                rejected.append((line_no, barcode, name, raw_qty, "Quantity must be a positive whole number"))
+                continue
+            med = (by_barcode.get(barcode) if barcode else None) or (by_name.get(name.lower()) if name else None)
+            if med is None:
+                rejected.append((line_no, barcode, name, raw_qty, "No matching medicine"))
+                continue
+            mid, mname, active = med
+            if not active:
+                rejected.append((line_no, barcode, name, raw_qty, f"Medicine '{mname}' is inactive"))
+                continue
+
+            added[mid] = added.get(mid, 0) + qty
+            moves.append((mid, qty, reason, ref))
+
+        c.executemany("UPDATE medicines SET stock_qty = stock_qty + ? WHERE id=?",
+                      [(q, mid) for mid, q in added.items()])
+        c.executemany("""
+            INSERT INTO inventory_moves (medicine_id, change_qty, reason, ref)
+            VALUES (?, ?, ?, ?)
+        """, moves)
+        conn.commit()
+
+    catalog.invalidate(added)
+    alerts.stock_changed(added)
+    return {
+        "lines": len(moves) + len(rejected),
+        "applied": len(moves),
+        "units": sum(added.values()),
+        "medicines": len(added),
+        "rejected": rejected,
+    }
+
+
+@timed
+def receive_delivery_file(path: str, reason: str = "Delivery", ref: str | None = None):
+    """
+    Bulk stock-in from a supplier delivery note (CSV/XLSX).
+    Columns: barcode and/or name (or medicine), qty (or quantity).
+    Rejected lines are written to data/reports/stock_in_rejects_*.csv.
+    Returns bulk_stock_in's report plus "reject_path" (None if nothing was rejected).
+    """
+    lines = []
+    for chunk in iter_row_chunks(path, chunk_size=5000):
+        for row in chunk:
+            lines.append({
+                "_line": row["_line"],
+                "barcode": first_of(row, "barcode", "ean", "code"),
+                "name": first_of(row, "name", "medicine", "item", "description"),
+                "qty": first_of(row, "qty", "quantity", "received"),
+            })
+
+    report = bulk_stock_in(lines, reason, ref or os.path.basename(path))
+    log = RejectLog("stock_in_rejects", ["Line", "Barcode", "Name", "Qty", "Reason"])
+    for r in report["rejected"]:
+        log.add(r)
+    log.close()
+    report["reject_path"] = log.path
+    return report
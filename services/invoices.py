@@ -6,12 +6,11 @@ if ROOT not in sys.path:
     sys.path.insert(0, ROOT)
 # ---------------------------------------------------------------------------
 
-from db import get_connection
-
-
-def _new_invoice_no():
-    """Time-based unique invoice number, e.g., INV-20250817-215959."""
-    return "INV-" + datetime.datetime.now().strftime("%Y%m%d-%H%M%S")
+from db import get_connection, rows_of, InvoiceHeader
+from services.instrumentation import timed
+from services import catalog, alerts
+from services.numbering import next_invoice_no
+from services import rollups
 
 
 def compute_totals(cart_items, doctor_fee):
@@ -26,6 +25,7 @@ def compute_totals(cart_items, doctor_fee):
     return round(subtotal, 2), total, total_items
 
 
+@timed
 def save_invoice(cart_items, patient_id=None, doctor_fee=0):
     """
     - Validates patient (if provided)
@@ -45,11 +45,18 @@ def save_invoice(cart_items, patient_id=None, doctor_fee=0):
 
     # Preliminary totals (we'll recompute after refreshing prices)
     subtotal, total, total_items = compute_totals(cart_items, doctor_fee)
-    invoice_no = _new_invoice_no()
+
+    # Cart lines may repeat a medicine; stock is checked against the combined qty
+    lines = [(int(it["medicine_id"]), int(it["qty"]), it["name"]) for it in cart_items]
+    wanted = {}
+    for mid, qty, _name in lines:
+        wanted[mid] = wanted.get(mid, 0) + qty
+    ids = list(wanted)
+    marks = ",".join("?" * len(ids))
 
     with get_connection() as conn:
         c = conn.cursor()
-        c.execute("BEGIN")
+        c.execute("BEGIN IMMEDIATE")
 
         # ✅ Validate patient FK early (avoid FOREIGN KEY errors)
         if pid is not None:
@@ -58,33 +65,33 @@ def save_invoice(cart_items, patient_id=None, doctor_fee=0):
                 conn.rollback()
                 raise ValueError(f"Patient ID {pid} not found. Leave it blank or add the patient first.")
 
-        # 1) Validate each medicine, ensure enough stock, and refresh unit_price from DB
-        refreshed_items = []
-        for it in cart_items:
-            mid = int(it["medicine_id"])
-            qty = int(it["qty"])
-
-            row = c.execute(
-                "SELECT unit_price, stock_qty, active, name FROM medicines WHERE id=?",
-                (mid,)
-            ).fetchone()
-            if not row:
+        # 1) One query for every medicine in the cart: validate stock and take official prices
+        meds = {
+            mid: (unit_price, stock_qty, active, mname)
+            for mid, unit_price, stock_qty, active, mname in c.execute(
+                f"SELECT id, unit_price, stock_qty, active, name FROM medicines WHERE id IN ({marks})", ids)
+        }
+        for mid in ids:
+            if mid not in meds:
                 conn.rollback()
                 raise ValueError("Medicine not found.")
-            unit_price_db, stock_qty, active, mname = row
+            _price, stock_qty, active, mname = meds[mid]
             if not active:
                 conn.rollback()
                 raise ValueError(f"Medicine '{mname}' is inactive.")
-            if stock_qty < qty:
+            if stock_qty < wanted[mid]:
                 conn.rollback()
-                raise ValueError(f"Insufficient stock for {mname}. Available: {stock_qty}, requested: {qty}")
+                raise ValueError(f"Insufficient stock for {mname}. Available: {stock_qty}, requested: {wanted[mid]}")
 
+        refreshed_items = []
+        for mid, qty, name in lines:
+            unit_price = float(meds[mid][0])
             refreshed_items.append({
                 "medicine_id": mid,
-                "name": it["name"],
+                "name": name,
                 "qty": qty,
-                "unit_price": float(unit_price_db),
-                "line_total": round(qty * float(unit_price_db), 2)
+                "unit_price": unit_price,
+                "line_total": round(qty * unit_price, 2)
             })
 
         # 2) Recompute totals with official prices
@@ -93,12 +100,14 @@ def save_invoice(cart_items, patient_id=None, doctor_fee=0):
         total_items = sum(x["qty"] for x in refreshed_items)
         total = round(subtotal + df, 2)
 
-        # 3) Insert invoice header
+        # 3) Number + insert invoice header (the counter row is part of this transaction)
+        now = datetime.datetime.now()
+        invoice_no = next_invoice_no(c, now)
         try:
             c.execute("""
-                INSERT INTO invoices (invoice_no, patient_id, doctor_fee, subtotal, total, total_items)
-                VALUES (?, ?, ?, ?, ?, ?)
-            """, (invoice_no, pid, df, subtotal, total, total_items))
+                INSERT INTO invoices (invoice_no, patient_id, doctor_fee, subtotal, total, total_items, created_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            """, (invoice_no, pid, df, subtotal, total, total_items, now.strftime("%Y-%m-%d %H:%M:%S")))
         except sqlite3.IntegrityError as e:
             conn.rollback()
             if "FOREIGN KEY" in str(e).upper():
@@ -106,36 +115,47 @@ def save_invoice(cart_items, patient_id=None, doctor_fee=0):
             raise
         invoice_id = c.lastrowid
 
-        # 4) Insert items + decrease stock + log movement
-        for x in refreshed_items:
-            # line item
-            c.execute("""
-                INSERT INTO invoice_items (invoice_id, medicine_id, qty, unit_price, line_total)
-                VALUES (?, ?, ?, ?, ?)
-            """, (invoice_id, x["medicine_id"], x["qty"], x["unit_price"], x["line_total"]))
+        # 4) Line items and inventory moves (negative for sale) in one batch each
+        c.executemany("""
+            INSERT INTO invoice_items (invoice_id, medicine_id, qty, unit_price, line_total)
+            VALUES (?, ?, ?, ?, ?)
+        """, [(invoice_id, x["medicine_id"], x["qty"], x["unit_price"], x["line_total"])
+              for x in refreshed_items])
+        c.executemany("""
+            INSERT INTO inventory_moves (medicine_id, change_qty, reason, ref)
+            VALUES (?, ?, 'sale', ?)
+        """, [(x["medicine_id"], -x["qty"], invoice_no) for x in refreshed_items])
+
+        # 5) Decrease stock for every medicine with a single UPDATE
+        case = " ".join("WHEN ? THEN ?" for _ in ids)
+        params = [v for mid in ids for v in (mid, wanted[mid])]
+        c.execute(f"""
+            UPDATE medicines SET stock_qty = stock_qty - CASE id {case} END
+            WHERE id IN ({marks})
+        """, params + ids)
+
+        # 6) Keep the daily sales rollups in step (same transaction)
+        rollups.apply_invoice(c, now.strftime("%Y-%m-%d"), subtotal, df, total, total_items,
+                              [(x["medicine_id"], x["qty"], x["line_total"]) for x in refreshed_items])
 
-            # decrease stock
-            c.execute("UPDATE medicines SET stock_qty = stock_qty - ? WHERE id=?",
-                      (x["qty"], x["medicine_id"]))
+        conn.commit()
 
-            # log inventory move (negative for sale)
-            c.execute("""
-                INSERT INTO inventory_moves (medicine_id, change_qty, reason, ref)
-                VALUES (?, ?, 'sale', ?)
-            """, (x["medicine_id"], -x["qty"], invoice_no))
+    catalog.invalidate(ids)
+    alerts.stock_changed(ids)
+    return invoice_id, invoice_no, subtotal, total, total_items
 
-        conn.commit()
-        return invoice_id, invoice_no, subtotal, total, total_items
+
+@timed
 def list_invoices_by_patient(patient_id: int):
     """
-    Returns rows: (id, invoice_no, created_at, subtotal, doctor_fee, total, total_items)
-    newest first.
+    Returns InvoiceHeader rows (id, invoice_no, created_at, subtotal, doctor_fee,
+    total, total_items), newest first.
     """
     with get_connection() as conn:
-        c = conn.cursor()
+        c = rows_of(conn, InvoiceHeader)
         return c.execute("""
             SELECT id, invoice_no, created_at, subtotal, doctor_fee, total, total_items
             FROM invoices
             WHERE patient_id = ?
-            ORDER BY datetime(created_at) DESC
+            ORDER BY created_at DESC, id DESC
         """, (patient_id,)).fetchall()
@@ -0,0 +1,219 @@
+# services/ledger.py
+# Point-in-time stock from the inventory_moves log.
+#
+# Monthly checkpoint rows record, per medicine, the stock and the running total
+# of moves at the start of a month. A question about date D starts from the
+# nearest checkpoint and sums only the moves between it and D
+# (idx_moves_med_created), instead of summing the whole history.
+import os, sys, datetime
+ROOT = os.path.dirname(os.path.dirname(__file__))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from db import get_connection
+from services.dates import day_start
+from services.instrumentation import timed
+
+
+def _month_start(d):
+    return datetime.datetime(d.year, d.month, 1)
+
+
+def _next_month(d):
+    return datetime.datetime(d.year + (d.month == 12), d.month % 12 + 1, 1)
+
+
+def _end_of_day(day):
+    """Timestamp just after `day`, i.e. the point its closing stock refers to."""
+    return day_start(day, 1)
+
+
+@timed
+def create_checkpoints(now=None):
+    """
+    Write any missing monthly checkpoints up to the start of the current month.
+    A medicine gets a row for a month only if it had moves in the previous
+    month (or has no checkpoint yet), so quiet items don't bloat the table.
+    Historic rows are derived backwards from today's stock; rows written on
+    time (e.g. at startup in a new month) capture the live stock.
+    Returns the number of rows written.
+    """
+    target = _month_start(now or datetime.datetime.now())
+    with get_connection() as conn:
+        c = conn.cursor()
+        if c.execute("SELECT 1 FROM stock_checkpoints WHERE as_of >= ? LIMIT 1",
+                     (day_start(target),)).fetchone():
+            return 0                            # already done this month
+        c.execute("BEGIN IMMEDIATE")
+        last = c.execute("SELECT MAX(as_of) FROM stock_checkpoints").fetchone()[0]
+        if last and last >= day_start(target):
+            conn.rollback()
+            return 0
+
+        # Months to write: after the last checkpoint (or after the month of the first move)
+        if last:
+            since = datetime.datetime.strptime(last, "%Y-%m-%d %H:%M:%S")
+            since_ts = last
+        else:
+            first = c.execute("SELECT MIN(created_at) FROM inventory_moves").fetchone()[0]
+            if not first:
+                conn.rollback()
+                return 0
+            since = _month_start(datetime.datetime.strptime(first[:10], "%Y-%m-%d"))
+            since_ts = ""
+        months = []
+        m = _next_month(since)
+        while m <= target:
+            months.append(m)
+            m = _next_month(m)
+
+        # Running move totals carried in from before `since`. A medicine's latest
+        # checkpoint is followed by no moves until `since` (or it would have a
+        # newer one), so its moves_total is still current.
+        carried = dict(c.execute("""
+            SELECT medicine_id, moves_total FROM stock_checkpoints
+            WHERE (medicine_id, as_of) IN (
+                SELECT medicine_id, MAX(as_of) FROM stock_checkpoints GROUP BY medicine_id)
+        """).fetchall())
+        has_ck = set(carried)
+        if since_ts:
+            for mid, total in c.execute("""
+                SELECT medicine_id, SUM(change_qty) FROM inventory_moves
+                WHERE created_at < ? GROUP BY medicine_id
+            """, (since_ts,)):
+                if mid not in has_ck:
+                    carried[mid] = total      # moved before, but never checkpointed
+
+        # One aggregated pass over the new moves: {mid: {"YYYY-MM": net}}
+        per_month = {}
+        for mid, ym, net in c.execute("""
+            SELECT medicine_id, substr(created_at, 1, 7), SUM(change_qty)
+            FROM inventory_moves WHERE created_at >= ?
+            GROUP BY medicine_id, substr(created_at, 1, 7)
+        """, (since_ts,)):
+            per_month.setdefault(mid, {})[ym] = net
+
+        current = dict(c.execute("SELECT id, stock_qty FROM medicines").fetchall())
+
+        rows = []
+        for mid in set(per_month) | set(carried):
+            if mid not in current:
+                continue
+            nets = per_month.get(mid, {})
+            after_since = sum(nets.values())
+            needs_first = mid not in has_ck
+            prev_key = since.strftime("%Y-%m")
+            before = 0                          # moves in [since, m)
+            for m in months:
+                before += nets.get(prev_key, 0)
+                if prev_key in nets or (needs_first and (before or mid in carried)):
+                    stock = current[mid] - (after_since - before)
+                    rows.append((mid, day_start(m), stock, carried.get(mid, 0) + before))
+                    needs_first = False
+                prev_key = m.strftime("%Y-%m")
+
+        c.executemany("""
+            INSERT OR IGNORE INTO stock_checkpoints (medicine_id, as_of, stock_qty, moves_total)
+            VALUES (?, ?, ?, ?)
+        """, rows)
+        conn.commit()
+    return len(rows)
+
+
+def _checkpoint_before(c, medicine_id, ts):
+    return c.execute("""
+        SELECT as_of, stock_qty, moves_total FROM stock_checkpoints
+        WHERE medicine_id=? AND as_of <= ? ORDER BY as_of DESC LIMIT 1
+    """, (medicine_id, ts)).fetchone()
+
+
+def _checkpoint_after(c, medicine_id, ts):
+    return c.execute("""
+        SELECT as_of, stock_qty, moves_total FROM stock_checkpoints
+        WHERE medicine_id=? AND as_of > ? ORDER BY as_of ASC LIMIT 1
+    """, (medicine_id, ts)).fetchone()
+
+
+def _moves_sum(c, medicine_id, lo, hi=None):
+    """SUM(change_qty) for lo <= created_at < hi (hi=None: up to now)."""
+    if hi is None:
+        row = c.execute("""
+            SELECT IFNULL(SUM(change_qty), 0) FROM inventory_moves
+            WHERE medicine_id=? AND created_at >= ?
+        """, (medicine_id, lo)).fetchone()
+    else:
+        row = c.execute("""
+            SELECT IFNULL(SUM(change_qty), 0) FROM inventory_moves
+            WHERE medicine_id=? AND created_at >= ? AND created_at < ?
+        """, (medicine_id, lo, hi)).fetchone()
+    return row[0]
+
+
+def _state_at(c, medicine_id, ts):
+    """(stock, running moves total) just before timestamp `ts`."""
+    ck = _checkpoint_before(c, medicine_id, ts)
+    if ck:
+        as_of, stock, total = ck
+        tail = _moves_sum(c, medicine_id, as_of, ts)
+        return stock + tail, total + tail
+    ck = _checkpoint_after(c, medicine_id, ts)
+    if ck:
+        as_of, stock, total = ck
+        tail = _moves_sum(c, medicine_id, ts, as_of)
+        return stock - tail, total - tail
+    row = c.execute("SELECT stock_qty FROM medicines WHERE id=?", (medicine_id,)).fetchone()
+    if not row:
+        raise ValueError("Medicine not found.")
+    tail = _moves_sum(c, medicine_id, ts)
+    before = _moves_sum(c, medicine_id, "", ts)
+    return row[0] - tail, before
+
+
+@timed
+def stock_on(medicine_id: int, day):
+    """Closing stock of a medicine on a local date (YYYY-MM-DD)."""
+    with get_connection() as conn:
+        return _state_at(conn.cursor(), int(medicine_id), _end_of_day(day))[0]
+
+
+@timed
+def movement_between(medicine_id: int, from_day, to_day):
+    """
+    Stock movement for from_day..to_day (inclusive, YYYY-MM-DD).
+    Returns {"opening", "closing", "net"}; net is the sum of logged moves,
+    so closing - opening - net shows any manual edits made outside the log.
+    """
+    lo, hi = day_start(from_day), _end_of_day(to_day)
+    with get_connection() as conn:
+        c = conn.cursor()
+        opening, total_lo = _state_at(c, int(medicine_id), lo)
+        closing, total_hi = _state_at(c, int(medicine_id), hi)
+    return {"opening": opening, "closing": closing, "net": total_hi - total_lo}
+
+
+@timed
+def stock_on_all(day):
+    """
+    Closing stock of every medicine on a date, in one query.
+    Returns rows: (id, name, stock_qty_on_day, stock_qty_now)
+    """
+    ts = _end_of_day(day)
+    with get_connection() as conn:
+        return conn.execute("""
+            WITH ck AS (
+                SELECT medicine_id, MAX(as_of) AS as_of, stock_qty
+                FROM stock_checkpoints WHERE as_of <= ? GROUP BY medicine_id
+            )
+            SELECT m.id, m.name,
+                   CASE WHEN ck.medicine_id IS NOT NULL THEN
+                        ck.stock_qty + IFNULL((SELECT SUM(change_qty) FROM inventory_moves mv
+                                               WHERE mv.medicine_id = m.id
+                                                 AND mv.created_at >= ck.as_of AND mv.created_at < ?), 0)
+                   ELSE
+                        m.stock_qty - IFNULL((SELECT SUM(change_qty) FROM inventory_moves mv
+                                              WHERE mv.medicine_id = m.id AND mv.created_at >= ?), 0)
+                   END,
+                   m.stock_qty
+            FROM medicines m LEFT JOIN ck ON ck.medicine_id = m.id
+            ORDER BY m.name
+        """, (ts, ts, ts)).fetchall()
@@ -1,41 +1,66 @@
 # --- add these lines at the very top ---
-import os, sys
+import os, sys, sqlite3
 ROOT = os.path.dirname(os.path.dirname(__file__))  # parent of 'services'
 if ROOT not in sys.path:
     sys.path.insert(0, ROOT)
 # ---------------------------------------
-from db import get_connection
+from db import get_connection, has_fts5, fts_match_expr, rows_of, Medicine
+from services.instrumentation import timed
+from services import catalog, alerts
+from services.imports import iter_row_chunks, first_of, RejectLog
+
+def _norm_barcode(barcode):
+    barcode = str(barcode).strip() if barcode is not None else ""
+    return barcode or None
+
+
+def _barcode_taken(e):
+    if "barcode" in str(e):
+        return ValueError("This barcode is already used by another medicine.")
+    return e
 
 def add_medicine(name, unit_price, stock_qty=0, category=None, reorder_level=0, barcode=None):
-    with get_connection() as conn:
-        c = conn.cursor()
-        c.execute("""
-            INSERT INTO medicines (name, unit_price, stock_qty, category, reorder_level, barcode, active)
-            VALUES (?, ?, ?, ?, ?, ?, 1)
-        """, (name.strip(), float(unit_price), int(stock_qty or 0),
-              category, int(reorder_level or 0), barcode))
-        conn.commit()
+    try:
+        with get_connection() as conn:
+            c = conn.cursor()
+            c.execute("""
+                INSERT INTO medicines (name, unit_price, stock_qty, category, reorder_level, barcode, active)
+                VALUES (?, ?, ?, ?, ?, ?, 1)
+            """, (name.strip(), float(unit_price), int(stock_qty or 0),
+                  category, int(reorder_level or 0), _norm_barcode(barcode)))
+            conn.commit()
+    except sqlite3.IntegrityError as e:
+        raise _barcode_taken(e)
+    catalog.invalidate([c.lastrowid])
 
 def update_medicine(mid, name, unit_price, stock_qty, category=None, reorder_level=0, barcode=None, active=1):
-    with get_connection() as conn:
-        c = conn.cursor()
-        c.execute("""
-            UPDATE medicines
-            SET name=?, unit_price=?, stock_qty=?, category=?, reorder_level=?, barcode=?, active=?
-            WHERE id=?
-        """, (name.strip(), float(unit_price), int(stock_qty), category,
-              int(reorder_level or 0), barcode, int(active), int(mid)))
-        conn.commit()
+    try:
+        with get_connection() as conn:
+            c = conn.cursor()
+            c.execute("""
+                UPDATE medicines
+                SET name=?, unit_price=?, stock_qty=?, category=?, reorder_level=?, barcode=?, active=?
+                WHERE id=?
+            """, (name.strip(), float(unit_price), int(stock_qty), category,
+                  int(reorder_level or 0), _norm_barcode(barcode), int(active), int(mid)))
+            conn.commit()
+    except sqlite3.IntegrityError as e:
+        raise _barcode_taken(e)
+    catalog.invalidate([mid])
+    alerts.stock_changed([mid])
 
 def deactivate_medicine(mid):
     with get_connection() as conn:
         c = conn.cursor()
         c.execute("UPDATE medicines SET active=0 WHERE id=?", (int(mid),))
         conn.commit()
+    catalog.invalidate([mid])
+    alerts.stock_changed([mid])
 
+@timed
 def list_medicines(include_inactive=True):
     with get_connection() as conn:
-        c = conn.cursor()
+        c = rows_of(conn, Medicine)
         if include_inactive:
             q = """SELECT id, name, category, unit_price, stock_qty, reorder_level, barcode, active
                    FROM medicines ORDER BY name"""
@@ -44,19 +69,82 @@ def list_medicines(include_inactive=True):
                    FROM medicines WHERE active=1 ORDER BY name"""
         return c.execute(q).fetchall()
 
-def search_medicines(q):
-    q = f"%{q.strip()}%"
+@timed
+def list_medicines_page(after=None, limit=200, include_inactive=True):
+    """
+    One page of medicines ordered by name (keyset pagination).
+    after: the name of the last row of the previous page (None for the first page).
+    """
+    where = [] if include_inactive else ["active=1"]
+    params = []
+    if after is not None:
+        where.append("name > ?")
+        params.append(after)
+    sql = """SELECT id, name, category, unit_price, stock_qty, reorder_level, barcode, active
+             FROM medicines"""
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    sql += " ORDER BY name LIMIT ?"
     with get_connection() as conn:
-        c = conn.cursor()
+        return rows_of(conn, Medicine).execute(sql, params + [int(limit)]).fetchall()
+
+def count_medicines(include_inactive=True):
+    with get_connection() as conn:
+        q = "SELECT COUNT(*) FROM medicines" + ("" if include_inactive else " WHERE active=1")
+        return conn.execute(q).fetchone()[0]
+
+@timed
+def find_by_barcode(barcode):
+    """The active medicine with this barcode (indexed lookup), or None."""
+    code = _norm_barcode(barcode)
+    if code is None:
+        return None
+    with get_connection() as conn:
+        return rows_of(conn, Medicine).execute("""
+            SELECT id, name, category, unit_price, stock_qty, reorder_level, barcode, active
+            FROM medicines WHERE barcode = ? AND active=1
+        """, (code,)).fetchone()
+
+@timed
+def search_medicines(q, limit=None):
+    """
+    Active medicines whose name words start with the typed words, best matches first.
+    Uses the FTS5 index when available; if that finds nothing (or FTS5 is missing)
+    a LIKE scan matches the text anywhere in the name. A query that is exactly a
+    barcode returns that medicine.
+    """
+    code = _norm_barcode(q)
+    if code and " " not in code:
+        row = find_by_barcode(code)
+        if row is not None:
+            return [row]
+    match = fts_match_expr(q) if has_fts5() else None
+    with get_connection() as conn:
+        c = rows_of(conn, Medicine)
+        if match:
+            try:
+                rows = c.execute("""
+                  SELECT m.id, m.name, m.category, m.unit_price, m.stock_qty, m.reorder_level, m.barcode, m.active
+                  FROM medicines_fts f JOIN medicines m ON m.id = f.rowid
+                  WHERE medicines_fts MATCH ? AND m.active=1
+                  ORDER BY bm25(medicines_fts), m.name
+                  LIMIT ?
+                """, (match, limit or -1)).fetchall()
+                if rows:
+                    return rows
+            except sqlite3.OperationalError:
+                pass
+        # FTS only matches word starts: fall back to a substring match
         return c.execute("""
           SELECT id, name, category, unit_price, stock_qty, reorder_level, barcode, active
           FROM medicines
           WHERE active=1 AND name LIKE ?
           ORDER BY name
-        """, (q,)).fetchall()
-        
-        
-        
+          LIMIT ?
+        """, (f"%{(q or '').strip()}%", limit or -1)).fetchall()
+
+
+@timed
 def adjust_stock(medicine_id, delta, reason="adjustment", ref=None):
     """
     delta: +ve for stock-in, -ve for sale/return/adjustment
@@ -79,4 +167,158 @@ def adjust_stock(medicine_id, delta, reason="adjustment", ref=None):
             VALUES (?, ?, ?, ?)
         """, (int(medicine_id), int(delta), reason, ref))
         conn.commit()
-        return new_qty
+    catalog.invalidate([medicine_id])
+    alerts.stock_changed([medicine_id])
+    return new_qty
+
+
+def _parse_price(v):
+    try:
+        f = float(str(v).replace(",", "").replace("Rs", "").strip())
+    except (TypeError, ValueError):
+        return None
+    return f if f >= 0 else None
+
+
+def _parse_count(v, label):
+    """Blank -> None; a whole number >= 0 -> int; anything else raises ValueError."""
+    if v is None:
+        return None
+    try:
+        n = int(float(str(v).replace(",", "")))
+    except (TypeError, ValueError, OverflowError):
+        n = -1
+    if n < 0:
+        raise ValueError(f"{label} must be a whole number >= 0")
+    return n
+
+
+@timed
+def import_catalog(path, chunk_size=1000, progress=None):
+    """
+    Stream a distributor price list (CSV/XLSX) into the medicines table.
+    Columns: name*, unit_price* (or price), category, reorder_level, barcode, stock_qty.
+    Rows are matched on barcode first, then upserted on name. Existing medicines
+    keep their stock (stock_qty is only used for new ones); blank optional cells
+    keep the current value. Each chunk is one transaction.
+    A barcode repeated within the file is kept by its first row; later rows
+    with it are rejected, whatever the chunk size. Rows with a negative or
+    non-numeric reorder_level/stock_qty are rejected too.
+    progress(rows_done) is called after every chunk.
+    Returns {"inserted", "updated", "skipped", "reject_path"}.
+    """
+    counts = {"inserted": 0, "updated": 0, "skipped": 0}
+    rejects = RejectLog("catalog_import_rejects", ["Line", "Name", "Price", "Reason"])
+    done = 0
+    changed = set()
+    claimed = set()                           # barcodes given to an earlier row of the file
+    try:
+        for chunk in iter_row_chunks(path, chunk_size):
+            items = []
+            for row in chunk:
+                name = first_of(row, "name", "medicine", "item", "description")
+                raw_price = first_of(row, "unit_price", "price", "rate", "mrp")
+                price = _parse_price(raw_price)
+                if not name:
+                    rejects.add((row["_line"], name, raw_price, "Name is required"))
+                elif price is None:
+                    rejects.add((row["_line"], name, raw_price, "Price must be a number >= 0"))
+                else:
+                    items.append((row["_line"], name, price,
+                                  first_of(row, "category", "group"),
+                                  first_of(row, "reorder_level", "reorder"),
+                                  _norm_barcode(first_of(row, "barcode", "ean", "code")),
+                                  first_of(row, "stock_qty", "stock", "qty")))
+            changed.update(_upsert_chunk(items, counts, rejects, claimed))
+            done += len(chunk)
+            if progress:
+                progress(done)
+    finally:
+        rejects.close()
+        # Chunks already committed stay in, so refresh even if a later one failed
+        catalog.invalidate_all()
+        alerts.stock_changed(changed)         # reorder levels / new rows may cross the line
+    counts["skipped"] = rejects.count
+    return {**counts, "reject_path": rejects.path}
+
+
+def _upsert_chunk(items, counts, rejects, claimed):
+    """
+    Upsert one chunk in one transaction. claimed holds the barcodes of earlier
+    rows and is updated. Returns the ids of the medicines written.
+    """
+    valid = []
+    for line, name, price, category, raw_reorder, barcode, raw_stock in items:
+        try:
+            reorder = _parse_count(raw_reorder, "Reorder level")
+            stock = _parse_count(raw_stock, "Stock")
+        except ValueError as e:
+            rejects.add((line, name, price, str(e)))
+            continue
+        if barcode and barcode in claimed:
+            # Barcodes are unique: the first row with it wins
+            rejects.add((line, name, price, f"Barcode {barcode} is already used by an earlier row"))
+            continue
+        if barcode:
+            claimed.add(barcode)
+        valid.append((name, price, category, reorder, barcode, stock))
+    items = valid
+    if not items:
+        return []
+    with get_connection() as conn:
+        c = conn.cursor()
+        c.execute("BEGIN IMMEDIATE")
+
+        barcodes = list({b for _n, _p, _c, _r, b, _s in items if b})
+        by_barcode = {}
+        for i in range(0, len(barcodes), 500):
+            part = barcodes[i:i + 500]
+            marks = ",".join("?" * len(part))
+            by_barcode.update(c.execute(
+                f"SELECT barcode, id FROM medicines WHERE barcode IN ({marks})", part).fetchall())
+
+        names = list({n for n, *_ in items})
+        existing = set()
+        for i in range(0, len(names), 500):
+            part = names[i:i + 500]
+            marks = ",".join("?" * len(part))
+            existing.update(r[0] for r in c.execute(
+                f"SELECT name FROM medicines WHERE name IN ({marks})", part))
+
+        by_id, by_name = [], []
+        for name, price, category, reorder, barcode, stock in items:
+            if barcode and barcode in by_barcode:
+                by_id.append((price, category, reorder, by_barcode[barcode]))
+                counts["updated"] += 1
+                continue
+            by_name.append((name, price, int(stock or 0), category, int(reorder or 0), barcode,
+                            category, reorder, barcode))
+            if name in existing:
+                counts["updated"] += 1
+            else:
+                counts["inserted"] += 1
+                existing.add(name)
+
+        c.executemany("""
+            UPDATE medicines
+               SET unit_price=?, category=COALESCE(?, category), reorder_level=COALESCE(?, reorder_level)
+             WHERE id=?
+        """, by_id)
+        c.executemany("""
+            INSERT INTO medicines (name, unit_price, stock_qty, category, reorder_level, barcode, active)
+            VALUES (?, ?, ?, ?, ?, ?, 1)
+            ON CONFLICT(name) DO UPDATE SET
+                unit_price    = excluded.unit_price,
+                category      = COALESCE(?, category),
+                reorder_level = COALESCE(?, reorder_level),
+                barcode       = COALESCE(?, barcode)
+        """, by_name)
+
+        ids = [row[3] for row in by_id]
+        written = list({row[0] for row in by_name})
+        for i in range(0, len(written), 500):
+            part = written[i:i + 500]
+            marks = ",".join("?" * len(part))
+            ids += [r[0] for r in c.execute(f"SELECT id FROM medicines WHERE name IN ({marks})", part)]
+        conn.commit()
+    return ids
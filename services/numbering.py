@@ -0,0 +1,32 @@
+# services/numbering.py
+# Gap-free document numbers from a per-day counter row. The counter is bumped
+# inside the caller's transaction, so a rolled-back sale gives its number back
+# and two saves can never get the same number (the write lock serialises them).
+import os, sys, datetime
+ROOT = os.path.dirname(os.path.dirname(__file__))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+# Keep the date in the format: the counter restarts at 1 every day.
+# Fields: {date} (datetime), {seq} (int, 1-based per day)
+INVOICE_NO_FORMAT = "INV-{date:%Y%m%d}-{seq:04d}"
+
+
+def next_number(c, series: str, day: str) -> int:
+    """
+    Increment and return the counter for (series, day). `c` must be a cursor
+    inside an open write transaction (e.g. after BEGIN IMMEDIATE).
+    """
+    c.execute("""
+        INSERT INTO number_sequences (series, day, last_no) VALUES (?, ?, 1)
+        ON CONFLICT(series, day) DO UPDATE SET last_no = last_no + 1
+    """, (series, day))
+    return c.execute("SELECT last_no FROM number_sequences WHERE series=? AND day=?",
+                     (series, day)).fetchone()[0]
+
+
+def next_invoice_no(c, now=None, fmt=None):
+    """Next invoice number for `now`'s date, e.g. INV-20250817-0042."""
+    now = now or datetime.datetime.now()
+    seq = next_number(c, "invoice", now.strftime("%Y-%m-%d"))
+    return (fmt or INVOICE_NO_FORMAT).format(date=now, seq=seq)
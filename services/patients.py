@@ -1,12 +1,13 @@
 # services/patients.py
 # --- path fix so 'db.py' is importable even if you run from VS Code, etc. ---
-import os, sys
+import os, sys, sqlite3
 ROOT = os.path.dirname(os.path.dirname(__file__))  # parent folder (project root)
 if ROOT not in sys.path:
     sys.path.insert(0, ROOT)
 # ---------------------------------------------------------------------------
 
-from db import get_connection
+from db import get_connection, has_fts5, fts_match_expr, rows_of, Patient
+from services.instrumentation import timed
 
 def add_patient(name, age=None, gender=None, phone=None, address=None):
     name = (name or "").strip()
@@ -51,9 +52,10 @@ def deactivate_patient(pid):
         c.execute("UPDATE patients SET active=0 WHERE id=?", (int(pid),))
         conn.commit()
 
+@timed
 def list_patients(include_inactive=True):
     with get_connection() as conn:
-        c = conn.cursor()
+        c = rows_of(conn, Patient)
         if include_inactive:
             q = """SELECT id, name, age, gender, phone, address, active
                    FROM patients ORDER BY id DESC"""
@@ -62,13 +64,58 @@ def list_patients(include_inactive=True):
                    FROM patients WHERE active=1 ORDER BY id DESC"""
         return c.execute(q).fetchall()
 
-def search_patients(q):
-    q = f"%{(q or '').strip()}%"
+@timed
+def list_patients_page(after=None, limit=200, include_inactive=True):
+    """
+    One page of patients, newest first (keyset pagination on id).
+    after: the id of the last row of the previous page (None for the first page).
+    """
+    where = [] if include_inactive else ["active=1"]
+    params = []
+    if after is not None:
+        where.append("id < ?")
+        params.append(int(after))
+    sql = """SELECT id, name, age, gender, phone, address, active
+               FROM patients"""
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    sql += " ORDER BY id DESC LIMIT ?"
     with get_connection() as conn:
-        c = conn.cursor()
+        return rows_of(conn, Patient).execute(sql, params + [int(limit)]).fetchall()
+
+def count_patients(include_inactive=True):
+    with get_connection() as conn:
+        q = "SELECT COUNT(*) FROM patients" + ("" if include_inactive else " WHERE active=1")
+        return conn.execute(q).fetchone()[0]
+
+@timed
+def search_patients(q, limit=None):
+    """
+    Active patients whose name words start with the typed words, best matches first.
+    Uses the FTS5 index when available; if that finds nothing (or FTS5 is missing)
+    a LIKE scan matches the text anywhere in the name, as before FTS.
+    """
+    match = fts_match_expr(q) if has_fts5() else None
+    with get_connection() as conn:
+        c = rows_of(conn, Patient)
+        if match:
+            try:
+                rows = c.execute("""
+                    SELECT p.id, p.name, p.age, p.gender, p.phone, p.address, p.active
+                      FROM patients_fts f JOIN patients p ON p.id = f.rowid
+                     WHERE patients_fts MATCH ? AND p.active=1
+                     ORDER BY bm25(patients_fts), p.id DESC
+                     LIMIT ?
+                """, (match, limit or -1)).fetchall()
+                if rows:
+                    return rows
+            except sqlite3.OperationalError:
+                pass
+        # FTS only matches word starts: fall back to a substring match
         return c.execute("""
             SELECT id, name, age, gender, phone, address, active
               FROM patients
              WHERE active=1 AND name LIKE ?
              ORDER BY id DESC
-        """, (q,)).fetchall()
+             LIMIT ?
+        """, (f"%{(q or '').strip()}%", limit or -1)).fetchall()
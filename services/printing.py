@@ -1,11 +1,14 @@
 # services/printing.py
-import os, sys, platform, subprocess
+import os, sys, platform, subprocess, hashlib, html
+from string import Template
 
 ROOT = os.path.dirname(os.path.dirname(__file__))
 if ROOT not in sys.path:
     sys.path.insert(0, ROOT)
 
-from db import get_connection
+from db import get_connection, output_dir
+from services.dates import parse_day, day_start
+from services.instrumentation import timed
 
 # --- Your clinic details (kept as you provided) ---
 CLINIC_NAME  = "Bhatti Clinic"
@@ -14,56 +17,61 @@ CLINIC_PHONE = "0300-5497673"
 # ---------------------------------------------------
 
 # ---------- Internal helpers ----------
-def _fetch_invoice(invoice_id):
-    """Return (inv_header_tuple, rows_list) for the invoice."""
+# One joined query returns header + items together (one row per item; an
+# invoice without items still yields one row with NULL item columns).
+_INVOICE_SQL = """
+    SELECT i.id, i.invoice_no, i.created_at, i.doctor_fee, i.subtotal, i.total, i.total_items,
+           p.name, p.phone,
+           m.name, ii.qty, ii.unit_price, ii.line_total
+    FROM invoices i
+    LEFT JOIN patients p       ON p.id = i.patient_id
+    LEFT JOIN invoice_items ii ON ii.invoice_id = i.id
+    LEFT JOIN medicines m      ON m.id = ii.medicine_id
+    WHERE {where}
+    ORDER BY i.created_at, i.id, ii.id
+"""
+
+
+def _fetch_invoices(where, params):
+    """Return {invoice_id: (inv_header_tuple, rows_list)} in date order."""
+    out = {}
     with get_connection() as conn:
-        c = conn.cursor()
-        inv = c.execute("""
-            SELECT i.invoice_no, i.created_at, i.doctor_fee, i.subtotal, i.total, i.total_items,
-                   p.name, p.phone
-            FROM invoices i LEFT JOIN patients p ON p.id = i.patient_id
-            WHERE i.id = ?
-        """, (invoice_id,)).fetchone()
+        for r in conn.execute(_INVOICE_SQL.format(where=where), params):
+            inv_id = r[0]
+            if inv_id not in out:
+                out[inv_id] = (r[1:9], [])
+            if r[10] is not None:
+                out[inv_id][1].append(r[9:13])
+    return out
 
-        rows = c.execute("""
-            SELECT m.name, ii.qty, ii.unit_price, ii.line_total
-            FROM invoice_items ii JOIN medicines m ON m.id = ii.medicine_id
-            WHERE ii.invoice_id = ?
-        """, (invoice_id,)).fetchall()
 
-    if not inv:
+def _fetch_invoice(invoice_id):
+    """Return (inv_header_tuple, rows_list) for the invoice."""
+    found = _fetch_invoices("i.id = ?", (invoice_id,))
+    if not found:
         raise ValueError("Invoice not found.")
-    return inv, rows
+    return found[int(invoice_id)]
 
 def _ensure_invoice_dir():
-    out_dir = os.path.join(ROOT, "data", "invoices")
-    os.makedirs(out_dir, exist_ok=True)
-    return out_dir
+    return output_dir("invoices")
 # --------------------------------------
 
 
-def print_invoice_pdf(invoice_id):
-    """
-    Create an A4 PDF invoice.
-    Raises RuntimeError if ReportLab isn't installed.
-    Returns: pdf_path
-    """
+def _require_reportlab():
     try:
-        from reportlab.lib.pagesizes import A4
-        from reportlab.pdfgen import canvas
-        from reportlab.lib.units import mm
+        import reportlab  # noqa: F401
     except ModuleNotFoundError:
         raise RuntimeError(
             "ReportLab not installed. Activate your venv and run: python -m pip install reportlab"
         )
 
-    inv, rows = _fetch_invoice(invoice_id)
-    invoice_no, created_at, doctor_fee, subtotal, total, total_items, patient_name, patient_phone = inv
 
-    out_dir = _ensure_invoice_dir()
-    pdf_path = os.path.join(out_dir, f"{invoice_no}.pdf")
+def _draw_invoice_pdf(cpdf, inv, rows):
+    """Draw one invoice onto the canvas, starting on a fresh page (does not save)."""
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib.units import mm
 
-    cpdf = canvas.Canvas(pdf_path, pagesize=A4)
+    invoice_no, created_at, doctor_fee, subtotal, total, total_items, patient_name, patient_phone = inv
     w, h = A4
     y = h - 18*mm
 
@@ -114,7 +122,26 @@ def print_invoice_pdf(invoice_id):
 
     y -= 10*mm; cpdf.setFont("Helvetica", 9)
     cpdf.drawString(20*mm, y, f"Total quantity of medicines: {total_items}")
+    cpdf.showPage()
+
+
+@timed
+def print_invoice_pdf(invoice_id):
+    """
+    Create an A4 PDF invoice.
+    Raises RuntimeError if ReportLab isn't installed.
+    Returns: pdf_path
+    """
+    _require_reportlab()
+    from reportlab.lib.pagesizes import A4
+    from reportlab.pdfgen import canvas
 
+    inv, rows = _fetch_invoice(invoice_id)
+    out_dir = _ensure_invoice_dir()
+    pdf_path = os.path.join(out_dir, f"{inv[0]}.pdf")
+
+    cpdf = canvas.Canvas(pdf_path, pagesize=A4)
+    _draw_invoice_pdf(cpdf, inv, rows)
     cpdf.save()
     return pdf_path
 
@@ -137,52 +164,207 @@ def print_pdf_to_default_printer(pdf_path: str) -> bool:
         return False
 
 
-def print_invoice_html(invoice_id):
+# ---------- Batch PDF export ----------
+# Rendering is CPU-bound, so a date range is split into chunks that separate
+# processes draw. Workers never touch the database: everything they need is
+# fetched up front and handed over as plain tuples.
+PDF_CHUNK_SIZE = 25
+
+
+def _fetch_invoices_between(start, end):
+    """Headers and items of invoices with start <= created_at < end, in two queries."""
+    with get_connection() as conn:
+        headers = conn.execute("""
+            SELECT i.id, i.invoice_no, i.created_at, i.doctor_fee, i.subtotal, i.total, i.total_items,
+                   p.name, p.phone
+            FROM invoices i
+            LEFT JOIN patients p ON p.id = i.patient_id
+            WHERE i.created_at >= ? AND i.created_at < ?
+            ORDER BY i.created_at, i.id
+        """, (start, end)).fetchall()
+        items = {}
+        for inv_id, name, qty, unit_price, line_total in conn.execute("""
+            SELECT ii.invoice_id, m.name, ii.qty, ii.unit_price, ii.line_total
+            FROM invoices i
+            JOIN invoice_items ii ON ii.invoice_id = i.id
+            JOIN medicines m      ON m.id = ii.medicine_id
+            WHERE i.created_at >= ? AND i.created_at < ?
+            ORDER BY ii.invoice_id, ii.id
+        """, (start, end)):
+            items.setdefault(inv_id, []).append((name, qty, unit_price, line_total))
+    return [(h[0], h[1:], items.get(h[0], [])) for h in headers]
+
+
+def _render_pdf_chunk(out_dir, invoices, merged_name=None):
     """
-    Generate a simple, print-ready HTML invoice (no extra packages).
-    Returns: html_path
+    Worker entry point. Draws each invoice to <invoice_no>.pdf, or all of them
+    into one file when merged_name is given. Returns the number of invoices drawn.
     """
-    inv, rows = _fetch_invoice(invoice_id)
-    invoice_no, created_at, doctor_fee, subtotal, total, total_items, patient_name, patient_phone = inv
+    from reportlab.lib.pagesizes import A4
+    from reportlab.pdfgen import canvas
 
-    out_dir = _ensure_invoice_dir()
-    html_path = os.path.join(out_dir, f"{invoice_no}.html")
+    if merged_name:
+        cpdf = canvas.Canvas(os.path.join(out_dir, merged_name), pagesize=A4)
+        for _inv_id, inv, rows in invoices:
+            _draw_invoice_pdf(cpdf, inv, rows)
+        cpdf.save()
+    else:
+        for _inv_id, inv, rows in invoices:
+            cpdf = canvas.Canvas(os.path.join(out_dir, f"{inv[0]}.pdf"), pagesize=A4)
+            _draw_invoice_pdf(cpdf, inv, rows)
+            cpdf.save()
+    return len(invoices)
+
+
+def _merge_pdfs(paths, out_path):
+    """Concatenate PDFs with pypdf. Returns False if pypdf isn't installed."""
+    try:
+        from pypdf import PdfWriter
+    except ModuleNotFoundError:
+        return False
+    writer = PdfWriter()
+    for p in paths:
+        writer.append(p)
+    with open(out_path, "wb") as f:
+        writer.write(f)
+    writer.close()
+    return True
 
-    rows_html = "\n".join(
-        f"<tr><td>{name}</td><td class='r'>{qty}</td><td class='r'>{unit_price:.2f}</td><td class='r'>{line_total:.2f}</td></tr>"
-        for name, qty, unit_price, line_total in rows
-    )
 
-    html = f"""<!doctype html>
+@timed
+def export_invoices_pdf_between(from_date: str, to_date: str, output="files",
+                                workers=None, progress=None, cancel=None):
+    """
+    Render every invoice from from_date to to_date (inclusive, YYYY-MM-DD) as PDF.
+
+    output   : "files"  -> one PDF per invoice in data/invoices/batch_<from>_<to>/
+               "merged" -> a single multi-page PDF
+               "zip"    -> one PDF per invoice, packed into a .zip
+    workers  : number of processes (default: CPU count)
+    progress : progress(done, total), called from the calling thread
+    cancel   : object with is_set() (e.g. threading.Event); checked between chunks
+
+    Returns (path, count), or (None, done) if cancelled.
+    Raises RuntimeError if ReportLab isn't installed.
+    """
+    import shutil, zipfile
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+
+    _require_reportlab()
+    if output not in ("files", "merged", "zip"):
+        raise ValueError("output must be 'files', 'merged' or 'zip'.")
+    d1, d2 = parse_day(from_date), parse_day(to_date)
+    if d2 < d1:
+        raise ValueError("The 'to' date is before the 'from' date.")
+
+    invoices = _fetch_invoices_between(day_start(d1), day_start(d2, 1))
+    if not invoices:
+        raise ValueError("No invoices in this date range.")
+    total = len(invoices)
+
+    name = f"invoices_{d1:%Y%m%d}_{d2:%Y%m%d}"
+    out_dir = os.path.join(_ensure_invoice_dir(), f"batch_{d1:%Y%m%d}_{d2:%Y%m%d}")
+    work_dir = out_dir if output == "files" else out_dir + ".parts"
+    shutil.rmtree(work_dir, ignore_errors=True)
+    os.makedirs(work_dir)
+
+    chunks = [invoices[i:i + PDF_CHUNK_SIZE] for i in range(0, total, PDF_CHUNK_SIZE)]
+    merged = output == "merged"
+    # A single merged file can only be split across processes if pypdf can join the parts
+    if merged:
+        try:
+            import pypdf  # noqa: F401
+        except ModuleNotFoundError:
+            chunks = [invoices]
+    part_names = [f"part_{n:05d}.pdf" if merged else None for n in range(len(chunks))]
+
+    done = 0
+    cancelled = False
+    workers = max(1, min(workers or os.cpu_count() or 1, len(chunks)))
+    if progress:
+        progress(0, total)
+    if workers == 1:
+        # Not worth starting processes; render here, a chunk at a time
+        for chunk, part in zip(chunks, part_names):
+            if cancel is not None and cancel.is_set():
+                cancelled = True
+                break
+            done += _render_pdf_chunk(work_dir, chunk, part)
+            if progress:
+                progress(done, total)
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(_render_pdf_chunk, work_dir, chunk, part)
+                       for chunk, part in zip(chunks, part_names)]
+            for fut in as_completed(futures):
+                done += fut.result()
+                if progress:
+                    progress(done, total)
+                if cancel is not None and cancel.is_set():
+                    cancelled = True
+                    for f in futures:
+                        f.cancel()
+                    break
+
+    if cancelled:
+        shutil.rmtree(work_dir, ignore_errors=True)
+        return None, done
+
+    if output == "files":
+        return out_dir, total
+
+    try:
+        if merged:
+            path = os.path.join(_ensure_invoice_dir(), f"{name}.pdf")
+            parts = [os.path.join(work_dir, p) for p in part_names]
+            if len(parts) == 1:
+                os.replace(parts[0], path)
+            elif not _merge_pdfs(parts, path):
+                raise RuntimeError("pypdf not installed. Run: python -m pip install pypdf")
+        else:
+            path = os.path.join(_ensure_invoice_dir(), f"{name}.zip")
+            with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as zf:
+                for _inv_id, inv, _rows in invoices:
+                    zf.write(os.path.join(work_dir, f"{inv[0]}.pdf"), f"{inv[0]}.pdf")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    return path, total
+
+
+# ---------- HTML invoices ----------
+# Templates are parsed once at import. Invoices never change after saving, so a
+# rendered file stays valid until the template or clinic details change; the
+# first line of each file records the invoice id and a hash of those.
+_HTML_TEMPLATE = Template("""<!doctype html>
 <html>
 <head>
 <meta charset="utf-8"/>
-<title>Invoice {invoice_no}</title>
+<title>Invoice $invoice_no</title>
 <style>
-  body {{ font-family: Arial, sans-serif; margin: 20px; }}
-  .head {{ display:flex; justify-content:space-between; }}
-  .r {{ text-align:right; }}
-  table {{ width:100%; border-collapse: collapse; margin-top: 12px; }}
-  th, td {{ border:1px solid #999; padding:6px; }}
-  .totals {{ width:300px; float:right; margin-top:10px; }}
-  @media print {{ body {{ margin: 0.5in; }} }}
+  body { font-family: Arial, sans-serif; margin: 20px; }
+  .head { display:flex; justify-content:space-between; }
+  .r { text-align:right; }
+  table { width:100%; border-collapse: collapse; margin-top: 12px; }
+  th, td { border:1px solid #999; padding:6px; }
+  .totals { width:300px; float:right; margin-top:10px; }
+  @media print { body { margin: 0.5in; } }
 </style>
 </head>
 <body>
   <div class="head">
     <div>
-      <h2 style="margin:0;">{CLINIC_NAME}</h2>
-      <div>{CLINIC_ADDR}</div>
-      <div>Phone: {CLINIC_PHONE}</div>
+      <h2 style="margin:0;">$clinic_name</h2>
+      <div>$clinic_addr</div>
+      <div>Phone: $clinic_phone</div>
     </div>
     <div class="r">
-      <div><b>Invoice:</b> {invoice_no}</div>
-      <div><b>Date:</b> {created_at}</div>
+      <div><b>Invoice:</b> $invoice_no</div>
+      <div><b>Date:</b> $created_at</div>
     </div>
   </div>
 
   <div style="margin-top: 10px;">
-    <b>Patient:</b> {patient_name or 'Walk-in'} &nbsp; <b>Phone:</b> {patient_phone or '-'}
+    <b>Patient:</b> $patient_name &nbsp; <b>Phone:</b> $patient_phone
   </div>
 
   <table>
@@ -190,21 +372,101 @@ def print_invoice_html(invoice_id):
       <tr><th>Item</th><th class="r">Qty</th><th class="r">Unit</th><th class="r">Line Total</th></tr>
     </thead>
     <tbody>
-      {rows_html}
+      $rows_html
     </tbody>
   </table>
 
   <table class="totals">
-    <tr><td>Subtotal</td><td class="r">{subtotal:.2f}</td></tr>
-    <tr><td>Doctor Fee</td><td class="r">{doctor_fee:.2f}</td></tr>
-    <tr><th>Grand Total</th><th class="r">{total:.2f}</th></tr>
+    <tr><td>Subtotal</td><td class="r">$subtotal</td></tr>
+    <tr><td>Doctor Fee</td><td class="r">$doctor_fee</td></tr>
+    <tr><th>Grand Total</th><th class="r">$total</th></tr>
   </table>
 </body>
 </html>
-"""
-    with open(html_path, "w", encoding="utf-8") as f:
-        f.write(html)
-    return html_path
+""")
+_ROW_TEMPLATE = Template(
+    "<tr><td>$name</td><td class='r'>$qty</td><td class='r'>$unit_price</td><td class='r'>$line_total</td></tr>"
+)
+_TEMPLATE_KEY = hashlib.sha1("\0".join(
+    (_HTML_TEMPLATE.template, _ROW_TEMPLATE.template, CLINIC_NAME, CLINIC_ADDR, CLINIC_PHONE)
+).encode("utf-8")).hexdigest()[:12]
+
+
+def _cache_marker(invoice_id, inv, rows):
+    """
+    First line of a rendered invoice: the invoice id plus a hash of everything
+    the page shows (header, patient, item rows) and of the templates. A renamed
+    patient or a different invoice reusing the file name no longer matches.
+    """
+    content = hashlib.sha1(repr((_TEMPLATE_KEY, tuple(inv), [tuple(r) for r in rows]))
+                           .encode("utf-8")).hexdigest()[:16]
+    return f"<!-- invoice:{invoice_id} content:{content} -->\n"
+
+
+def _is_cached(path, marker):
+    try:
+        with open(path, encoding="utf-8") as f:
+            return f.readline() == marker
+    except OSError:
+        return False
+
+
+def _render_html(inv, rows):
+    invoice_no, created_at, doctor_fee, subtotal, total, total_items, patient_name, patient_phone = inv
+    esc = html.escape
+    rows_html = "\n".join(
+        _ROW_TEMPLATE.substitute(name=esc(str(name)), qty=qty,
+                                 unit_price=f"{unit_price:.2f}", line_total=f"{line_total:.2f}")
+        for name, qty, unit_price, line_total in rows
+    )
+    return _HTML_TEMPLATE.substitute(
+        invoice_no=esc(invoice_no), created_at=esc(str(created_at)),
+        clinic_name=esc(CLINIC_NAME), clinic_addr=esc(CLINIC_ADDR), clinic_phone=esc(CLINIC_PHONE),
+        patient_name=esc(patient_name or "Walk-in"), patient_phone=esc(patient_phone or "-"),
+        rows_html=rows_html,
+        subtotal=f"{subtotal:.2f}", doctor_fee=f"{doctor_fee:.2f}", total=f"{total:.2f}",
+    )
+
+
+def _write_html(out_dir, invoice_id, inv, rows):
+    path = os.path.join(out_dir, f"{inv[0]}.html")
+    marker = _cache_marker(invoice_id, inv, rows)
+    if not _is_cached(path, marker):
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(marker)
+            f.write(_render_html(inv, rows))
+    return path
+
+
+@timed
+def print_invoice_html(invoice_id):
+    """
+    Generate a simple, print-ready HTML invoice (no extra packages).
+    Skips rendering and writing when the file on disk was made from the same
+    data (see _cache_marker). Returns: html_path
+    """
+    inv, rows = _fetch_invoice(invoice_id)
+    return _write_html(_ensure_invoice_dir(), invoice_id, inv, rows)
+
+
+@timed
+def print_invoices_html_for_date(date_str: str):
+    """
+    Render every invoice of a local date (YYYY-MM-DD) in one pass
+    (one query, cached files are left alone). Returns [html_path, ...] in time order.
+    """
+    found = _fetch_invoices("i.created_at >= ? AND i.created_at < ?",
+                            (day_start(date_str), day_start(date_str, 1)))
+    out_dir = _ensure_invoice_dir()
+    return [_write_html(out_dir, inv_id, inv, rows) for inv_id, (inv, rows) in found.items()]
+
+
+@timed
+def print_invoices_html_for_patient(patient_id: int):
+    """Render every invoice of a patient in one pass. Returns [html_path, ...] oldest first."""
+    found = _fetch_invoices("i.patient_id = ?", (int(patient_id),))
+    out_dir = _ensure_invoice_dir()
+    return [_write_html(out_dir, inv_id, inv, rows) for inv_id, (inv, rows) in found.items()]
 
 
 def open_file(path: str):
@@ -0,0 +1,146 @@
+# services/reorder.py
+# Reorder suggestions from sales history instead of the typed-in reorder_level:
+# per-medicine daily sales velocity and variability over the last year,
+# turned into a reorder point (lead-time demand + safety stock) and an order
+# quantity, written out as a purchase-order CSV.
+#
+# One aggregated query returns the daily sums per medicine; the maths runs
+# on NumPy arrays for the whole catalog at once.
+#
+#   python -m services.reorder [AS_OF_DAY]
+import os, sys, csv, datetime
+ROOT = os.path.dirname(os.path.dirname(__file__))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from db import get_connection, output_dir
+from services.dates import parse_day, day_start
+from services.instrumentation import timed
+
+HISTORY_DAYS = 365    # sales history used for velocity/variability
+LEAD_DAYS    = 7      # days between placing an order and the stock arriving
+COVER_DAYS   = 14     # days of sales each order should cover after it arrives
+SERVICE_Z    = 1.65   # safety-stock factor (~95% chance of not running out during lead time)
+
+
+def _require_numpy():
+    try:
+        import numpy  # noqa: F401
+    except Exception:
+        raise RuntimeError(
+            "NumPy not installed. Activate your venv and run: python -m pip install numpy"
+        )
+
+
+@timed
+def suggest_reorders(as_of=None, history_days=HISTORY_DAYS, lead_days=LEAD_DAYS,
+                     cover_days=COVER_DAYS, z=SERVICE_Z):
+    """
+    Reorder suggestions for every active medicine, from its 'sale' moves in the
+    history_days days up to and including as_of (a date, default today).
+    Days without sales count as zero demand.
+
+      reorder point = avg daily * lead_days + z * daily std dev * sqrt(lead_days)
+      order qty     = avg daily * (lead_days + cover_days) + safety stock - stock,
+                      only for medicines at or below their reorder point
+
+    Returns rows (medicine_id, name, category, barcode, stock_qty, reorder_level,
+    avg_daily, std_daily, days_left, reorder_point, order_qty, unit_price) for the
+    medicines that need ordering, the ones that run out soonest first.
+    """
+    _require_numpy()
+    import numpy as np
+
+    if history_days < 2:
+        raise ValueError("History must cover at least 2 days.")
+    end = (as_of or datetime.date.today()) + datetime.timedelta(days=1)
+    start = end - datetime.timedelta(days=history_days)
+
+    with get_connection() as conn:
+        meds = conn.execute("""
+            SELECT id, name, category, barcode, stock_qty, reorder_level, unit_price
+            FROM medicines WHERE active=1 ORDER BY id
+        """).fetchall()
+        # Daily sums per medicine, folded to sum and sum of squares. The date
+        # range is one scan of idx_moves_sales (sale moves only, covers qty).
+        sales = conn.execute("""
+            SELECT medicine_id, SUM(q), SUM(q * q)
+            FROM (SELECT medicine_id, substr(created_at, 1, 10) AS day, -SUM(change_qty) AS q
+                  FROM inventory_moves
+                  WHERE reason = 'sale' AND created_at >= ? AND created_at < ?
+                  GROUP BY medicine_id, day)
+            GROUP BY medicine_id
+        """, (day_start(start), day_start(end))).fetchall()
+    if not meds:
+        return []
+
+    ids = np.fromiter((m[0] for m in meds), dtype=np.int64, count=len(meds))
+    stock = np.fromiter((m[4] or 0 for m in meds), dtype=np.float64, count=len(meds))
+    total = np.zeros(len(meds))
+    total_sq = np.zeros(len(meds))
+    if sales:
+        s_ids, s_total, s_sq = (np.array(col, dtype=np.float64) for col in zip(*sales))
+        pos = np.searchsorted(ids, s_ids)
+        pos = np.minimum(pos, len(ids) - 1)
+        known = ids[pos] == s_ids                  # drop sales of inactive medicines
+        total[pos[known]] = s_total[known]
+        total_sq[pos[known]] = s_sq[known]
+
+    n = float(history_days)
+    avg = total / n
+    std = np.sqrt(np.maximum(total_sq - n * avg ** 2, 0) / (n - 1))
+    safety = z * std * np.sqrt(lead_days)
+    reorder_point = np.ceil(avg * lead_days + safety)
+    target = np.ceil(avg * (lead_days + cover_days) + safety)
+    need = (avg > 0) & (stock <= reorder_point)
+    order_qty = np.where(need, np.maximum(target - stock, 0), 0)
+    with np.errstate(divide="ignore"):
+        days_left = np.where(avg > 0, stock / np.where(avg > 0, avg, 1), np.inf)
+
+    picked = np.flatnonzero(order_qty > 0)
+    picked = picked[np.argsort(days_left[picked], kind="stable")]
+    return [
+        (m[0], m[1], m[2], m[3], m[4], m[5],
+         round(float(avg[i]), 2), round(float(std[i]), 2), round(float(days_left[i]), 1),
+         int(reorder_point[i]), int(order_qty[i]), m[6])
+        for i, m in ((i, meds[i]) for i in picked)
+    ]
+
+
+@timed
+def export_purchase_order_csv(date_str=None, **kwargs):
+    """
+    Write suggest_reorders() to data/reports/purchase_order_YYYYMMDD.csv.
+    date_str: YYYY-MM-DD to plan as of (default today); kwargs go to suggest_reorders.
+    Returns (path, totals_dict) with lines, units and value (at sale price).
+    """
+    as_of = parse_day(date_str) if date_str else datetime.date.today()
+    rows = suggest_reorders(as_of, **kwargs)
+
+    out_dir = output_dir("reports")
+    out_path = os.path.join(out_dir, f"purchase_order_{as_of.strftime('%Y%m%d')}.csv")
+
+    totals = {"lines": 0, "units": 0, "value": 0.0}
+    with open(out_path, "w", newline="", encoding="utf-8") as f:
+        w = csv.writer(f)
+        w.writerow(["ID", "Medicine", "Category", "Barcode", "Stock", "Current Reorder Level",
+                    "Avg Daily Sales", "Daily Std Dev", "Days Left", "Suggested Reorder Point",
+                    "Order Qty", "Unit Price", "Line Value"])
+        for r in rows:
+            value = round(r[10] * float(r[11] or 0), 2)
+            w.writerow(list(r) + [f"{value:.2f}"])
+            totals["lines"] += 1
+            totals["units"] += r[10]
+            totals["value"] += value
+    totals["value"] = round(totals["value"], 2)
+    return out_path, totals
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 2:
+        print("usage: python -m services.reorder [AS_OF_DAY]")
+        sys.exit(2)
+    from db import init_db
+    init_db()
+    path, t = export_purchase_order_csv(sys.argv[1] if len(sys.argv) == 2 else None)
+    print(f"{t['lines']} line(s), {t['units']} unit(s), value {t['value']:.2f}: {path}")
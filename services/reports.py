@@ -5,25 +5,67 @@ ROOT = os.path.dirname(os.path.dirname(__file__))
 if ROOT not in sys.path:
     sys.path.insert(0, ROOT)
 
-from db import get_connection
+from db import get_connection, output_dir
+from services.dates import parse_day, day_start
+from services.instrumentation import timed
+from services.ledger import stock_on_all
+
 
 def export_sales_csv_for_date(date_str: str):
     """
     Export all invoices for the given local date (YYYY-MM-DD) to data/reports/sales_YYYYMMDD.csv.
     Returns (path, totals_dict).
     """
-    try:
-        day = datetime.datetime.strptime(date_str, "%Y-%m-%d").date()
-    except Exception:
-        raise ValueError("Date must be in YYYY-MM-DD format.")
+    day = parse_day(date_str)
+    return export_sales_csv_for_range(day, day + datetime.timedelta(days=1),
+                                      f"sales_{day.strftime('%Y%m%d')}.csv")
+
+
+def export_sales_csv_for_month(year: int, month: int):
+    """Export one calendar month to data/reports/sales_YYYYMM.csv. Returns (path, totals_dict)."""
+    start = datetime.date(int(year), int(month), 1)
+    end = datetime.date(start.year + (start.month == 12), start.month % 12 + 1, 1)
+    return export_sales_csv_for_range(start, end, f"sales_{start.strftime('%Y%m')}.csv")
+
 
-    out_dir = os.path.join(ROOT, "data", "reports")
-    os.makedirs(out_dir, exist_ok=True)
-    out_path = os.path.join(out_dir, f"sales_{day.strftime('%Y%m%d')}.csv")
+def export_sales_csv_for_year(year: int):
+    """Export one calendar year to data/reports/sales_YYYY.csv. Returns (path, totals_dict)."""
+    start = datetime.date(int(year), 1, 1)
+    return export_sales_csv_for_range(start, datetime.date(start.year + 1, 1, 1),
+                                      f"sales_{start.year}.csv")
+
+
+def export_sales_csv_between(from_str: str, to_str: str):
+    """
+    Export invoices from one local date to another, both inclusive (YYYY-MM-DD),
+    to data/reports/sales_YYYYMMDD_YYYYMMDD.csv. Returns (path, totals_dict).
+    """
+    start, last = parse_day(from_str), parse_day(to_str)
+    if last < start:
+        raise ValueError("'To' date is before 'From' date.")
+    return export_sales_csv_for_range(
+        start, last + datetime.timedelta(days=1),
+        f"sales_{start.strftime('%Y%m%d')}_{last.strftime('%Y%m%d')}.csv")
 
-    with get_connection() as conn:
-        c = conn.cursor()
-        rows = c.execute("""
+
+@timed
+def export_sales_csv_for_range(start: datetime.date, end: datetime.date, filename: str):
+    """
+    Export invoices with start <= created_at < end (half-open, so the
+    idx_invoices_created_at range scan serves it). Rows are streamed from the
+    cursor into the CSV while the totals are accumulated.
+    Returns (path, totals_dict).
+    """
+    out_dir = output_dir("reports")
+    out_path = os.path.join(out_dir, filename)
+
+    totals = {"count": 0, "items": 0, "subtotal": 0.0, "doctor_fee": 0.0, "grand_total": 0.0}
+
+    with get_connection() as conn, open(out_path, "w", newline="", encoding="utf-8") as f:
+        w = csv.writer(f)
+        w.writerow(["Invoice No","Datetime","Patient","Items Qty","Subtotal","Doctor Fee","Grand Total"])
+
+        cur = conn.execute("""
             SELECT i.invoice_no,
                    i.created_at,
                    IFNULL(p.name, 'Walk-in') AS patient_name,
@@ -33,23 +75,17 @@ def export_sales_csv_for_date(date_str: str):
                    i.total
             FROM invoices i
             LEFT JOIN patients p ON p.id = i.patient_id
-            WHERE DATE(i.created_at) = DATE(?)
-            ORDER BY datetime(i.created_at) ASC
-        """, (day.isoformat(),)).fetchall()
-
-    totals = {
-        "count": len(rows),
-        "items": sum(int(r[3]) for r in rows),
-        "subtotal": sum(float(r[4]) for r in rows),
-        "doctor_fee": sum(float(r[5]) for r in rows),
-        "grand_total": sum(float(r[6]) for r in rows),
-    }
-
-    with open(out_path, "w", newline="", encoding="utf-8") as f:
-        w = csv.writer(f)
-        w.writerow(["Invoice No","Datetime","Patient","Items Qty","Subtotal","Doctor Fee","Grand Total"])
-        for r in rows:
+            WHERE i.created_at >= ? AND i.created_at < ?
+            ORDER BY i.created_at ASC
+        """, (day_start(start), day_start(end)))
+        for r in cur:
             w.writerow(r)
+            totals["count"] += 1
+            totals["items"] += int(r[3])
+            totals["subtotal"] += float(r[4])
+            totals["doctor_fee"] += float(r[5])
+            totals["grand_total"] += float(r[6])
+
         w.writerow([])
         w.writerow(["Invoices", totals["count"]])
         w.writerow(["Total items", totals["items"]])
@@ -58,3 +94,21 @@ def export_sales_csv_for_date(date_str: str):
         w.writerow(["Grand Total", f"{totals['grand_total']:.2f}"])
 
     return out_path, totals
+
+
+@timed
+def export_stock_on_date_csv(date_str: str):
+    """
+    Stock audit: closing stock of every medicine on a date, next to today's stock,
+    to data/reports/stock_YYYYMMDD.csv. Returns (path, row_count).
+    """
+    day = parse_day(date_str)
+    out_dir = output_dir("reports")
+    out_path = os.path.join(out_dir, f"stock_{day.strftime('%Y%m%d')}.csv")
+
+    rows = stock_on_all(day)
+    with open(out_path, "w", newline="", encoding="utf-8") as f:
+        w = csv.writer(f)
+        w.writerow(["ID", "Medicine", f"Stock on {day.isoformat()}", "Stock now"])
+        w.writerows(rows)
+    return out_path, len(rows)
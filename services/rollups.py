@@ -0,0 +1,119 @@
+# services/rollups.py
+# Per-day sales totals kept up to date by save_invoice, so period summaries
+# read one row per day instead of every invoice.
+#
+#   python -m services.rollups rebuild                   # backfill everything
+#   python -m services.rollups rebuild 2025-01-01 2025-12-31
+import os, sys, datetime
+ROOT = os.path.dirname(os.path.dirname(__file__))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from db import get_connection
+from services.instrumentation import timed
+
+
+def apply_invoice(c, day, subtotal, doctor_fee, total, total_items, lines):
+    """
+    Add one saved invoice to the rollups. Call inside the save transaction.
+    day: 'YYYY-MM-DD'; lines: iterable of (medicine_id, qty, line_total).
+    """
+    c.execute("""
+        INSERT INTO daily_sales (day, invoices, items, subtotal, doctor_fee, total)
+        VALUES (?, 1, ?, ?, ?, ?)
+        ON CONFLICT(day) DO UPDATE SET
+            invoices   = invoices + 1,
+            items      = items + excluded.items,
+            subtotal   = subtotal + excluded.subtotal,
+            doctor_fee = doctor_fee + excluded.doctor_fee,
+            total      = total + excluded.total
+    """, (day, total_items, subtotal, doctor_fee, total))
+
+    per_med = {}
+    for mid, qty, line_total in lines:
+        q, r = per_med.get(mid, (0, 0.0))
+        per_med[mid] = (q + qty, r + line_total)
+    c.executemany("""
+        INSERT INTO daily_sales_items (day, medicine_id, qty, revenue)
+        VALUES (?, ?, ?, ?)
+        ON CONFLICT(day, medicine_id) DO UPDATE SET
+            qty     = qty + excluded.qty,
+            revenue = revenue + excluded.revenue
+    """, [(day, mid, q, r) for mid, (q, r) in per_med.items()])
+
+
+@timed
+def rebuild(from_day=None, to_day=None):
+    """
+    Recompute the rollups from raw invoices for from_day..to_day (inclusive,
+    YYYY-MM-DD; None = no bound). Returns the number of days written.
+    """
+    lo = f"{from_day} 00:00:00" if from_day else ""
+    hi = (f"{(datetime.date.fromisoformat(to_day) + datetime.timedelta(days=1)).isoformat()} 00:00:00"
+          if to_day else "9999")
+    day_lo = from_day or ""
+    day_hi = to_day or "9999"
+
+    with get_connection() as conn:
+        c = conn.cursor()
+        c.execute("BEGIN IMMEDIATE")
+        c.execute("DELETE FROM daily_sales WHERE day >= ? AND day <= ?", (day_lo, day_hi))
+        c.execute("DELETE FROM daily_sales_items WHERE day >= ? AND day <= ?", (day_lo, day_hi))
+        c.execute("""
+            INSERT INTO daily_sales (day, invoices, items, subtotal, doctor_fee, total)
+            SELECT substr(created_at, 1, 10), COUNT(*), SUM(total_items),
+                   SUM(subtotal), SUM(doctor_fee), SUM(total)
+            FROM invoices
+            WHERE created_at >= ? AND created_at < ?
+            GROUP BY substr(created_at, 1, 10)
+        """, (lo, hi))
+        days = c.rowcount
+        c.execute("""
+            INSERT INTO daily_sales_items (day, medicine_id, qty, revenue)
+            SELECT substr(i.created_at, 1, 10), ii.medicine_id, SUM(ii.qty), SUM(ii.line_total)
+            FROM invoices i JOIN invoice_items ii ON ii.invoice_id = i.id
+            WHERE i.created_at >= ? AND i.created_at < ?
+            GROUP BY substr(i.created_at, 1, 10), ii.medicine_id
+        """, (lo, hi))
+        conn.commit()
+    return days
+
+
+@timed
+def period_summary(from_day, to_day, top=10):
+    """
+    Totals for from_day..to_day (inclusive, YYYY-MM-DD) read from the rollups.
+    Returns {"days", "count", "items", "subtotal", "doctor_fee", "grand_total",
+             "top_medicines": [(medicine_id, name, qty, revenue), ...]}
+    """
+    with get_connection() as conn:
+        c = conn.cursor()
+        days, count, items, subtotal, doctor_fee, total = c.execute("""
+            SELECT COUNT(*), IFNULL(SUM(invoices), 0), IFNULL(SUM(items), 0),
+                   IFNULL(SUM(subtotal), 0), IFNULL(SUM(doctor_fee), 0), IFNULL(SUM(total), 0)
+            FROM daily_sales WHERE day >= ? AND day <= ?
+        """, (from_day, to_day)).fetchone()
+        top_rows = c.execute("""
+            SELECT d.medicine_id, m.name, SUM(d.qty) AS qty, SUM(d.revenue) AS revenue
+            FROM daily_sales_items d JOIN medicines m ON m.id = d.medicine_id
+            WHERE d.day >= ? AND d.day <= ?
+            GROUP BY d.medicine_id
+            ORDER BY revenue DESC
+            LIMIT ?
+        """, (from_day, to_day, int(top))).fetchall()
+    return {
+        "days": days, "count": count, "items": items,
+        "subtotal": round(subtotal, 2), "doctor_fee": round(doctor_fee, 2),
+        "grand_total": round(total, 2), "top_medicines": top_rows,
+    }
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    if not args or args[0] != "rebuild" or len(args) not in (1, 3):
+        print("usage: python -m services.rollups rebuild [FROM_DAY TO_DAY]")
+        sys.exit(2)
+    from db import init_db
+    init_db()
+    n = rebuild(*args[1:]) if len(args) == 3 else rebuild()
+    print(f"Rebuilt {n} day(s) of sales rollups.")
@@ -0,0 +1,100 @@
+# tests/test_app_smoke.py
+# Builds the main window with tkinter replaced by inert stubs, so a broken
+# main() (e.g. a menu command referring to a name defined later) fails here
+# instead of on the clinic's machine. Needs no display.
+import os, sys, tempfile, importlib, unittest
+from unittest import mock
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+
+class _Stub:
+    """Stands in for any Tk widget, variable, module attribute or return value."""
+
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def __getattr__(self, name):
+        if name.startswith("__"):
+            raise AttributeError(name)
+        return _Stub()
+
+    def __call__(self, *args, **kwargs):
+        return _Stub()
+
+    def __iter__(self):
+        return iter(())
+
+    def __index__(self):
+        return 0
+
+    __int__ = __index__
+
+    def __float__(self):
+        return 0.0
+
+    def __str__(self):
+        return ""
+
+    def __format__(self, spec):
+        return format(0, spec)
+
+
+class _Module(_Stub):
+    """A stub module whose attributes are classes, so `class X(ttk.Frame)` works."""
+
+    def __getattr__(self, name):
+        if name.startswith("__"):
+            raise AttributeError(name)
+        return _Stub
+
+
+class _Menu(_Stub):
+    labels = []
+
+    def add_command(self, label=None, command=None, **kwargs):
+        _Menu.labels.append(label)
+        assert callable(command), label
+
+
+class AppSmokeTest(unittest.TestCase):
+    def setUp(self):
+        tk = _Module()
+        tk.Menu = _Menu
+        tk.END = "end"
+        tk.ttk, tk.messagebox, tk.simpledialog, tk.filedialog = (_Module() for _ in range(4))
+        self.modules = mock.patch.dict(sys.modules, {
+            "tkinter": tk, "tkinter.ttk": tk.ttk, "tkinter.messagebox": tk.messagebox,
+            "tkinter.simpledialog": tk.simpledialog, "tkinter.filedialog": tk.filedialog,
+        })
+        self.modules.start()
+        # Modules that did `import tkinter` earlier must see the stubs too
+        for name in [m for m in sys.modules if m == "app" or m.startswith("ui.") or m == "ui"]:
+            del sys.modules[name]
+
+        import db
+        self.tmp = tempfile.TemporaryDirectory()
+        self.old_path = db.DB_PATH
+        db.DB_PATH = os.path.join(self.tmp.name, "clinic.db")
+
+    def tearDown(self):
+        import db
+        db.close_connection()
+        db.DB_PATH = self.old_path
+        self.modules.stop()
+        for name in [m for m in sys.modules if m == "app" or m.startswith("ui.") or m == "ui"]:
+            del sys.modules[name]
+        self.tmp.cleanup()
+
+    def test_main_builds_window_and_menu(self):
+        _Menu.labels = []
+        app = importlib.import_module("app")
+        app.main()                    # mainloop() is a stub, so this returns
+        self.assertIn("Diagnostics", _Menu.labels)
+        self.assertIn("Background Jobs", _Menu.labels)
+
+
+if __name__ == "__main__":
+    unittest.main()
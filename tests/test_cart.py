@@ -0,0 +1,82 @@
+# tests/test_cart.py
+# Sale cart: merging repeated medicines and exact cent totals over many edits.
+import os, sys, random, unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from services.cart import Cart
+from services.invoices import compute_totals
+
+
+class CartTest(unittest.TestCase):
+    def test_repeated_medicine_is_merged_into_one_line(self):
+        cart = Cart()
+        line, merged = cart.add(7, "Paracetamol", 2, 1.25)
+        self.assertFalse(merged)
+        again, merged = cart.add("7", "Paracetamol", 3, 1.25)
+        self.assertTrue(merged)
+        self.assertIs(again, line)
+        self.assertEqual(len(cart), 1)
+        self.assertEqual(list(cart), [{"medicine_id": 7, "name": "Paracetamol", "qty": 5, "unit_price": 1.25}])
+        self.assertEqual((cart.subtotal, cart.total_items, cart.line_total(7)), (6.25, 5, 6.25))
+
+    def test_lines_keep_the_order_first_added(self):
+        cart = Cart()
+        for mid in (3, 1, 2):
+            cart.add(mid, f"Med {mid}", 1, 1)
+        cart.add(3, "Med 3", 1, 1)
+        self.assertEqual([line["medicine_id"] for line in cart], [3, 1, 2])
+
+    def test_cents_do_not_drift(self):
+        cart = Cart()
+        for _ in range(1000):
+            cart.add(1, "Cotton", 1, 0.1)
+        cart.add(2, "Syringe", 3, 0.2)
+        self.assertEqual(cart.subtotal, 100.6)
+        self.assertEqual(cart.totals(0.3), (100.6, 100.9, 1003))
+
+    def test_set_qty_remove_and_clear(self):
+        cart = Cart()
+        cart.add(1, "A", 4, 2.5)
+        cart.add(2, "B", 1, 9.99)
+        cart.set_qty(1, 2)
+        self.assertEqual((cart.subtotal, cart.total_items), (14.99, 3))
+        self.assertEqual(cart.remove(2)["name"], "B")
+        self.assertIsNone(cart.remove(2))
+        self.assertNotIn(2, cart)
+        self.assertEqual((cart.subtotal, cart.total_items), (5.0, 2))
+        cart.clear()
+        self.assertEqual((len(cart), cart.subtotal, cart.total_items), (0, 0, 0))
+
+    def test_bad_quantities_are_refused(self):
+        cart = Cart()
+        with self.assertRaises(ValueError):
+            cart.add(1, "A", 0, 1)
+        cart.add(1, "A", 1, 1)
+        with self.assertRaises(ValueError):
+            cart.set_qty(1, -1)
+        with self.assertRaises(ValueError):
+            cart.set_qty(99, 1)
+        self.assertEqual(cart.total_items, 1)
+
+    def test_totals_match_compute_totals_after_random_edits(self):
+        rng = random.Random(21)
+        cart = Cart()
+        prices = {mid: rng.randrange(1, 5000) / 100 for mid in range(1, 30)}
+        for _ in range(2000):
+            mid = rng.randrange(1, 30)
+            action = rng.random()
+            if action < 0.6:
+                cart.add(mid, f"Med {mid}", rng.randrange(1, 5), prices[mid])
+            elif action < 0.8 and mid in cart:
+                cart.set_qty(mid, rng.randrange(1, 10))
+            else:
+                cart.remove(mid)
+            fee = rng.choice([0, 150, 99.99])
+            self.assertEqual(cart.totals(fee), compute_totals(list(cart), fee))
+
+
+if __name__ == "__main__":
+    unittest.main()
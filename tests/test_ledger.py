@@ -0,0 +1,94 @@
+# tests/test_ledger.py
+# Point-in-time stock from checkpoints + moves must equal summing every move
+# from the beginning, with and without checkpoints and between them.
+import os, sys, random, datetime, tempfile, unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+import db
+from services import ledger
+
+START = datetime.datetime(2025, 1, 1, 9, 0, 0)
+DAYS = 120                            # Jan..Apr, so three month boundaries
+
+
+class StockLedgerTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.old = db.DB_PATH
+        db.DB_PATH = os.path.join(self.tmp.name, "clinic.db")
+        db.init_db()
+        self.moves = self._make_history()
+
+    def tearDown(self):
+        db.close_connection()
+        db.DB_PATH = self.old
+        self.tmp.cleanup()
+
+    def _make_history(self):
+        """Three medicines with random moves; stock_qty ends as the sum of them."""
+        rng = random.Random(13)
+        moves = []                    # (medicine_id, change_qty, created_at)
+        for mid in (1, 2, 3):
+            moves.append((mid, 500, START))
+            quiet = mid == 3          # no moves in February: no checkpoint that month
+            for day in range(1, DAYS):
+                when = START + datetime.timedelta(days=day, minutes=rng.randrange(600))
+                if quiet and when.month == 2:
+                    continue
+                if rng.random() < 0.6:
+                    moves.append((mid, rng.choice([-3, -2, -1, -1, 5, 10]), when))
+        with db.get_connection() as conn:
+            c = conn.cursor()
+            for mid in (1, 2, 3):
+                c.execute("INSERT INTO medicines (id, name, unit_price, stock_qty) VALUES (?, ?, 1, ?)",
+                          (mid, f"Med {mid}", sum(q for m, q, _ in moves if m == mid)))
+            c.executemany("""
+                INSERT INTO inventory_moves (medicine_id, change_qty, reason, created_at)
+                VALUES (?, ?, 'adjustment', ?)
+            """, [(m, q, w.strftime("%Y-%m-%d %H:%M:%S")) for m, q, w in moves])
+            conn.commit()
+        return moves
+
+    def _recount(self, mid, day):
+        end = datetime.datetime(day.year, day.month, day.day) + datetime.timedelta(days=1)
+        return sum(q for m, q, w in self.moves if m == mid and w < end)
+
+    def _days(self):
+        return [(START + datetime.timedelta(days=d)).date() for d in range(0, DAYS + 3, 3)]
+
+    def _check_all_days(self):
+        for day in self._days():
+            expected = {mid: self._recount(mid, day) for mid in (1, 2, 3)}
+            for mid in (1, 2, 3):
+                self.assertEqual(ledger.stock_on(mid, day.isoformat()), expected[mid], (mid, day))
+            on_all = {r[0]: r[2] for r in ledger.stock_on_all(day.isoformat())}
+            self.assertEqual(on_all, expected, day)
+
+    def test_without_checkpoints(self):
+        self._check_all_days()
+
+    def test_with_checkpoints(self):
+        self.assertGreater(ledger.create_checkpoints(now=datetime.datetime(2025, 4, 15)), 0)
+        self._check_all_days()
+
+    def test_checkpoints_written_on_time_each_month(self):
+        for month in (2, 3, 4):
+            ledger.create_checkpoints(now=datetime.datetime(2025, month, 1, 8))
+        self.assertEqual(ledger.create_checkpoints(now=datetime.datetime(2025, 4, 20)), 0)
+        self._check_all_days()
+
+    def test_movement_between(self):
+        ledger.create_checkpoints(now=datetime.datetime(2025, 3, 10))
+        lo, hi = datetime.date(2025, 1, 20), datetime.date(2025, 3, 25)
+        for mid in (1, 2, 3):
+            got = ledger.movement_between(mid, lo.isoformat(), hi.isoformat())
+            opening = self._recount(mid, lo - datetime.timedelta(days=1))
+            closing = self._recount(mid, hi)
+            self.assertEqual(got, {"opening": opening, "closing": closing, "net": closing - opening})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,79 @@
+# tests/test_medicines_import.py
+# Catalog import: rejected rows, and the same result whatever the chunk size.
+import os, sys, csv, tempfile, unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+import db
+from services import medicines, catalog
+
+
+class ImportCatalogTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.old = db.DB_PATH, db.OUTPUT_DIR
+        db.DB_PATH = os.path.join(self.tmp.name, "clinic.db")
+        db.OUTPUT_DIR = self.tmp.name
+        db.init_db()
+        catalog.invalidate_all()
+
+    def tearDown(self):
+        db.close_connection()
+        db.DB_PATH, db.OUTPUT_DIR = self.old
+        catalog.invalidate_all()
+        self.tmp.cleanup()
+
+    def _csv(self, rows):
+        path = os.path.join(self.tmp.name, "catalog.csv")
+        with open(path, "w", newline="", encoding="utf-8") as f:
+            w = csv.writer(f)
+            w.writerow(["name", "price", "barcode", "reorder_level", "stock"])
+            w.writerows(rows)
+        return path
+
+    def _rejects(self, result):
+        if not result["reject_path"]:
+            return []
+        with open(result["reject_path"], newline="", encoding="utf-8") as f:
+            return list(csv.DictReader(f))
+
+    def _medicines(self):
+        with db.get_connection() as conn:
+            return conn.execute(
+                "SELECT name, unit_price, barcode FROM medicines ORDER BY name").fetchall()
+
+    def _check_duplicate_barcode(self, chunk_size):
+        path = self._csv([["Alpha", "10", "555", "", "5"],
+                          ["Beta", "20", "555", "", "5"],
+                          ["Gamma", "30", "777", "", "5"]])
+        result = medicines.import_catalog(path, chunk_size=chunk_size)
+        self.assertEqual((result["inserted"], result["updated"], result["skipped"]), (2, 0, 1))
+        rejects = self._rejects(result)
+        self.assertEqual([r["Name"] for r in rejects], ["Beta"])
+        self.assertIn("already used", rejects[0]["Reason"])
+        self.assertEqual(self._medicines(), [("Alpha", 10.0, "555"), ("Gamma", 30.0, "777")])
+
+    def test_duplicate_barcode_in_one_chunk_is_rejected(self):
+        self._check_duplicate_barcode(chunk_size=1000)
+
+    def test_duplicate_barcode_in_a_later_chunk_is_rejected(self):
+        # Must not fall through to "barcode exists -> update" and overwrite Alpha
+        self._check_duplicate_barcode(chunk_size=1)
+
+    def test_negative_or_bad_numbers_are_rejected_and_the_rest_imported(self):
+        path = self._csv([["Alpha", "10", "", "", "5"],
+                          ["Beta", "20", "", "-1", ""],
+                          ["Gamma", "30", "", "", "-3"],
+                          ["Delta", "40", "", "", "lots"],
+                          ["Epsilon", "50", "", "2", ""]])
+        result = medicines.import_catalog(path, chunk_size=1)
+        self.assertEqual((result["inserted"], result["skipped"]), (2, 3))
+        self.assertEqual([r["Name"] for r in self._rejects(result)], ["Beta", "Gamma", "Delta"])
+        self.assertEqual([m[0] for m in self._medicines()], ["Alpha", "Epsilon"])
+        self.assertEqual([m[1] for m in catalog.search("Alpha")], ["Alpha"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,68 @@
+# tests/test_numbering.py
+# Per-day invoice numbers: sequence, daily rollover, rollback and the configured format.
+import os, sys, datetime, tempfile, unittest
+from unittest import mock
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+import db
+from services import numbering, medicines
+from services.invoices import save_invoice
+
+DAY1 = datetime.datetime(2025, 3, 31, 23, 59, 58)
+DAY2 = datetime.datetime(2025, 4, 1, 0, 0, 1)
+
+
+class InvoiceNumberingTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.old = db.DB_PATH
+        db.DB_PATH = os.path.join(self.tmp.name, "clinic.db")
+        db.init_db()
+
+    def tearDown(self):
+        db.close_connection()
+        db.DB_PATH = self.old
+        self.tmp.cleanup()
+
+    def _next(self, now, fmt=None):
+        with db.get_connection() as conn:
+            c = conn.cursor()
+            c.execute("BEGIN IMMEDIATE")
+            no = numbering.next_invoice_no(c, now, fmt)
+            conn.commit()
+        return no
+
+    def test_sequence_restarts_every_day(self):
+        self.assertEqual(self._next(DAY1), "INV-20250331-0001")
+        self.assertEqual(self._next(DAY1), "INV-20250331-0002")
+        self.assertEqual(self._next(DAY2), "INV-20250401-0001")
+        self.assertEqual(self._next(DAY1), "INV-20250331-0003")   # each day keeps its own counter
+        self.assertEqual(self._next(DAY2), "INV-20250401-0002")
+
+    def test_rolled_back_number_is_reused(self):
+        self.assertEqual(self._next(DAY1), "INV-20250331-0001")
+        with db.get_connection() as conn:
+            c = conn.cursor()
+            c.execute("BEGIN IMMEDIATE")
+            self.assertEqual(numbering.next_invoice_no(c, DAY1), "INV-20250331-0002")
+            conn.rollback()
+        self.assertEqual(self._next(DAY1), "INV-20250331-0002")
+
+    def test_configured_format(self):
+        self.assertEqual(self._next(DAY1, "{date:%y%m%d}/{seq}"), "250331/1")
+        with mock.patch.object(numbering, "INVOICE_NO_FORMAT", "CL-{date:%Y-%m-%d}-{seq:03d}"):
+            self.assertEqual(self._next(DAY1), "CL-2025-03-31-002")
+
+    def test_saved_invoices_get_consecutive_numbers(self):
+        medicines.add_medicine("Paracetamol", 10, 50)
+        cart = [{"medicine_id": 1, "name": "Paracetamol", "qty": 1, "unit_price": 10}]
+        today = datetime.date.today().strftime("%Y%m%d")
+        nos = [save_invoice(cart)[1] for _ in range(2)]
+        self.assertEqual(nos, [f"INV-{today}-0001", f"INV-{today}-0002"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,39 @@
+# tests/test_search.py
+# Name search: word-prefix matches through FTS, mid-word matches through the LIKE fallback.
+import os, sys, tempfile, unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+import db
+from services import patients, medicines
+
+
+class SearchTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.old = db.DB_PATH
+        db.DB_PATH = os.path.join(self.tmp.name, "clinic.db")
+        db.init_db()
+
+    def tearDown(self):
+        db.close_connection()
+        db.DB_PATH = self.old
+        self.tmp.cleanup()
+
+    def test_patient_word_prefix_and_mid_word(self):
+        patients.add_patient("Ayesha Siddiqui")
+        patients.add_patient("Bilal Khan")
+        self.assertEqual([p.name for p in patients.search_patients("sidd")], ["Ayesha Siddiqui"])
+        self.assertEqual([p.name for p in patients.search_patients("ddiq")], ["Ayesha Siddiqui"])
+        self.assertEqual(patients.search_patients("zzz"), [])
+
+    def test_medicine_mid_word(self):
+        medicines.add_medicine("Paracetamol 500mg", 10, 5)
+        self.assertEqual([m.name for m in medicines.search_medicines("para")], ["Paracetamol 500mg"])
+        self.assertEqual([m.name for m in medicines.search_medicines("cetam")], ["Paracetamol 500mg"])
+
+
+if __name__ == "__main__":
+    unittest.main()
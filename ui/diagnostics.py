@@ -0,0 +1,119 @@
+# ui/diagnostics.py
+import os, sys
+ROOT = os.path.dirname(os.path.dirname(__file__))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+import tkinter as tk
+from tkinter import ttk, messagebox
+
+from services import instrumentation
+from services.printing import open_file
+
+
+class DiagnosticsWindow(tk.Toplevel):
+    """Live view of services.instrumentation: function timings, SQL timings, slow queries."""
+
+    REFRESH_MS = 1000
+
+    def __init__(self, parent):
+        super().__init__(parent)
+        self.title("Diagnostics")
+        self.geometry("980x560")
+
+        bar = ttk.Frame(self); bar.pack(fill="x", padx=10, pady=(10, 4))
+        self.var_on = tk.BooleanVar(value=instrumentation.is_enabled())
+        ttk.Checkbutton(bar, text="Collect timings", variable=self.var_on,
+                        command=self.toggle).pack(side="left")
+        ttk.Button(bar, text="Reset", command=self.reset).pack(side="left", padx=6)
+        ttk.Button(bar, text="Save JSON...", command=self.save_json).pack(side="left")
+        self.lbl = ttk.Label(bar, text="")
+        self.lbl.pack(side="right")
+
+        nb = ttk.Notebook(self); nb.pack(fill="both", expand=True, padx=10, pady=(0, 10))
+        self.tv_funcs = self._table(nb, "Functions",
+                                    ("name", "calls", "mean_ms", "p50_ms", "p95_ms", "max_ms", "total_ms"),
+                                    {"name": 320})
+        self.tv_sql = self._table(nb, "SQL",
+                                  ("sql", "calls", "rows", "mean_ms", "p95_ms", "max_ms", "total_ms", "vm_steps"),
+                                  {"sql": 420})
+
+        slow = ttk.Frame(nb); nb.add(slow, text="Slow queries")
+        self.tv_slow = ttk.Treeview(slow, columns=("at", "ms", "rows", "sql"), show="headings", height=8)
+        for c, w in (("at", 150), ("ms", 80), ("rows", 70), ("sql", 600)):
+            self.tv_slow.heading(c, text=c)
+            self.tv_slow.column(c, width=w, anchor="w")
+        self.tv_slow.pack(fill="both", expand=True)
+        self.tv_slow.bind("<<TreeviewSelect>>", self.show_plan)
+        self.txt_plan = tk.Text(slow, height=8, wrap="none")
+        self.txt_plan.pack(fill="x", pady=(6, 0))
+
+        self._slow = []
+        self.refresh()
+
+    def _table(self, nb, title, cols, widths):
+        frame = ttk.Frame(nb); nb.add(frame, text=title)
+        tv = ttk.Treeview(frame, columns=cols, show="headings")
+        for c in cols:
+            tv.heading(c, text=c)
+            tv.column(c, width=widths.get(c, 80), anchor="w" if c in widths else "e")
+        sb = ttk.Scrollbar(frame, orient="vertical", command=tv.yview)
+        tv.configure(yscrollcommand=sb.set)
+        tv.pack(side="left", fill="both", expand=True)
+        sb.pack(side="right", fill="y")
+        return tv
+
+    # ---- actions ----
+    def toggle(self):
+        if self.var_on.get():
+            instrumentation.enable()
+        else:
+            instrumentation.disable()
+        self.refresh(reschedule=False)
+
+    def reset(self):
+        instrumentation.reset()
+        self.refresh(reschedule=False)
+
+    def save_json(self):
+        try:
+            path = instrumentation.dump_json()
+        except Exception as e:
+            messagebox.showerror("Diagnostics", str(e), parent=self)
+            return
+        open_file(path)
+
+    def show_plan(self, _e=None):
+        sel = self.tv_slow.selection()
+        self.txt_plan.delete("1.0", tk.END)
+        if not sel:
+            return
+        entry = self._slow[int(sel[0])]
+        plan = entry["plan"] or ["(no plan captured)"]
+        self.txt_plan.insert("1.0", entry["sql"] + "\n\n" + "\n".join(plan))
+
+    # ---- display ----
+    def refresh(self, reschedule=True):
+        if not self.winfo_exists():
+            return
+        snap = instrumentation.snapshot()
+        status = ("Collecting" if snap["enabled"] else "Off") + f" since {snap['since']}"
+        if snap["startup_ms"]:
+            status = f"Startup: {max(snap['startup_ms'].values()):.0f} ms   |   " + status
+        self.lbl.config(text=status)
+
+        self.tv_funcs.delete(*self.tv_funcs.get_children())
+        for name, s in snap["functions"].items():
+            self.tv_funcs.insert("", "end", values=(name, s["calls"], s["mean_ms"], s["p50_ms"],
+                                                     s["p95_ms"], s["max_ms"], s["total_ms"]))
+        self.tv_sql.delete(*self.tv_sql.get_children())
+        for sql, s in snap["sql"].items():
+            self.tv_sql.insert("", "end", values=(sql, s["calls"], s["rows"], s["mean_ms"], s["p95_ms"],
+                                                   s["max_ms"], s["total_ms"], s["vm_steps"]))
+        if len(snap["slow_queries"]) != len(self._slow):
+            self._slow = snap["slow_queries"]
+            self.tv_slow.delete(*self.tv_slow.get_children())
+            for i, e in enumerate(self._slow):
+                self.tv_slow.insert("", "end", iid=str(i), values=(e["at"], e["ms"], e["rows"], e["sql"]))
+        if reschedule:
+            self.after(self.REFRESH_MS, self.refresh)
@@ -7,6 +7,7 @@ if ROOT not in sys.path:
 import tkinter as tk
 from tkinter import ttk, messagebox
 from services.medicines import list_medicines, adjust_stock
+from services.alerts import low_stock_medicines
 
 class InventoryFrame(ttk.Frame):
     def __init__(self, parent):
@@ -64,16 +65,11 @@ class InventoryFrame(ttk.Frame):
         for r in rows:
             self.tbl_all.insert("", "end", values=r)
 
-        # Low stock: filter rows here
+        # Low stock: served by the partial low-stock index
         for i in self.tbl_low.get_children():
             self.tbl_low.delete(i)
-        for r in rows:
-            _id, _name, _cat, _price, stock, reorder, _barcode, _active = r
-            try:
-                if int(stock) <= int(reorder):
-                    self.tbl_low.insert("", "end", values=r)
-            except:
-                pass
+        for r in low_stock_medicines():
+            self.tbl_low.insert("", "end", values=r)
 
     def stock_in(self):
         try:
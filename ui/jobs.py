@@ -0,0 +1,210 @@
+# ui/jobs.py
+import os, sys, queue, threading, time, itertools
+ROOT = os.path.dirname(os.path.dirname(__file__))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+import tkinter as tk
+from tkinter import ttk
+
+
+class Job:
+    """One unit of background work (printing, rendering, exporting)."""
+
+    _ids = itertools.count(1)
+
+    def __init__(self, title, fn, args, on_done, on_error, retries):
+        self.id = next(Job._ids)
+        self.title = title
+        self.fn = fn
+        self.args = args
+        self.on_done = on_done
+        self.on_error = on_error
+        self.retries = retries
+        self.attempts = 0
+        self.status = "queued"        # queued / running / retrying / done / failed
+        self.result = None
+        self.error = None
+        self.created = time.time()
+
+
+class JobQueue:
+    """
+    Runs jobs on a worker thread so the Tk main loop never waits on disk,
+    printers or reports.
+
+        jobs = get_queue(widget)
+        jobs.submit("Invoice INV-...", print_invoice_html, inv_id, on_done=open_file)
+
+    fn(*args) runs on the worker. on_done(result) / on_error(exc) and the
+    subscribe() listeners are called on the Tk thread (results are handed back
+    through a queue and picked up with after()). A failed job is tried again
+    `retries` times, retry_delay_ms apart; ValueError means bad input and is
+    never retried. Jobs that still fail stay listed as "failed" for the panel.
+    """
+
+    def __init__(self, widget, retries=2, retry_delay_ms=2000, poll_ms=100, keep=200):
+        self.widget = widget
+        self.retries = retries
+        self.retry_delay_ms = retry_delay_ms
+        self.poll_ms = poll_ms
+        self.keep = keep              # finished jobs kept for the panel
+        self.jobs = []                # newest last
+        self._listeners = []
+        self._todo = queue.Queue()
+        self._events = queue.Queue()
+        self._worker = threading.Thread(target=self._run, daemon=True)
+        self._worker.start()
+        widget.after(self.poll_ms, self._poll)
+
+    # ---- Tk thread ----
+    def submit(self, title, fn, *args, on_done=None, on_error=None, retries=None):
+        job = Job(title, fn, args, on_done, on_error, self.retries if retries is None else retries)
+        self.jobs.append(job)
+        self._trim()
+        self._todo.put(job)
+        self._notify()
+        return job
+
+    def retry(self, job):
+        """Queue a failed job again (from the panel)."""
+        if job.status != "failed":
+            return
+        job.status, job.error, job.attempts = "queued", None, 0
+        self._todo.put(job)
+        self._notify()
+
+    def clear_finished(self):
+        self.jobs = [j for j in self.jobs if j.status not in ("done", "failed")]
+        self._notify()
+
+    def counts(self):
+        out = {"queued": 0, "running": 0, "retrying": 0, "done": 0, "failed": 0}
+        for j in self.jobs:
+            out[j.status] += 1
+        return out
+
+    def subscribe(self, listener):
+        """listener(job_queue) is called on the Tk thread whenever a job changes."""
+        self._listeners.append(listener)
+
+    def unsubscribe(self, listener):
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    def _notify(self):
+        for fn in list(self._listeners):
+            try:
+                fn(self)
+            except Exception:
+                pass
+
+    def _trim(self):
+        extra = len(self.jobs) - self.keep
+        if extra > 0:
+            finished = [j for j in self.jobs if j.status == "done"][:extra]
+            self.jobs = [j for j in self.jobs if j not in finished]
+
+    def _poll(self):
+        changed = False
+        try:
+            while True:
+                kind, job = self._events.get_nowait()
+                changed = True
+                if kind == "started":
+                    job.status = "running"
+                elif kind == "done":
+                    job.status = "done"
+                    if job.on_done is not None:
+                        self._call(job.on_done, job.result)
+                elif job.attempts <= job.retries and not isinstance(job.error, ValueError):
+                    job.status = "retrying"
+                    self.widget.after(self.retry_delay_ms, lambda j=job: self._todo.put(j))
+                else:
+                    job.status = "failed"
+                    if job.on_error is not None:
+                        self._call(job.on_error, job.error)
+        except queue.Empty:
+            pass
+        if changed:
+            self._notify()
+        try:
+            self.widget.after(self.poll_ms, self._poll)
+        except tk.TclError:
+            self._todo.put(None)      # window destroyed: let the worker exit
+
+    @staticmethod
+    def _call(fn, value):
+        try:
+            fn(value)
+        except Exception:
+            pass
+
+    # ---- worker thread ----
+    def _run(self):
+        while True:
+            job = self._todo.get()
+            if job is None:
+                return
+            job.attempts += 1
+            self._events.put(("started", job))
+            try:
+                job.result = job.fn(*job.args)
+                job.error = None
+                self._events.put(("done", job))
+            except Exception as e:
+                job.error = e
+                self._events.put(("error", job))
+
+
+_queues = {}
+
+
+def get_queue(widget):
+    """The shared JobQueue of the widget's main window (created on first use)."""
+    root = widget.nametowidget(".")
+    key = str(root)
+    if key not in _queues:
+        _queues[key] = JobQueue(root)
+    return _queues[key]
+
+
+class JobsPanel(tk.Toplevel):
+    """Lists recent jobs with their status; failed ones can be retried."""
+
+    def __init__(self, parent, jobs):
+        super().__init__(parent)
+        self.title("Background Jobs")
+        self.jobs = jobs
+
+        cols  = ("id", "title", "status", "attempts", "error")
+        heads = ["#", "Job", "Status", "Tries", "Error"]
+        self.tv = ttk.Treeview(self, columns=cols, show="headings", height=12)
+        for c, h in zip(cols, heads):
+            self.tv.heading(c, text=h)
+            self.tv.column(c, width={"id": 50, "title": 260, "error": 300}.get(c, 80), anchor="w")
+        self.tv.tag_configure("failed", foreground="#b00020")
+        self.tv.pack(fill="both", expand=True, padx=10, pady=(10, 4))
+
+        bb = ttk.Frame(self); bb.pack(fill="x", padx=10, pady=(0, 10))
+        ttk.Button(bb, text="Retry Selected", command=self.retry_selected).pack(side="left", padx=4)
+        ttk.Button(bb, text="Clear Finished", command=jobs.clear_finished).pack(side="left", padx=4)
+        ttk.Button(bb, text="Close", command=self.destroy).pack(side="right", padx=4)
+
+        jobs.subscribe(self.refresh)
+        self.bind("<Destroy>", lambda e: e.widget is self and jobs.unsubscribe(self.refresh))
+        self.refresh()
+
+    def refresh(self, _jobs=None):
+        self.tv.delete(*self.tv.get_children())
+        for j in reversed(self.jobs.jobs):
+            err = "" if j.error is None else str(j.error)
+            self.tv.insert("", "end", iid=str(j.id), tags=(j.status,),
+                           values=(j.id, j.title, j.status, j.attempts, err))
+
+    def retry_selected(self):
+        by_id = {str(j.id): j for j in self.jobs.jobs}
+        for iid in self.tv.selection():
+            job = by_id.get(iid)
+            if job is not None:
+                self.jobs.retry(job)
@@ -1,10 +1,15 @@
 # ui/medicines.py
+import os
 import tkinter as tk
-from tkinter import ttk, messagebox
+from tkinter import ttk, messagebox, filedialog
+from ui.search import SearchController
+from ui.virtual_list import VirtualTreeview
+from ui.jobs import get_queue
 from services.medicines import (
     add_medicine, update_medicine, deactivate_medicine,
-    list_medicines, search_medicines
+    list_medicines_page, count_medicines, import_catalog
 )
+from services import catalog
 
 class MedicinesFrame(ttk.Frame):
     def __init__(self, parent):
@@ -13,6 +18,13 @@ class MedicinesFrame(ttk.Frame):
         self._build_table()
         self.reload_table()
 
+        # Search runs off the Tk thread; an empty box shows the full list again
+        self._search = SearchController(
+            self, self.var_search.get,
+            lambda q: catalog.search(q, limit=None) if q else None,
+            self.reload_table,
+        )
+
     def _build_form(self):
         frm = ttk.LabelFrame(self, text="Medicine Form")
         frm.pack(fill="x", padx=10, pady=10)
@@ -49,6 +61,7 @@ class MedicinesFrame(ttk.Frame):
         ttk.Button(btns, text="Update", command=self.do_update).pack(fill="x", pady=2)
         ttk.Button(btns, text="Deactivate", command=self.do_deactivate).pack(fill="x", pady=2)
         ttk.Button(btns, text="Clear", command=self.clear_form).pack(fill="x", pady=2)
+        ttk.Button(btns, text="Import List...", command=self.do_import).pack(fill="x", pady=2)
 
         # Search bar
         sfrm = ttk.Frame(self)
@@ -64,27 +77,24 @@ class MedicinesFrame(ttk.Frame):
         frame.pack(fill="both", expand=True, padx=10, pady=10)
 
         cols = ("id","name","category","unit_price","stock_qty","reorder_level","barcode","active")
-        self.table = ttk.Treeview(frame, columns=cols, show="headings", height=14)
-        for c in cols:
-            self.table.heading(c, text=c)
-            self.table.column(c, width=110 if c != "name" else 220, anchor="center")
+        self.table = VirtualTreeview(frame, cols, widths={c: 110 if c != "name" else 220 for c in cols}, height=14)
         self.table.pack(fill="both", expand=True)
 
-        self.table.bind("<<TreeviewSelect>>", self.on_select)
+        self.table.bind("<<RowSelect>>", self.on_select)
 
     def reload_table(self, rows=None):
-        for i in self.table.get_children():
-            self.table.delete(i)
-        rows = rows if rows is not None else list_medicines(include_inactive=True)
-        for r in rows:
-            self.table.insert("", "end", values=r)
+        """Show `rows` (search results), or page through the whole table if None."""
+        if rows is None:
+            self.table.set_source(
+                lambda after, limit: list_medicines_page(after, limit, include_inactive=True),
+                key=lambda r: r[1],
+                count=lambda: count_medicines(include_inactive=True),
+            )
+        else:
+            self.table.set_rows(rows)
 
     def on_search(self, e=None):
-        q = self.var_search.get().strip()
-        if q:
-            self.reload_table(search_medicines(q))
-        else:
-            self.reload_table()
+        self._search.schedule()
 
     def do_add(self):
         try:
@@ -134,13 +144,32 @@ class MedicinesFrame(ttk.Frame):
         except Exception as e:
             messagebox.showerror("Error", str(e))
 
+    def do_import(self):
+        path = filedialog.askopenfilename(
+            parent=self, title="Select price list",
+            filetypes=[("Price lists", "*.csv *.xlsx"), ("All files", "*.*")])
+        if not path:
+            return
+
+        def done(r):
+            self.reload_table()
+            msg = f"Inserted: {r['inserted']}\nUpdated: {r['updated']}\nSkipped: {r['skipped']}"
+            if r["reject_path"]:
+                msg += f"\n\nSkipped rows saved to:\n{r['reject_path']}"
+            messagebox.showinfo("Import complete", msg)
+
+        # retries=0: a partly applied import is reported, not silently run again
+        get_queue(self).submit(f"Catalog import {os.path.basename(path)}", import_catalog, path,
+                               on_done=done, retries=0,
+                               on_error=lambda e: messagebox.showerror("Import failed", str(e)))
+
     def clear_form(self):
         self.var_id.set(""); self.var_name.set(""); self.var_category.set("")
         self.var_price.set(""); self.var_stock.set(""); self.var_reorder.set(""); self.var_barcode.set("")
 
     def on_select(self, e=None):
-        sel = self.table.selection()
-        if not sel: return
-        row = self.table.item(sel[0], "values")
+        row = self.table.selected_row()
+        if not row: return
+        row = ["" if v is None else v for v in row]
         self.var_id.set(row[0]); self.var_name.set(row[1]); self.var_category.set(row[2])
         self.var_price.set(row[3]); self.var_stock.set(row[4]); self.var_reorder.set(row[5]); self.var_barcode.set(row[6])
@@ -6,10 +6,12 @@ if ROOT not in sys.path:
 
 import tkinter as tk
 from tkinter import ttk, messagebox
+from ui.search import SearchController
+from ui.virtual_list import VirtualTreeview
 
 from services.patients import (
     add_patient, update_patient, deactivate_patient,
-    list_patients, search_patients
+    list_patients_page, count_patients, search_patients
 )
 
 class PatientsFrame(ttk.Frame):
@@ -19,6 +21,13 @@ class PatientsFrame(ttk.Frame):
         self._build_table()
         self.reload_table()
 
+        # Search runs off the Tk thread; an empty box shows the full list again
+        self._search = SearchController(
+            self, self.var_search.get,
+            lambda q: search_patients(q) if q else None,
+            self.reload_table,
+        )
+
     def _build_form(self):
         frm = ttk.LabelFrame(self, text="Patient Form")
         frm.pack(fill="x", padx=10, pady=10)
@@ -67,27 +76,24 @@ class PatientsFrame(ttk.Frame):
         frame.pack(fill="both", expand=True, padx=10, pady=10)
 
         cols = ("id","name","age","gender","phone","address","active")
-        self.table = ttk.Treeview(frame, columns=cols, show="headings", height=14)
-        for c in cols:
-            self.table.heading(c, text=c)
-            self.table.column(c, width=120 if c not in ("name","address") else 220, anchor="center")
+        self.table = VirtualTreeview(frame, cols, widths={c: 120 if c not in ("name","address") else 220 for c in cols}, height=14)
         self.table.pack(fill="both", expand=True)
 
-        self.table.bind("<<TreeviewSelect>>", self.on_select)
+        self.table.bind("<<RowSelect>>", self.on_select)
 
     def reload_table(self, rows=None):
-        for i in self.table.get_children():
-            self.table.delete(i)
-        rows = rows if rows is not None else list_patients(include_inactive=True)
-        for r in rows:
-            self.table.insert("", "end", values=r)
+        """Show `rows` (search results), or page through the whole table if None."""
+        if rows is None:
+            self.table.set_source(
+                lambda after, limit: list_patients_page(after, limit, include_inactive=True),
+                key=lambda r: r[0],
+                count=lambda: count_patients(include_inactive=True),
+            )
+        else:
+            self.table.set_rows(rows)
 
     def on_search(self, e=None):
-        q = self.var_search.get().strip()
-        if q:
-            self.reload_table(search_patients(q))
-        else:
-            self.reload_table()
+        self._search.schedule()
 
     def do_add(self):
         try:
@@ -138,8 +144,8 @@ class PatientsFrame(ttk.Frame):
         self.var_gender.set(""); self.var_phone.set(""); self.var_address.set("")
 
     def on_select(self, e=None):
-        sel = self.table.selection()
-        if not sel: return
-        row = self.table.item(sel[0], "values")
+        row = self.table.selected_row()
+        if not row: return
+        row = ["" if v is None else v for v in row]
         self.var_id.set(row[0]); self.var_name.set(row[1]); self.var_age.set(row[2])
         self.var_gender.set(row[3]); self.var_phone.set(row[4]); self.var_address.set(row[5])
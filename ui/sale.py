@@ -9,8 +9,12 @@ import tkinter as tk
 from tkinter import ttk, messagebox
 
 # services
-from services.medicines import search_medicines
-from services.invoices  import compute_totals, save_invoice, list_invoices_by_patient
+from services import catalog
+from ui.search import SearchController
+from ui.scanner import BarcodeScanner
+from ui.jobs import get_queue
+from services.cart      import Cart
+from services.invoices  import save_invoice, list_invoices_by_patient
 from services.printing  import (
     print_invoice_html,   # HTML only
     open_file             # open in default browser/viewer
@@ -19,13 +23,23 @@ from services.printing  import (
 class SaleFrame(ttk.Frame):
     def __init__(self, parent):
         super().__init__(parent)
-        self.cart = []                 # list[dict]: {medicine_id, name, qty, unit_price}
+        self.cart = Cart()             # keyed by medicine_id; cart Treeview rows use iid=str(medicine_id)
         self._last_invoice_id = None
+        self._results = []             # Medicine rows, parallel to the search listbox
+        self._jobs = get_queue(self)
 
         self._build_top()
         self._build_cart()
         self._build_summary()
 
+        self._search = SearchController(
+            self, self.var_search.get,
+            lambda q: catalog.search(q) if q else [],
+            self.show_search_results,
+        )
+        # Barcode scanner: a fast burst of keys + Enter adds one unit straight to the cart
+        self._scanner = BarcodeScanner(self, self.add_scanned)
+
         # Refresh search when the tab gains focus
         self.bind("<FocusIn>", lambda e: self.refresh_search())
 
@@ -41,7 +55,7 @@ class SaleFrame(ttk.Frame):
         ttk.Label(top, text="Search medicine").grid(row=0, column=0, padx=5, pady=5, sticky="w")
         e = ttk.Entry(top, textvariable=self.var_search, width=34)
         e.grid(row=0, column=1, padx=5, pady=5, sticky="w")
-        e.bind("<KeyRelease>", self.refresh_search)
+        e.bind("<KeyRelease>", lambda _e: self._search.schedule())
 
         self.lb = tk.Listbox(top, height=6, width=48)
         self.lb.grid(row=1, column=0, columnspan=2, padx=5, pady=5, sticky="w")
@@ -60,6 +74,11 @@ class SaleFrame(ttk.Frame):
         ttk.Button(top, text="Add to Cart", command=self.add_to_cart).grid(row=1, column=2, padx=6, pady=5, sticky="w")
         ttk.Button(top, text="Refresh",     command=self.refresh_search).grid(row=1, column=3, padx=6, pady=5, sticky="w")
 
+        self.var_scanner = tk.BooleanVar(value=True)
+        ttk.Checkbutton(top, text="Scanner", variable=self.var_scanner,
+                        command=lambda: setattr(self._scanner, "enabled", self.var_scanner.get()))\
+           .grid(row=1, column=4, padx=6, pady=5, sticky="w")
+
     # ---- Cart table ----
     def _build_cart(self):
         box = ttk.LabelFrame(self, text="Cart")
@@ -73,6 +92,7 @@ class SaleFrame(ttk.Frame):
         self.table.pack(fill="both", expand=True)
 
         bb = ttk.Frame(box); bb.pack(fill="x")
+        ttk.Button(bb, text="Set Qty", command=self.set_selected_qty).pack(side="left", padx=4, pady=6)
         ttk.Button(bb, text="Remove Selected", command=self.remove_selected).pack(side="left", padx=4, pady=6)
         ttk.Button(bb, text="Clear Cart",      command=self.clear_cart).pack(side="left", padx=4, pady=6)
 
@@ -94,16 +114,19 @@ class SaleFrame(ttk.Frame):
 
         ttk.Button(frm, text="Save Invoice", command=self.save_invoice_ui).grid(row=0, column=4, padx=6, pady=5)
 
+        self.lbl_status = ttk.Label(frm, text="")
+        self.lbl_status.grid(row=1, column=0, columnspan=5, padx=5, pady=(0, 5), sticky="w")
+
     # ---- Events ----
     def refresh_search(self, event=None):
-        q = (self.var_search.get() or "").strip()
+        """Re-run the current search now (results arrive via show_search_results)."""
+        self._search.run_now()
+
+    def show_search_results(self, rows):
+        self._results = list(rows)
         self.lb.delete(0, tk.END)
-        if not q:
-            return
-        rows = search_medicines(q)  # id, name, category, unit_price, stock_qty, reorder_level, barcode, active
-        for r in rows:
-            mid, name, category, unit_price, stock_qty, _, _, _ = r
-            self.lb.insert(tk.END, f"{mid} | {name} | Rs {unit_price} | Stock: {stock_qty}")
+        for r in self._results:
+            self.lb.insert(tk.END, f"{r.id} | {r.name} | Rs {r.unit_price} | Stock: {r.stock_qty}")
 
     def add_to_cart(self):
         sel = self.lb.curselection()
@@ -111,10 +134,7 @@ class SaleFrame(ttk.Frame):
             messagebox.showerror("Error", "Select a medicine from the list.")
             return
 
-        line = self.lb.get(sel[0])
-        parts = [p.strip() for p in line.split("|")]
-        mid = int(parts[0]); name = parts[1]
-        unit_price = float(parts[2].replace("Rs", "").strip())
+        med = self._results[sel[0]]
 
         try:
             qty = int(self.var_qty.get())
@@ -124,49 +144,71 @@ class SaleFrame(ttk.Frame):
             messagebox.showerror("Error", "Invalid quantity.")
             return
 
-        # Combine if same medicine already in cart
-        for it in self.cart:
-            if it["medicine_id"] == mid:
-                it["qty"] += qty
-                self.rebuild_table()
-                self.update_totals()
-                return
+        self._add_line(med, qty)
 
-        self.cart.append({"medicine_id": mid, "name": name, "qty": qty, "unit_price": unit_price})
-        self.table.insert("", "end", values=(mid, name, qty, unit_price, round(qty * unit_price, 2)))
+    def add_scanned(self, code):
+        """A scanned barcode: add one unit of its medicine (in-memory lookup, one row updated)."""
+        row = catalog.find_by_barcode(code)
+        if row is None:
+            self.bell()
+            self.lbl_status.config(text=f"Unknown barcode: {code}")
+            return
+        line = self._add_line(row, 1)
+        self.table.see(str(row.id))
+        note = "  (not enough stock)" if line["qty"] > row.stock_qty else ""
+        self.lbl_status.config(text=f"Scanned: {row.name}  x{line['qty']}{note}")
+
+    def _add_line(self, med, qty):
+        # Same medicine again: only its existing row is updated
+        line, merged = self.cart.add(med.id, med.name, qty, med.unit_price)
+        if merged:
+            self.table.item(str(med.id), values=self._row_values(line))
+        else:
+            self.table.insert("", "end", iid=str(med.id), values=self._row_values(line))
         self.update_totals()
+        return line
 
-    def rebuild_table(self):
-        for i in self.table.get_children():
-            self.table.delete(i)
-        for it in self.cart:
-            self.table.insert("", "end", values=(
-                it["medicine_id"], it["name"], it["qty"], it["unit_price"],
-                round(it["qty"] * it["unit_price"], 2)
-            ))
+    def _row_values(self, line):
+        mid = line["medicine_id"]
+        return (mid, line["name"], line["qty"], line["unit_price"], round(self.cart.line_total(mid), 2))
+
+    def set_selected_qty(self):
+        """Set the selected cart line's quantity to the Qty box value."""
+        sel = self.table.selection()
+        if not sel:
+            messagebox.showerror("Error", "Select a cart line first.")
+            return
+        try:
+            line = self.cart.set_qty(int(sel[0]), int(self.var_qty.get()))
+        except Exception:
+            messagebox.showerror("Error", "Invalid quantity.")
+            return
+        self.table.item(sel[0], values=self._row_values(line))
+        self.update_totals()
 
     def remove_selected(self):
         sel = self.table.selection()
         if not sel:
             return
-        idx = self.table.index(sel[0])
+        self.cart.remove(int(sel[0]))
         self.table.delete(sel[0])
-        self.cart.pop(idx)
         self.update_totals()
 
     def clear_cart(self):
-        for i in self.table.get_children():
-            self.table.delete(i)
+        self.table.delete(*self.table.get_children())
         self.cart.clear()
         self.update_totals()
 
     def update_totals(self):
-        subtotal, total, _ = compute_totals(self.cart, self.var_doctor_fee.get())
+        try:
+            subtotal, total, _ = self.cart.totals(self.var_doctor_fee.get())
+        except ValueError:
+            return                    # fee box mid-edit (e.g. "5a"): keep the last totals
         self.lbl_subtotal.config(text=f"Subtotal: {subtotal:.2f}")
         self.lbl_total.config(text=f"Grand Total: {total:.2f}")
 
     def save_invoice_ui(self):
-        """Save invoice, then open an HTML invoice for printing (no PDFs)."""
+        """Save invoice, clear the cart, and produce the HTML invoice in the background."""
         # 1) Patient ID (optional)
         try:
             pid_txt = (self.var_pid.get() or "").strip()
@@ -182,25 +224,19 @@ class SaleFrame(ttk.Frame):
                 patient_id=pid,
                 doctor_fee=self.var_doctor_fee.get() or 0
             )
-            self._last_invoice_id = inv_id
-
-            # 3) Generate HTML invoice and open in default browser (Ctrl+P to print)
-            html_path = print_invoice_html(inv_id)
-            open_file(html_path)
-
-            # 4) Clear UI & refresh
-            self.clear_cart()
-            self.var_doctor_fee.set("0")
-            self.refresh_search()
-
-            # 5) Confirmation
-            messagebox.showinfo(
-                "Success",
-                f"Invoice saved.\nNumber: {inv_no}\nTotal: {total:.2f}\nItems: {total_items}"
-            )
-
         except Exception as e:
             messagebox.showerror("Error", str(e))
+            return
+        self._last_invoice_id = inv_id
+
+        # 3) Clear UI right away so the next sale can start
+        self.clear_cart()
+        self.var_doctor_fee.set("0")
+        self.refresh_search()
+        self.lbl_status.config(text=f"Saved {inv_no}  |  Total: {total:.2f}  |  Items: {total_items}")
+
+        # 4) Generate HTML invoice and open it in the default browser (Ctrl+P to print)
+        self._jobs.submit(f"Invoice {inv_no} (HTML)", print_invoice_html, inv_id, on_done=open_file)
 
     # ---- NEW: Patient billing history ----
     def show_patient_history(self):
@@ -227,18 +263,19 @@ class SaleFrame(ttk.Frame):
             tv.column(c, width=110 if c not in ("invoice_no","created_at") else 170, anchor="center")
         tv.pack(fill="both", expand=True, padx=10, pady=10)
 
-        for (inv_id, inv_no, created, subtotal, doctor_fee, total, total_items) in rows:
-            tv.insert("", "end", values=(
-                inv_id, inv_no, created, total_items,
-                f"{float(subtotal):.2f}", f"{float(doctor_fee):.2f}", f"{float(total):.2f}"
+        for r in rows:
+            tv.insert("", "end", iid=str(r.id), values=(
+                r.id, r.invoice_no, r.created_at, r.total_items,
+                f"{float(r.subtotal):.2f}", f"{float(r.doctor_fee):.2f}", f"{float(r.total):.2f}"
             ))
+        by_id = {str(r.id): r for r in rows}
 
         btn = ttk.Frame(win); btn.pack(pady=6)
         def _open_selected():
             sel = tv.selection()
             if not sel:
                 return
-            inv_id = int(tv.item(sel[0], "values")[0])  # first column is invoice_id
-            path = print_invoice_html(inv_id)
-            open_file(path)
+            inv = by_id[sel[0]]
+            self._jobs.submit(f"Invoice {inv.invoice_no} (HTML)", print_invoice_html, inv.id,
+                              on_done=open_file)
         ttk.Button(btn, text="Open Invoice", command=_open_selected).pack()
@@ -0,0 +1,86 @@
+# ui/scanner.py
+import os, sys
+ROOT = os.path.dirname(os.path.dirname(__file__))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+
+class BarcodeScanner:
+    """
+    Recognises a keyboard-wedge barcode scanner on a frame: a burst of at least
+    min_len characters, each within max_gap_ms of the previous one, followed
+    straight away by Enter. People don't type that fast, so ordinary typing in
+    the frame's entries is left alone.
+
+    on_scan(code) -> called on the Tk thread with the scanned text. The burst's
+    characters have already been typed into the focused Entry; they are removed
+    from it before on_scan runs.
+
+    Typical use:
+        self._scanner = BarcodeScanner(self, self.on_barcode)
+    """
+
+    def __init__(self, frame, on_scan, max_gap_ms=50, min_len=4):
+        self.frame = frame
+        self.on_scan = on_scan
+        self.max_gap_ms = max_gap_ms
+        self.min_len = min_len
+        self.enabled = True
+
+        self._buf = []
+        self._last = None             # event.time of the last buffered key
+        self._prefix = str(frame) + "."
+        # Key events bubble up to the toplevel; entries keep their own bindings
+        top = frame.winfo_toplevel()
+        self._bind_id = top.bind("<KeyPress>", self._on_key, add="+")
+        self._top = top
+        frame.bind("<Destroy>", self._on_destroy, add="+")
+
+    def reset(self):
+        self._buf.clear()
+        self._last = None
+
+    def _on_destroy(self, event):
+        if event.widget is self.frame:
+            # unbind(seq, funcid) drops every <KeyPress> binding of the toplevel
+            # before Python 3.13, so take out only our line of the script
+            try:
+                script = self._top.bind("<KeyPress>")
+                keep = "\n".join(line for line in script.split("\n") if self._bind_id not in line)
+                self._top.bind("<KeyPress>", keep if keep.strip() else "")
+                self._top.deletecommand(self._bind_id)
+            except Exception:
+                pass                  # toplevel already gone
+
+    def _on_key(self, event):
+        if not self.enabled or not str(event.widget).startswith(self._prefix):
+            return
+        fast = self._last is not None and 0 <= event.time - self._last <= self.max_gap_ms
+
+        if event.keysym in ("Return", "KP_Enter"):
+            code = "".join(self._buf)
+            self.reset()
+            if fast and len(code) >= self.min_len:
+                self._strip(event.widget, code)
+                self.on_scan(code)
+                return "break"
+            return
+
+        if len(event.char) != 1 or not event.char.isprintable():
+            if event.keysym not in ("Shift_L", "Shift_R"):
+                self.reset()          # arrows, backspace... not a scan
+            return
+        if not fast:
+            self._buf.clear()         # a pause: start a new burst here
+        self._buf.append(event.char)
+        self._last = event.time
+
+    @staticmethod
+    def _strip(widget, code):
+        """Take the scanned characters back out of the Entry they were typed into."""
+        try:
+            text = widget.get()
+        except Exception:
+            return                    # not an Entry (listbox, button...)
+        if isinstance(text, str) and text.endswith(code):
+            widget.delete(len(text) - len(code), "end")
@@ -0,0 +1,124 @@
+# ui/search.py
+import os, sys, queue, threading
+ROOT = os.path.dirname(os.path.dirname(__file__))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+
+class SearchController:
+    """
+    Debounced background search for a search box.
+
+    get_query()        -> current text (called on the Tk thread)
+    query_fn(text)     -> rows, runs on a worker thread (never blocks the main loop)
+    on_result(rows)    -> called on the Tk thread, only for the newest query
+    on_error(exc)      -> optional, called on the Tk thread if query_fn raised
+
+    Typical use:
+        self._search = SearchController(self, self.var_search.get, search_fn, self.show_rows)
+        entry.bind("<KeyRelease>", self._search.schedule)
+    """
+
+    def __init__(self, widget, get_query, query_fn, on_result, on_error=None,
+                 delay_ms=150, poll_ms=15):
+        self.widget = widget
+        self.get_query = get_query
+        self.query_fn = query_fn
+        self.on_result = on_result
+        self.on_error = on_error
+        self.delay_ms = delay_ms
+        self.poll_ms = poll_ms
+
+        self._seq = 0                 # id of the newest query we still want
+        self._sent = 0                # id of the last query handed to the worker
+        self._last_text = None        # text of the newest submitted query
+        self._after_id = None         # pending debounce timer
+        self._polling = False
+        self._requests = queue.Queue()
+        self._results = queue.Queue()
+        self._worker = threading.Thread(target=self._run, daemon=True)
+        self._worker.start()
+        widget.bind("<Destroy>", self._on_destroy, add="+")
+
+    # ---- Tk thread ----
+    def schedule(self, _event=None):
+        """Restart the debounce timer (bind this to <KeyRelease>)."""
+        self._cancel_timer()
+        self._after_id = self.widget.after(self.delay_ms, self._fire)
+
+    def run_now(self, force=True):
+        """Submit immediately, e.g. after data changed or when a tab is shown."""
+        self._cancel_timer()
+        self._fire(force)
+
+    def cancel(self):
+        """Forget any pending or running query; its result will be dropped."""
+        self._cancel_timer()
+        self._seq += 1
+        self._last_text = None
+
+    def _on_destroy(self, event):
+        if event.widget is self.widget:
+            self.cancel()
+            self._requests.put(None)  # let the worker thread exit
+
+    def _cancel_timer(self):
+        if self._after_id is not None:
+            self.widget.after_cancel(self._after_id)
+            self._after_id = None
+
+    def _fire(self, force=False):
+        self._after_id = None
+        text = (self.get_query() or "").strip()
+        if text == self._last_text and not force:
+            return                    # arrows, shift, etc. didn't change the query
+        self._last_text = text
+        self._seq += 1
+        self._sent = self._seq
+        self._requests.put((self._seq, text))
+        if not self._polling:
+            self._polling = True
+            self.widget.after(self.poll_ms, self._poll)
+
+    def _poll(self):
+        latest = None
+        try:
+            while True:
+                latest = self._results.get_nowait()
+        except queue.Empty:
+            pass
+
+        if latest is not None and latest[0] == self._sent:
+            self._polling = False
+            seq, rows, err = latest
+            if seq != self._seq:
+                return                # cancelled meanwhile
+            if err is None:
+                self.on_result(rows)
+            elif self.on_error is not None:
+                self.on_error(err)
+            return
+        try:
+            self.widget.after(self.poll_ms, self._poll)
+        except Exception:
+            self._polling = False     # widget destroyed
+
+    # ---- worker thread ----
+    def _run(self):
+        while True:
+            req = self._requests.get()
+            # Skip straight to the newest request if the user kept typing
+            try:
+                while req is not None:
+                    req = self._requests.get_nowait()
+            except queue.Empty:
+                pass
+            if req is None:
+                return
+            seq, text = req
+            if seq != self._sent:
+                continue              # a newer query is already queued
+            try:
+                self._results.put((seq, self.query_fn(text), None))
+            except Exception as e:
+                self._results.put((seq, None, e))
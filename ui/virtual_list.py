@@ -0,0 +1,183 @@
+# ui/virtual_list.py
+import os, sys
+ROOT = os.path.dirname(os.path.dirname(__file__))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from tkinter import ttk
+
+
+class VirtualTreeview(ttk.Frame):
+    """
+    A Treeview that only ever holds the rows that fit on screen.
+
+    Rows come from a keyset-paginated source:
+        fetch_page(after, limit) -> rows      (after=None for the first page)
+        key(row)                 -> cursor value for the next page
+        count()                  -> total rows (optional, sizes the scrollbar)
+    Pages are fetched on demand as the user scrolls and kept in memory, so
+    scrolling back is free. set_rows() shows a plain list (e.g. search results).
+
+    The widget reuses a fixed set of Treeview items and just swaps their values.
+    Bind <<RowSelect>> on the widget (fired only when the user picks a row);
+    selected_row() returns the row tuple.
+    """
+
+    def __init__(self, parent, columns, widths=None, height=14, page_size=200, anchor="center"):
+        super().__init__(parent)
+        self.page_size = page_size
+        self.tree = ttk.Treeview(self, columns=columns, show="headings", height=height,
+                                 selectmode="browse")
+        for c in columns:
+            self.tree.heading(c, text=c)
+            self.tree.column(c, width=(widths or {}).get(c, 120), anchor=anchor)
+        self.vsb = ttk.Scrollbar(self, orient="vertical", command=self._on_scrollbar)
+        self.tree.pack(side="left", fill="both", expand=True)
+        self.vsb.pack(side="right", fill="y")
+
+        self._visible = height
+        self._iids = []
+        self._rows = []              # rows loaded so far
+        self._fetch = None
+        self._key = None
+        self._count_fn = None
+        self._count = None
+        self._total = 0
+        self._done = True            # no more pages to fetch
+        self._top = 0                # index of the first visible row
+        self._selected = None        # index of the selected row (survives scrolling)
+
+        self.tree.bind("<Configure>", self._on_resize)
+        self.tree.bind("<<TreeviewSelect>>", self._on_select, add="+")
+        self.tree.bind("<MouseWheel>", self._on_wheel)
+        self.tree.bind("<Button-4>", lambda _e: self.scroll(-3))
+        self.tree.bind("<Button-5>", lambda _e: self.scroll(3))
+        self.tree.bind("<Up>", lambda _e: self._move_selection(-1))
+        self.tree.bind("<Down>", lambda _e: self._move_selection(1))
+        self.tree.bind("<Prior>", lambda _e: self.scroll(-self._visible))
+        self.tree.bind("<Next>", lambda _e: self.scroll(self._visible))
+        self._make_items()
+
+    # ---- data sources ----
+    def set_source(self, fetch_page, key, count=None):
+        """Show a paginated source from the top; only the first page is fetched now."""
+        self._fetch, self._key, self._count_fn = fetch_page, key, count
+        self._count = count() if count else None
+        self._rows, self._done = [], False
+        self._reset()
+
+    def set_rows(self, rows):
+        """Show an in-memory list of rows."""
+        self._fetch, self._key, self._count_fn, self._count = None, None, None, None
+        self._rows, self._done = list(rows), True
+        self._reset()
+
+    def refresh(self):
+        """Re-read the current source, keeping the scroll position where possible."""
+        top = self._top
+        if self._fetch is not None:
+            self.set_source(self._fetch, self._key, self._count_fn)
+        self._top = top
+        self._render()
+
+    def selected_row(self):
+        if self._selected is None or self._selected >= len(self._rows):
+            return None
+        return self._rows[self._selected]
+
+    # ---- scrolling ----
+    def scroll(self, delta):
+        self._top += int(delta)
+        self._render()
+        return "break"
+
+    def _on_wheel(self, e):
+        return self.scroll(-3 if e.delta > 0 else 3)
+
+    def _on_scrollbar(self, action, value, unit=None):
+        if action == "moveto":
+            self._top = int(float(value) * max(self._total, 1))
+            self._render()
+        elif action == "scroll":
+            step = self._visible if unit == "pages" else 1
+            self.scroll(int(value) * step)
+
+    def _move_selection(self, delta):
+        idx = (self._top if self._selected is None else self._selected + delta)
+        self._ensure_loaded(idx + 1)
+        if not self._rows:
+            return "break"
+        idx = max(0, min(idx, len(self._rows) - 1))
+        if idx < self._top:
+            self._top = idx
+        elif idx >= self._top + self._visible:
+            self._top = idx - self._visible + 1
+        self._selected = idx
+        self._render()
+        self.event_generate("<<RowSelect>>")
+        return "break"
+
+    # ---- internals ----
+    def _reset(self):
+        self._top = 0
+        self._selected = None
+        self._render()
+
+    def _make_items(self):
+        for iid in self._iids:
+            self.tree.delete(iid)
+        self._iids = [self.tree.insert("", "end", values=()) for _ in range(self._visible)]
+
+    def _on_resize(self, e):
+        rowheight = int(ttk.Style().lookup("Treeview", "rowheight") or 20)
+        fits = max(1, (e.height - 24) // rowheight)
+        if fits != self._visible:
+            self._visible = fits
+            self._make_items()
+            self._render()
+
+    def _ensure_loaded(self, upto):
+        """Fetch pages until at least `upto` rows are loaded (or the source ends)."""
+        while not self._done and len(self._rows) < upto:
+            need = max(self.page_size, upto - len(self._rows))
+            after = self._key(self._rows[-1]) if self._rows else None
+            page = self._fetch(after, need)
+            self._rows.extend(page)
+            if len(page) < need:
+                self._done = True
+
+    def _render(self):
+        # Load the visible window plus one page of read-ahead
+        self._ensure_loaded(self._top + self._visible + self.page_size // 2)
+        n = len(self._rows)
+        self._total = n if self._done else max(n + 1, self._count or 0)
+        self._top = max(0, min(self._top, n - self._visible))
+
+        selected_iid = None
+        for i, iid in enumerate(self._iids):
+            idx = self._top + i
+            if idx < n:
+                self.tree.item(iid, values=self._rows[idx])
+                self.tree.move(iid, "", i)          # re-attaches items hidden earlier
+                if idx == self._selected:
+                    selected_iid = iid
+            else:
+                self.tree.detach(iid)
+        if selected_iid:
+            if self.tree.selection() != (selected_iid,):
+                self.tree.selection_set(selected_iid)
+        elif self.tree.selection():
+            self.tree.selection_remove(*self.tree.selection())
+
+        total = max(self._total, 1)
+        self.vsb.set(self._top / total, min(1.0, (self._top + self._visible) / total))
+
+    def _on_select(self, _e=None):
+        # Ignore the events our own selection_set/remove calls cause while scrolling
+        sel = self.tree.selection()
+        if not sel or sel[0] not in self._iids:
+            return
+        idx = self._top + self._iids.index(sel[0])
+        if idx != self._selected and idx < len(self._rows):
+            self._selected = idx
+            self.event_generate("<<RowSelect>>")